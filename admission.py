@@ -0,0 +1,89 @@
+from collections import deque
+from typing import Any
+
+
+class TokenBucket:
+    __slots__ = ("rate", "capacity", "tokens", "updated_at")
+
+    def __init__(self, rate: float, capacity: float, now: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = now
+
+    def consume(self, now: float, amount: float = 1.0) -> bool:
+        elapsed = now - self.updated_at
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self.updated_at = now
+        if self.tokens < amount:
+            return False
+        self.tokens -= amount
+        return True
+
+    def is_full(self, now: float) -> bool:
+        return self.tokens + (now - self.updated_at) * self.rate >= self.capacity
+
+
+class AdmissionController:
+    """Connection-level gatekeeping: a global cap, per-IP rate limiting and a
+    bounded waiting queue for players who say HI once every seat is taken."""
+
+    # Idle per-IP buckets are pruned once this many addresses are tracked
+    _MAX_TRACKED_IPS = 4096
+
+    def __init__(self, max_connections: int, rate_per_ip: float,
+                 burst_per_ip: float, queue_size: int):
+        self.max_connections = max_connections
+        self.rate_per_ip = rate_per_ip
+        self.burst_per_ip = burst_per_ip
+        self.queue_size = queue_size
+        self.open_connections = 0
+        self._buckets: dict[str, TokenBucket] = {}
+        # (writer, HI message) pairs in arrival order
+        self._waiting: deque[tuple[Any, dict]] = deque()
+
+    def admit(self, ip: str, now: float) -> str | None:
+        """Count a new connection in; returns a rejection reason if it must be refused."""
+        if self.open_connections >= self.max_connections:
+            return "server connection limit reached"
+        bucket = self._buckets.get(ip)
+        if bucket is None:
+            if len(self._buckets) >= self._MAX_TRACKED_IPS:
+                self._prune(now)
+            bucket = self._buckets[ip] = TokenBucket(self.rate_per_ip, self.burst_per_ip, now)
+        if not bucket.consume(now):
+            return "too many connection attempts"
+        self.open_connections += 1
+        return None
+
+    def release(self) -> None:
+        self.open_connections = max(0, self.open_connections - 1)
+
+    def _prune(self, now: float) -> None:
+        for ip in [ip for ip, bucket in self._buckets.items() if bucket.is_full(now)]:
+            del self._buckets[ip]
+
+    def enqueue(self, writer: Any, hello: dict) -> int | None:
+        """Park a player in the waiting queue; returns their position or None if it is full."""
+        if len(self._waiting) >= self.queue_size:
+            return None
+        self._waiting.append((writer, hello))
+        return len(self._waiting)
+
+    def dequeue(self) -> tuple[Any, dict] | None:
+        return self._waiting.popleft() if self._waiting else None
+
+    def forget(self, writer: Any) -> None:
+        for i, (queued_writer, _) in enumerate(self._waiting):
+            if queued_writer is writer:
+                del self._waiting[i]
+                return
+
+    def is_queued(self, writer: Any) -> bool:
+        return any(queued_writer is writer for queued_writer, _ in self._waiting)
+
+    def drain_queue(self) -> list[tuple[Any, dict]]:
+        waiting = list(self._waiting)
+        self._waiting.clear()
+        return waiting
@@ -1,19 +1,14 @@
 
 def generate_answer(question_type, short_question) -> str:
-    # print("generating answer...")
-    # print(question_type, short_question)
-    if question_type == "Usable IP Addresses of a Subnet":
-        return _generate_usable_ipv4_answer(short_question)
-    elif question_type == "Network and Broadcast Address of a Subnet":
-        return _generate_network_broadcast_answer(short_question)
-    elif question_type == "Roman Numerals":
-        return _generate_roman_numerals_answer(short_question)
-    elif question_type == "Mathematics":
-        return _generate_mathematics_answer(short_question)
-    else:
+    # The registry imports the solvers below, so it is looked up at call time
+    from qtypes import get as get_question_type
+
+    qtype = get_question_type(question_type)
+    if qtype is None:
         print("Unrecognised question type.")
         print(question_type)
         return ""
+    return qtype.solve(short_question)
 
 def _generate_mathematics_answer(short_question):
     ans = 0
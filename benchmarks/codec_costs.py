@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""Per-message-type encode/decode cost of the codec against plain json.
+
+The baseline is what helper.encode_message/decode_message did before the
+codec: json.dumps(...).encode() and json.loads(bytes.decode()).
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+import timeit
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import codec
+
+ROUNDS = 20000
+
+MESSAGES = {
+    "ANSWER": {"message_type": "ANSWER", "answer": "42"},
+    "PONG": {"message_type": "PONG", "sent_at": 12345.678901},
+    "RESULT": {"message_type": "RESULT", "correct": True,
+               "feedback": "Correct! 1 + 2 is 3", "elapsed": 1.2345},
+    "QUESTION": {"message_type": "QUESTION", "question_type": "Mathematics",
+                 "short_question": "12 + 7 - 3", "time_limit": 10,
+                 "trivia_question": "Question 3 (Mathematics):\nEvaluate 12 + 7 - 3"},
+    "LEADERBOARD": {"message_type": "LEADERBOARD", "version": 7, "base_version": 6,
+                    "entries": [[i, f"player{i}", i * 3, i] for i in range(5)]},
+}
+
+
+def _per_call_us(func, arg) -> float:
+    return min(timeit.repeat(lambda: func(arg), number=ROUNDS, repeat=5)) / ROUNDS * 1e6
+
+
+def main() -> None:
+    print(f"orjson: {'yes' if codec.orjson is not None else 'not installed'}")
+    print(f"{'message':12s} {'json enc':>9s} {'codec enc':>10s} {'json dec':>9s} {'codec dec':>10s}  (us/msg)")
+    for name, message in MESSAGES.items():
+        frame = codec.encode(message)
+        json_encode = _per_call_us(lambda m: json.dumps(m).encode("utf-8"), message)
+        codec_encode = _per_call_us(codec.encode, message)
+        json_decode = _per_call_us(lambda f: json.loads(f.decode("utf-8")), frame)
+        codec_decode = _per_call_us(codec.decode, frame)
+        print(f"{name:12s} {json_encode:9.2f} {codec_encode:10.2f} {json_decode:9.2f} {codec_decode:10.2f}")
+
+
+if __name__ == "__main__":
+    main()
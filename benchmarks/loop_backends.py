@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""Connect-storm and answer-flood timings on each available event loop backend.
+
+Server and bots share one process and one loop, so the numbers compare the
+backends end to end (both sides of every socket) rather than the server alone.
+Backends that are not installed are reported and skipped.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import io
+import json
+import sys
+import time
+from dataclasses import asdict
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from helper import describe_event_loop, event_loop_factory
+from server import Server, ServerMessageConfig
+
+PLAYERS = 500
+ANSWERS_PER_PLAYER = 40
+
+
+def _make_server() -> Server:
+    cfg = ServerMessageConfig(
+        port=0, players=PLAYERS, question_types=["Mathematics"] * 2,
+        question_formats={"Mathematics": "Evaluate {}"}, question_seconds=60,
+        # Park in BETWEEN_ROUNDS after the first round so the flood is not cut short
+        question_interval_seconds=60, ready_info="Ready", question_word="Question",
+        correct_answer="Correct", incorrect_answer="Incorrect",
+        points_noun_singular="point", points_noun_plural="points",
+        final_standings_heading="Final standings:", one_winner="Winner: {}",
+        multiple_winners="Winners: {}",
+    )
+    cfg.max_connections = PLAYERS * 2
+    cfg.connection_burst_per_ip = PLAYERS * 2
+    cfg.waiting_queue_size = 0
+    cfg.heartbeat_interval_seconds = 3600
+    cfg.heartbeat_timeout_seconds = 3600
+    return Server(**asdict(cfg), config_message=cfg)
+
+
+async def _bot(port: int, index: int, ready: asyncio.Event, questioned: list[float]) -> float:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(json.dumps({"message_type": "HI", "username": f"bot{index}"}).encode() + b"\n")
+    results = 0
+    while line := await reader.readline():
+        mtype = json.loads(line)["message_type"]
+        if mtype == "READY":
+            ready.set()
+        elif mtype == "QUESTION":
+            questioned.append(time.perf_counter())
+            frame = json.dumps({"message_type": "ANSWER", "answer": "0"}).encode() + b"\n"
+            writer.write(frame * ANSWERS_PER_PLAYER)
+        elif mtype == "RESULT":
+            results += 1
+            if results == ANSWERS_PER_PLAYER:
+                break
+    writer.close()
+    return time.perf_counter()
+
+
+async def _run(backend: str) -> tuple[str, float, float]:
+    server = _make_server()
+    listener = await asyncio.start_server(server._handle_client, "127.0.0.1", 0, backlog=PLAYERS)
+    port = listener.sockets[0].getsockname()[1]
+    orchestrator = asyncio.create_task(server._orchestrator())
+
+    readies = [asyncio.Event() for _ in range(PLAYERS)]
+    questioned: list[float] = []
+    start = time.perf_counter()
+    bots = [asyncio.create_task(_bot(port, i, readies[i], questioned)) for i in range(PLAYERS)]
+    await asyncio.gather(*(event.wait() for event in readies))
+    connect_storm = time.perf_counter() - start
+
+    finished = await asyncio.gather(*bots)
+    answer_flood = max(finished) - min(questioned)
+
+    server._game_over.set()
+    await orchestrator
+    listener.close()
+    await listener.wait_closed()
+    server._scheduler.close()
+    return describe_event_loop(), connect_storm, answer_flood
+
+
+def main() -> None:
+    answers = PLAYERS * ANSWERS_PER_PLAYER
+    for backend in ("asyncio", "uvloop"):
+        with contextlib.redirect_stderr(io.StringIO()):
+            used, factory = event_loop_factory(backend)
+        if used != backend:
+            print(f"{backend:8s}: not installed, skipped")
+            continue
+        with contextlib.redirect_stdout(io.StringIO()):
+            with asyncio.Runner(loop_factory=factory) as runner:
+                loop_name, connect_storm, answer_flood = runner.run(_run(backend))
+        print(f"{backend:8s}: connect storm {PLAYERS} HI->READY in {connect_storm:.3f}s; "
+              f"answer flood {answers} ANSWER->RESULT in {answer_flood:.3f}s "
+              f"({answers / answer_flood:,.0f}/s) [{loop_name}]")
+
+
+if __name__ == "__main__":
+    main()
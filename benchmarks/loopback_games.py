@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""Complete games per second over the in-memory loopback transport.
+
+Every game is a real Server (orchestrator, scheduler, scoring, leaderboard,
+FINISHED) with players that speak the wire protocol over LoopbackTransport,
+all inside one event loop. With no sockets involved the numbers track the
+server's own per-game cost rather than kernel networking.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import os
+import sys
+import time
+from dataclasses import asdict
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from answer import generate_answer
+from helper import decode_message, encode_message
+from server import Server, ServerMessageConfig
+from transport import LoopbackTransport
+
+GAMES = 500
+CONCURRENT = 50
+PLAYERS = 4
+QUESTION_TYPES = ["Mathematics", "Roman Numerals", "Usable IP Addresses of a Subnet"]
+
+
+def _make_server(network: LoopbackTransport, port: int) -> Server:
+    cfg = ServerMessageConfig(
+        port=port, players=PLAYERS, question_types=QUESTION_TYPES, question_formats={},
+        question_seconds=5, question_interval_seconds=0, ready_info="Ready", question_word="Question",
+        correct_answer="Correct", incorrect_answer="Incorrect",
+        points_noun_singular="point", points_noun_plural="points",
+        final_standings_heading="Final standings:", one_winner="Winner: {}",
+        multiple_winners="Winners: {}",
+    )
+    cfg.heartbeat_interval_seconds = 0
+    cfg.seed = port
+    return Server(**asdict(cfg), config_message=cfg, transport=network)
+
+
+async def _player(network: LoopbackTransport, port: int, name: str) -> None:
+    reader, writer = await network.open_connection("loopback", port)
+    writer.write(encode_message({"message_type": "HI", "username": name}) + b"\n")
+    while line := await reader.readline():
+        message = decode_message(line)
+        mtype = message["message_type"]
+        if mtype == "PING":
+            writer.write(encode_message({"message_type": "PONG", "sent_at": message.get("sent_at")}) + b"\n")
+        elif mtype == "QUESTION":
+            answer = generate_answer(message["question_type"], message["short_question"])
+            writer.write(encode_message({"message_type": "ANSWER", "answer": answer}) + b"\n")
+        elif mtype == "FINISHED":
+            break
+    writer.close()
+
+
+async def _game(network: LoopbackTransport, port: int) -> None:
+    server = _make_server(network, port)
+    server_task = asyncio.create_task(server.start())
+    await asyncio.sleep(0)
+    await asyncio.gather(*(_player(network, port, f"p{i}") for i in range(PLAYERS)))
+    await server_task
+
+
+async def _run() -> float:
+    network = LoopbackTransport()
+    ports = iter(range(10000, 10000 + GAMES))
+    started = time.perf_counter()
+    remaining = GAMES
+    while remaining:
+        batch = min(CONCURRENT, remaining)
+        await asyncio.gather(*(_game(network, next(ports)) for _ in range(batch)))
+        remaining -= batch
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        elapsed = asyncio.run(_run())
+    rounds = GAMES * len(QUESTION_TYPES)
+    print(f"{GAMES} games x {PLAYERS} players x {len(QUESTION_TYPES)} rounds in {elapsed:.2f}s: "
+          f"{GAMES / elapsed:,.0f} games/s, {rounds / elapsed:,.0f} rounds/s, "
+          f"{rounds * PLAYERS / elapsed:,.0f} answers/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""Memory footprint of 100k connected sessions plus one round of answer state.
+
+Compares the previous layout (dict-backed sessions, a writer-keyed dict and a
+per-round ``{session: answer}`` dict) with SessionTable + QuestionRound.
+"""
+
+from __future__ import annotations
+
+import gc
+import sys
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from server import QuestionRound, SessionTable
+
+SESSIONS = 100_000
+
+
+class _DictSession:
+    def __init__(self, username, writer):
+        self.username = username
+        self.point = 0
+        self.writer = writer
+        self.is_active = True
+
+
+def _legacy_layout(writers: list[object]) -> tuple:
+    sessions = {w: _DictSession(f"player{i}", w) for i, w in enumerate(writers)}
+    active = set(sessions.values())
+    answers = {sess: None for sess in active}
+    for i, sess in enumerate(active):
+        if i % 2:
+            answers[sess] = str(i % 7)
+    return sessions, active, answers
+
+
+def _compact_layout(writers: list[object]) -> tuple:
+    table = SessionTable()
+    for i, w in enumerate(writers):
+        table.add(f"player{i}", w)
+    active = set(table.values())
+    question_round = QuestionRound(
+        round_no=1, qtype="Mathematics", short_question="1 + 1", trivia_question="",
+        correct_answer="2", started_at=0.0, finished_at=1.0, num_of_users=len(active),
+        awaiting=active, capacity=table.capacity,
+    )
+    for sess in table.values():
+        if sess.sid % 2:
+            question_round.record_answer(sess, str(sess.sid % 7))
+    return table, active, question_round
+
+
+def _measure(build, writers) -> int:
+    gc.collect()
+    tracemalloc.start()
+    result = build(writers)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current
+
+
+def main() -> None:
+    writers = [object() for _ in range(SESSIONS)]
+    legacy = _measure(_legacy_layout, writers)
+    compact = _measure(_compact_layout, writers)
+    print(f"sessions: {SESSIONS}")
+    print(f"legacy  : {legacy / 2**20:8.2f} MiB ({legacy / SESSIONS:6.1f} B/session)")
+    print(f"compact : {compact / 2**20:8.2f} MiB ({compact / SESSIONS:6.1f} B/session)")
+    print(f"saving  : {100 * (1 - compact / legacy):.1f}%")
+
+
+if __name__ == "__main__":
+    main()
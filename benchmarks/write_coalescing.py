@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""Socket send syscalls per round with and without write coalescing.
+
+Runs a full game on localhost against PLAYERS bot connections and counts
+calls into socket.send/sendmsg made on the server's sockets (every call is
+one syscall on the selector event loop).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import io
+import json
+import socket
+import sys
+import time
+from dataclasses import asdict
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from answer import generate_answer
+from server import Server, ServerMessageConfig
+
+PLAYERS = 200
+ROUNDS = 5
+
+
+class _SendCounter:
+    """Counts send/sendmsg calls on server-side sockets (local port == port)."""
+
+    def __init__(self, port: int) -> None:
+        self.port = port
+        self.calls = 0
+        self._originals = {}
+
+    def __enter__(self):
+        for name in ("send", "sendmsg"):
+            original = getattr(socket.socket, name)
+            self._originals[name] = original
+
+            def counted(sock, *args, _original=original, **kwargs):
+                if sock.getsockname()[1] == self.port:
+                    self.calls += 1
+                return _original(sock, *args, **kwargs)
+
+            setattr(socket.socket, name, counted)
+        return self
+
+    def __exit__(self, *exc):
+        for name, original in self._originals.items():
+            setattr(socket.socket, name, original)
+
+
+def _make_server(coalesce: bool) -> Server:
+    cfg = ServerMessageConfig(
+        port=0, players=PLAYERS, question_types=["Mathematics"] * ROUNDS,
+        question_formats={"Mathematics": "Evaluate {}"}, question_seconds=5,
+        question_interval_seconds=0, ready_info="Ready", question_word="Question",
+        correct_answer="Correct", incorrect_answer="Incorrect",
+        points_noun_singular="point", points_noun_plural="points",
+        final_standings_heading="Final standings:", one_winner="Winner: {}",
+        multiple_winners="Winners: {}",
+    )
+    cfg.connection_burst_per_ip = PLAYERS
+    cfg.compression_threshold_bytes = 0
+    cfg.coalesce_writes = coalesce
+    return Server(**asdict(cfg), config_message=cfg)
+
+
+async def _bot(port: int, index: int) -> None:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(json.dumps({"message_type": "HI", "username": f"bot{index}"}).encode() + b"\n")
+    while line := await reader.readline():
+        msg = json.loads(line)
+        if msg["message_type"] == "QUESTION":
+            answer = generate_answer(msg["question_type"], msg["short_question"])
+            writer.write(json.dumps({"message_type": "ANSWER", "answer": answer}).encode() + b"\n")
+        elif msg["message_type"] == "FINISHED":
+            break
+    writer.close()
+
+
+async def _run_game(coalesce: bool) -> tuple[int, float]:
+    server = _make_server(coalesce)
+    listener = await asyncio.start_server(server._handle_client, "127.0.0.1", 0)
+    port = listener.sockets[0].getsockname()[1]
+    bots = [asyncio.create_task(_bot(port, i)) for i in range(PLAYERS)]
+    # Bots share this process, so only the server's side of each socket counts
+    with _SendCounter(port) as counter:
+        start = time.perf_counter()
+        await asyncio.gather(server._orchestrator(), *bots)
+        elapsed = time.perf_counter() - start
+    listener.close()
+    server._scheduler.close()
+    return counter.calls, elapsed
+
+
+def main() -> None:
+    for coalesce in (False, True):
+        with contextlib.redirect_stdout(io.StringIO()):
+            calls, elapsed = asyncio.run(_run_game(coalesce))
+        label = "coalesced" if coalesce else "per-frame"
+        print(f"{label:10s}: {calls:6d} send calls, {calls / ROUNDS:8.1f}/round, "
+              f"{calls / ROUNDS / PLAYERS:5.2f}/player/round, {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
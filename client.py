@@ -1,40 +1,123 @@
+import os
 import sys
+import time
 from pathlib import Path
 import json
-from helper import send_message, receive_message
+from helper import send_message, receive_message, FrameCompressor, event_loop_factory
+from transport import TcpTransport
 from answer import generate_answer
+import qtypes
 import asyncio
-from typing import Any, Optional
-import requests
+import inspect
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional
 import re
 
-INPUT_QUEUE: asyncio.Queue[str] = asyncio.Queue()
+OLLAMA_KEEP_ALIVE = "30m"
+# Every built-in answer is a number or two addresses; 32 tokens is plenty
+OLLAMA_NUM_PREDICT = 32
+OLLAMA_WARM_UP_SECONDS = 120
+
+
+@dataclass
+class ClientHooks:
+    """What a Client reports while it plays; every hook is optional.
+
+    Hooks may be plain functions or coroutine functions. on_question gets the
+    QUESTION frame with question_type and trivia_question filled in (or the
+    QUESTIONS frame with trivia_questions in blitz rounds).
+
+    Hooks never run inside the receive loop: calls are queued and made one at
+    a time, in order, by a separate task, so a slow hook only delays later
+    hooks (not PONGs or answers) and an exception from a hook goes to the
+    event loop's exception handler instead of ending the session. play()
+    waits for queued hooks before it returns; shutdown drops them. A slow
+    plain function still holds up the whole event loop while it runs.
+    """
+    on_info: Callable[[str], Any] | None = None
+    on_question: Callable[[dict[str, Any]], Any] | None = None
+    on_result: Callable[[dict[str, Any]], Any] | None = None
+    on_leaderboard: Callable[[str], Any] | None = None
+    on_finished: Callable[[str], Any] | None = None
+    # ai mode: {"question_type", "seconds", "answered"} after every model call
+    on_timing: Callable[[dict[str, Any]], Any] | None = None
+
+    @classmethod
+    def printing(cls) -> "ClientHooks":
+        """The command-line client: everything is printed as text."""
+        return cls(
+            on_info=print,
+            on_question=lambda question: print(question["trivia_question"] if "trivia_question" in question
+                                               else "\n".join(question["trivia_questions"])),
+            on_result=lambda result: print(result["feedback"]),
+            on_leaderboard=print,
+            on_finished=print,
+        )
 
-class Client:
 
-    def __init__(self, username, mode, ollama_config=None) -> None:
+class Client:
+    """One player connection.
+
+    Input lines (CONNECT host:port, and answers in "you" mode) come from this
+    client's own `inputs` queue, output goes to `hooks` and to any `events()`
+    iterators, so one process can run as many clients as it likes. `answerer`,
+    when given, replaces the mode's answering: it is called with each question
+    frame and returns (or awaits to) the answer text.
+    """
+
+    def __init__(self, username, mode, ollama_config=None, transport=None,
+                 hooks: ClientHooks | None = None,
+                 answerer: Callable[[dict[str, Any]], str | None | Awaitable[str | None]] | None = None) -> None:
         self.username = username
         self.mode = mode
         self._ollama_config : dict[str, Any] | None = None
         if self.mode == 'ai':
             if ollama_config is None:
-                sys.stderr.write("client.py: Missing values for Ollama configuration")
-                sys.exit(1)
+                raise ValueError("Missing values for Ollama configuration")
             else:
                 self._ollama_config = ollama_config            
+        self.inputs: asyncio.Queue[str] = asyncio.Queue()
+        self.hooks = hooks if hooks is not None else ClientHooks()
+        self._answerer = answerer
+        self._subscribers: set[asyncio.Queue] = set()
+        # ai mode: seconds each model call took, per question type, and whether it beat the deadline
+        self.answer_times: dict[str, list[tuple[float, bool]]] = {}
+        self._warm_up_task: asyncio.Task | None = None
         self.reader, self.writer = None, None
+        # TcpTransport unless a test or benchmark hands in a LoopbackTransport
+        self._transport = transport if transport is not None else TcpTransport()
         self.connected = False
+        # Issued in READY; lets a reconnect pick up the same seat and points
+        self._resume_token: str | None = None
+        # Local copy of the versioned leaderboard: player id -> (username, points, rank)
+        self._leaderboard: dict[int, tuple[str, int, int]] = {}
+        self._leaderboard_version = 0
+        self._points_nouns: tuple[str, str] = ("point", "points")
+        # Set once the server confirms compression in READY/RESUMED
+        self._compressor: FrameCompressor | None = None
+        # Question word, type list and formats from READY/RESUMED, used to
+        # render compact QUESTION frames locally
+        self._question_templates: dict[str, Any] | None = None
         self._shutdown_event = asyncio.Event()
 
         self._answer_task = None
         self._recv_loop_task = None
+        self._hook_calls: asyncio.Queue[tuple[Callable[[Any], Any], Any]] = asyncio.Queue()
+        self._hook_task: asyncio.Task | None = None
+        # Set by request_shutdown; later events start no hook task
+        self._hooks_closed = False
 
 
     def _construct_hi_message(self) -> dict[str, str]:
-        return {
+        msg = {
             "message_type": "HI",
-            "username": self.username
+            "username": self.username,
+            "compression": [FrameCompressor.CODEC],
+            "question_templates": True
         }
+        if self._resume_token:
+            msg["resume_token"] = self._resume_token
+        return msg
     
 
     def _construct_bye_message(self) -> dict[str, str]:
@@ -43,25 +126,109 @@ class Client:
         }
 
 
+    def _construct_pong_message(self, ping: dict[str, Any]) -> dict[str, Any]:
+        return {
+            "message_type": "PONG",
+            "sent_at": ping.get("sent_at")
+        }
+
+
+    async def _reply_to_ping(self, ping: dict[str, Any]) -> None:
+        if self.writer is None:
+            return
+        try:
+            await send_message(self.writer, self._construct_pong_message(ping))
+        except Exception:
+            pass
+
+
+    def feed(self, line: str) -> None:
+        """Queue one input line, exactly as if it had been typed."""
+        self.inputs.put_nowait(line)
+
+
+    async def events(self) -> AsyncIterator[tuple[str, Any]]:
+        """Yield (kind, payload) for every hook event until the game finishes or the client shuts down.
+
+        kind is "info", "question", "result", "leaderboard", "finished" or
+        "timing" (ai mode only), with the same payload the matching hook gets.
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers.add(queue)
+        try:
+            while True:
+                kind, payload = await queue.get()
+                if kind is None:
+                    return
+                yield kind, payload
+                if kind == "finished":
+                    return
+        finally:
+            self._subscribers.discard(queue)
+
+
+    def _emit(self, kind: str, payload: Any) -> None:
+        if self._hooks_closed:
+            return
+        hook = getattr(self.hooks, f"on_{kind}")
+        if hook is not None:
+            self._hook_calls.put_nowait((hook, payload))
+            if self._hook_task is None:
+                self._hook_task = asyncio.create_task(self._run_hooks())
+        for queue in self._subscribers:
+            queue.put_nowait((kind, payload))
+
+
+    async def _run_hooks(self) -> None:
+        while True:
+            hook, payload = await self._hook_calls.get()
+            try:
+                result = hook(payload)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as exc:
+                asyncio.get_running_loop().call_exception_handler({
+                    "message": f"Client hook {hook!r} failed",
+                    "exception": exc,
+                })
+            finally:
+                self._hook_calls.task_done()
+
+
+    async def flush_hooks(self) -> None:
+        """Wait until every hook call queued so far has run."""
+        if self._hook_task is not None:
+            await self._hook_calls.join()
+
+
     async def connect(self) -> None:
-        # print("Please connect.")
+        # Waits for a CONNECT host:port line on this client's inputs
         while True:
             if self.is_shutting_down():
                 return 
             
-            inp = await INPUT_QUEUE.get()
+            inp = await self.inputs.get()
 
             if re.match(r"^CONNECT\s+\S+:\d+$", inp):
                 hostname, port = inp.split()[1].split(":")
-                try:
-                    self.reader, self.writer = await asyncio.open_connection(hostname, int(port))
-                except ConnectionRefusedError:
-                    print(f"Connection failed")
-                    continue 
-                msg = self._construct_hi_message()
-                await send_message(self.writer, msg)
-                self.connected = True
-                return
+                if await self.connect_to(hostname, int(port)):
+                    return
+
+
+    async def connect_to(self, host: str, port: int) -> bool:
+        """Open the connection and say HI; False if nothing is listening there."""
+        try:
+            self.reader, self.writer = await self._transport.open_connection(host, port)
+        except ConnectionRefusedError:
+            self._emit("info", "Connection failed")
+            return False
+        msg = self._construct_hi_message()
+        await send_message(self.writer, msg)
+        self.connected = True
+        if self._ollama_config is not None and self._ollama_config.get("warm_up", True) and self._warm_up_task is None:
+            # Loads the model while the room fills, so the first question does not pay for it
+            self._warm_up_task = asyncio.create_task(self._warm_up_ollama())
+        return True
 
 
     async def _disconnect(self) -> bool:
@@ -86,12 +253,19 @@ class Client:
 
 
     async def play(self) -> None:
+        await self._play()
+        if not self.is_shutting_down():
+            await self.flush_hooks()
+
+
+    async def _play(self) -> None:
         # print("Started playing.")
         if self.reader is None or self.writer is None or self.is_shutting_down():
             # print("shutt down while in play")
             return
 
         try:
+            self._compressor = None
             ready_msg = await receive_message(self.reader)
         except (ConnectionResetError, ConnectionError, asyncio.IncompleteReadError):
             # print("An expected exception is received: {e}")
@@ -101,13 +275,32 @@ class Client:
             # print("Other exception is received: {e}")
             return
 
+        # A full server parks us in its waiting queue until a seat frees up,
+        # and keeps pinging us while we wait for the other players
+        while ready_msg is not None and ready_msg.get('message_type') in ("QUEUED", "PING"):
+            if ready_msg['message_type'] == "QUEUED":
+                self._emit("info", ready_msg['info'])
+            else:
+                await self._reply_to_ping(ready_msg)
+            ready_msg = await receive_message(self.reader)
+
         if ready_msg is None:
             await self._disconnect()
-            print("Message none is received")
+            self._emit("info", "Message none is received")
+            return
+
+        if ready_msg['message_type'] == "REJECTED":
+            self._emit("info", ready_msg['info'])
+            self.connected = False
             return
         
+        self._compressor = FrameCompressor.from_description(ready_msg.get('compression'))
+        self._question_templates = ready_msg.get('question_templates')
         if ready_msg['message_type'] == "READY":
-            print(ready_msg['info'])
+            self._resume_token = ready_msg.get('resume_token')
+            self._emit("info", ready_msg['info'])
+        elif ready_msg['message_type'] == "RESUMED":
+            await self._catch_up(ready_msg)
 
         self._recv_loop_task = asyncio.create_task(self._recv_message_loop())
         try:
@@ -121,23 +314,114 @@ class Client:
             if not self.reader:
                 await self._disconnect()
                 break
-            msg = await receive_message(self.reader)
+            msg = await receive_message(self.reader, self._compressor)
             if not msg:
                 break
             t = msg.get("message_type")
-            if t == "READY":
-                print(msg["info"])
+            if t == "PING":
+                await self._reply_to_ping(msg)
+            elif t == "READY":
+                self._resume_token = msg.get("resume_token")
+                self._compressor = FrameCompressor.from_description(msg.get("compression"))
+                self._question_templates = msg.get("question_templates")
+                self._emit("info", msg["info"])
             elif t == "QUESTION":
-                print(msg["trivia_question"])
+                msg = self._expand_question(msg)
+                self._emit("question", msg)
                 self._answer_task = asyncio.create_task(self._answer_question(msg, msg["time_limit"])) 
-            elif t == "RESULT":
-                print(msg["feedback"])
+            elif t == "QUESTIONS":
+                msg = self._expand_questions(msg)
+                self._emit("question", msg)
+                self._answer_task = asyncio.create_task(self._answer_questions(msg, msg["time_limit"]))
+            elif t in ("RESULT", "RESULTS"):
+                self._emit("result", msg)
             elif t == "LEADERBOARD":
-                print(msg["state"])
+                if "state" in msg:
+                    self._emit("leaderboard", msg["state"])
+                elif self._apply_leaderboard(msg):
+                    self._emit("leaderboard", self._render_leaderboard())
+                elif self.writer is not None:
+                    await send_message(self.writer, {"message_type": "LEADERBOARD_SYNC"})
             elif t == "FINISHED":
-                print(msg["final_standings"])
+                self._resume_token = None
                 self.connected = False  
+                self._emit("finished", msg["final_standings"])
                 break
+            elif t == "REJECTED":
+                # Protocol violations (oversized or malformed frames) end the session
+                self._emit("info", msg.get("info", msg.get("reason")))
+                self._resume_token = None
+                self.connected = False
+                break
+
+
+    def _expand_question(self, question: dict[str, Any]) -> dict[str, Any]:
+        """Render a compact QUESTION (type index + round) into the full frame."""
+        if "trivia_question" in question or self._question_templates is None:
+            return question
+        qtype = self._question_templates["question_types"][question["qtype"]]
+        return {
+            **question,
+            "question_type": qtype,
+            "trivia_question": self._render_question(question["round"], qtype, question["short_question"])
+        }
+
+
+    def _expand_questions(self, batch: dict[str, Any]) -> dict[str, Any]:
+        """Same as _expand_question for a blitz QUESTIONS frame; questions are numbered round.i."""
+        if "trivia_questions" in batch or self._question_templates is None:
+            return batch
+        qtype = self._question_templates["question_types"][batch["qtype"]]
+        return {
+            **batch,
+            "question_type": qtype,
+            "trivia_questions": [self._render_question(f"{batch['round']}.{i}", qtype, short_question)
+                                 for i, short_question in enumerate(batch["short_questions"], 1)]
+        }
+
+
+    def _render_question(self, number: int | str, qtype: str, short_question: str) -> str:
+        templates = self._question_templates
+        body = templates["question_formats"][qtype].replace("{}", short_question)
+        return f"{templates['question_word']} {number} ({qtype}):\n{body}"
+
+
+    def _apply_leaderboard(self, msg: dict[str, Any]) -> bool:
+        """Fold a LEADERBOARD frame into the local table; False if it cannot be applied."""
+        if msg.get("full"):
+            self._leaderboard = {}
+            singular, plural = msg.get("nouns", self._points_nouns)
+            self._points_nouns = (singular, plural)
+        elif msg.get("base_version") != self._leaderboard_version:
+            return False
+        for pid, username, points, rank in msg["entries"]:
+            self._leaderboard[pid] = (username, points, rank)
+        self._leaderboard_version = msg["version"]
+        return True
+
+
+    def _render_leaderboard(self) -> str:
+        singular, plural = self._points_nouns
+        rows = sorted(self._leaderboard.values(), key=lambda row: (row[2], row[0]))
+        return "\n".join(
+            f"{rank}. {username}: {points} {singular if points == 1 else plural}"
+            for username, points, rank in rows
+        )
+
+
+    async def _catch_up(self, resumed: dict[str, Any]) -> None:
+        self._emit("info", resumed['info'])
+        self._resume_token = resumed.get('resume_token', self._resume_token)
+        if resumed.get('leaderboard'):
+            self._apply_leaderboard(resumed['leaderboard'])
+        batch = resumed.get('questions')
+        if batch:
+            self._emit("question", batch)
+            self._answer_task = asyncio.create_task(self._answer_questions(batch, batch["time_limit"]))
+        question = resumed.get('question')
+        if question:
+            self._emit("question", question)
+            self._answer_task = asyncio.create_task(self._answer_question(question, question["time_limit"]))
             
  
     async def _answer_question(self, question, qtimeout: float | int) -> None:
@@ -151,8 +435,13 @@ class Client:
             "message_type": "ANSWER"
         }
         try:
-            if self.mode == 'you':
-                ans = await asyncio.wait_for(INPUT_QUEUE.get(), timeout=qtimeout)
+            if self._answerer is not None:
+                ans = await asyncio.wait_for(self._ask_answerer(question), timeout=qtimeout)
+                if ans:
+                    answer["answer"] = ans
+
+            elif self.mode == 'you':
+                ans = await asyncio.wait_for(self.inputs.get(), timeout=qtimeout)
                 if ans:
                     answer["answer"] = ans
 
@@ -176,36 +465,170 @@ class Client:
             return None
               
 
-    async def _ask_ollama(self, question: dict[str, Any], timeout: float) -> str | None:
-        def _call():
-            return requests.post(url, json=payload)
-        
-        if self._ollama_config is None:
-            return None
+    async def _answer_questions(self, batch: dict[str, Any], qtimeout: float | int) -> None:
+        # Blitz: the whole batch goes back in one ANSWERS frame, unanswered ones as "".
+        # Answers are kept as they come in, so whatever is ready by the deadline is sent then.
+        if self.is_shutting_down() or not self.writer:
+            return
+        if self._answerer is None and self.mode not in ('you', 'auto', 'ai'):
+            return
+        short_questions = batch["short_questions"]
+        answers = [""] * len(short_questions)
+
+        async def _ask(i: int, ask: Awaitable[str | None]) -> None:
+            answers[i] = await ask or ""
+
+        async def _collect() -> None:
+            if self._answerer is not None:
+                await asyncio.gather(*(
+                    _ask(i, self._ask_answerer({"question_type": batch["question_type"], "short_question": short_question,
+                                                "trivia_question": trivia_question, "time_limit": qtimeout}))
+                    for i, (short_question, trivia_question) in enumerate(zip(short_questions, batch["trivia_questions"]))
+                ))
+            elif self.mode == 'you':
+                for i in range(len(short_questions)):
+                    answers[i] = await self.inputs.get()
+            elif self.mode == 'auto':
+                qtype = batch['question_type']
+
+                def _solve() -> None:
+                    for i, short_question in enumerate(short_questions):
+                        answers[i] = generate_answer(qtype, short_question)
+
+                await asyncio.to_thread(_solve)
+            elif self.mode == 'ai':
+                await asyncio.gather(*(
+                    _ask(i, self._ask_ollama(question={"question_type": batch["question_type"], "trivia_question": trivia},
+                                             timeout=qtimeout))
+                    for i, trivia in enumerate(batch["trivia_questions"])
+                ))
+
+        try:
+            await asyncio.wait_for(_collect(), timeout=qtimeout)
+        except asyncio.TimeoutError:
+            pass
+        if self.writer is None or self.is_shutting_down():
+            return
+        await send_message(self.writer, {"message_type": "ANSWERS", "answers": list(answers)})
+
+
+    async def _ask_answerer(self, question: dict[str, Any]) -> str | None:
+        answer = self._answerer(question)
+        if inspect.isawaitable(answer):
+            answer = await answer
+        return answer
+
+
+    def _ollama_chat_url(self) -> str:
         base = self._ollama_config['ollama_host']  
         port = self._ollama_config['ollama_port']
-        model = self._ollama_config['ollama_model']
 
         if not base.startswith(('http://', 'https://')):
             base = f'http://{base}'
             
-        url = f'{base}:{port}/api/chat'
+        return f'{base}:{port}/api/chat'
+
+
+    def _ollama_system_prompt(self, question_type: str | None) -> str:
+        prompts = self._ollama_config.get('system_prompts') or {}
+        if question_type in prompts:
+            return prompts[question_type]
+        registered = qtypes.get(question_type) if question_type else None
+        answer_format = registered.answer_format if registered is not None else None
+        if answer_format is None:
+            return "You are playing a timed trivia game. Reply with only the answer: no words, working or punctuation."
+        return f"You are playing a timed trivia game. Reply with only {answer_format}: no other words, working or punctuation."
+
+
+    def _ollama_num_predict(self, question_type: str | None) -> int | None:
+        # An int applies to every question type; a dict may set some types and leave others unlimited
+        limit = self._ollama_config.get('num_predict', OLLAMA_NUM_PREDICT)
+        if isinstance(limit, dict):
+            return limit.get(question_type)
+        return limit
+
+
+    async def _warm_up_ollama(self) -> None:
+        # An empty message list makes Ollama load the model and keep it for keep_alive
+        payload = {
+            "model": self._ollama_config['ollama_model'],
+            "messages": [],
+            "keep_alive": self._ollama_config.get('keep_alive', OLLAMA_KEEP_ALIVE),
+        }
+
+        def _call():
+            import requests
+            return requests.post(self._ollama_chat_url(), json=payload, timeout=OLLAMA_WARM_UP_SECONDS)
+
+        try:
+            await asyncio.to_thread(_call)
+        except Exception:
+            # Best effort: the first question just pays the load time instead
+            pass
+
+
+    async def _ask_ollama(self, question: dict[str, Any], timeout: float) -> str | None:
+        def _call():
+            return requests.post(url, json=payload, timeout=timeout)
+        
+        if self._ollama_config is None:
+            return None
+        # Only the ai mode needs requests; keep it off the import path otherwise
+        import requests
+        question_type = question.get("question_type")
+        url = self._ollama_chat_url()
         payload = {
-            "model": model,
+            "model": self._ollama_config['ollama_model'],
             "messages": [
+                {
+                    "role": "system",
+                    "content": self._ollama_system_prompt(question_type)
+                },
                 {
                     "role": "user",
                     "content": question["trivia_question"]
                 }
             ],
-            "stream": False
+            "stream": False,
+            "keep_alive": self._ollama_config.get('keep_alive', OLLAMA_KEEP_ALIVE),
         }
+        num_predict = self._ollama_num_predict(question_type)
+        if num_predict is not None:
+            payload["options"] = {"num_predict": num_predict}
+
+        started = time.perf_counter()
+        answer = None
         try:
-            # Outer timeout guards total time; inner tuple guards per I/O op
+            # The outer timeout bounds how long the question waits. requests' timeout only
+            # bounds each connect and read, so a reply that keeps trickling in can keep
+            # the worker thread busy past the deadline.
             resp = await asyncio.wait_for(asyncio.to_thread(_call), timeout=timeout)
-            return resp.json()["message"]["content"]
+            # An empty or blank reply is no answer, same as no reply at all
+            answer = resp.json()["message"]["content"].strip() or None
+            return answer
         except asyncio.TimeoutError:
             return None
+        except (requests.RequestException, KeyError, TypeError, ValueError, AttributeError):
+            # Unreachable server, HTTP-level timeout or a reply that is not a chat message
+            return None
+        finally:
+            self._record_answer_time(question_type, time.perf_counter() - started, answer is not None)
+
+
+    def _record_answer_time(self, question_type: str | None, seconds: float, answered: bool) -> None:
+        self.answer_times.setdefault(question_type or "", []).append((seconds, answered))
+        self._emit("timing", {"question_type": question_type, "seconds": seconds, "answered": answered})
+
+
+    def answer_time_report(self) -> list[str]:
+        """One line per question type: model calls, misses, mean and slowest time."""
+        lines = []
+        for question_type, times in self.answer_times.items():
+            seconds = [elapsed for elapsed, _ in times]
+            missed = sum(1 for _, answered in times if not answered)
+            lines.append(f"{question_type or '?'}: {len(times)} answers, {missed} missed, "
+                         f"mean {sum(seconds) / len(seconds):.2f}s, max {max(seconds):.2f}s")
+        return lines
 
 
     async def request_shutdown(self) -> None:
@@ -213,11 +636,17 @@ class Client:
             return
         
         self._shutdown_event.set()
+        self._hooks_closed = True
+        for queue in self._subscribers:
+            queue.put_nowait((None, None))
         await self._disconnect()
                 
         # print("disconnected.")
         await cancel_task(self._answer_task)
         await cancel_task(self._recv_loop_task)
+        await cancel_task(self._warm_up_task)
+        await cancel_task(self._hook_task)
+        self._hook_task = None
         
         # print("tasks canceled.")
         self._answer_task = None 
@@ -228,16 +657,65 @@ class Client:
         return self._shutdown_event.is_set()
     
 
-    async def input_reader(self):
-        while True:
-            line = (await asyncio.to_thread(input))
-            if line == "EXIT":
-                await self.request_shutdown()
-                return 
-            elif line == "DISCONNECT":
-                await self._disconnect()
-            else:
-                await INPUT_QUEUE.put(line)
+    async def input_reader(self, stream: asyncio.StreamReader | None = None):
+        # Lines come from stdin unless another stream is given; EOF just stops reading
+        close = None
+        if stream is None:
+            stream, close = open_fd_reader(sys.stdin.fileno())
+        try:
+            while line := await stream.readline():
+                line = line.decode(errors="replace").rstrip("\r\n")
+                if line == "EXIT":
+                    await self.request_shutdown()
+                    return 
+                elif line == "DISCONNECT":
+                    await self._disconnect()
+                else:
+                    self.inputs.put_nowait(line)
+        finally:
+            if close is not None:
+                close()
+
+
+def open_fd_reader(fd: int, limit: int = 2 ** 20) -> tuple[asyncio.StreamReader, Callable[[], None]]:
+    """Stream a file descriptor's bytes into a StreamReader from the event loop.
+
+    Pipes and terminals are watched with loop.add_reader and read once per
+    readiness callback, so no thread is parked in input() and the fd keeps its
+    blocking mode (a terminal shares it with stdout). Regular files and loops
+    without add_reader are read in chunks on a worker thread instead. The
+    returned callable stops reading; it is safe to call more than once.
+    """
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader(limit=limit)
+
+    def on_readable() -> None:
+        try:
+            data = os.read(fd, 65536)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            data = b""
+        if data:
+            reader.feed_data(data)
+        else:
+            loop.remove_reader(fd)
+            reader.feed_eof()
+
+    try:
+        loop.add_reader(fd, on_readable)
+    except (NotImplementedError, PermissionError, ValueError):
+        pass
+    else:
+        return reader, lambda: loop.remove_reader(fd)
+
+    async def pump() -> None:
+        while data := await asyncio.to_thread(os.read, fd, 65536):
+            reader.feed_data(data)
+        reader.feed_eof()
+
+    task = asyncio.create_task(pump())
+    return reader, task.cancel
 
 
 async def cancel_task(task: Optional[asyncio.Task]) -> None:
@@ -254,9 +732,12 @@ async def cancel_task(task: Optional[asyncio.Task]) -> None:
 
 
 def parse_config_path() -> Path:        
-    if len(sys.argv) != 3 or sys.argv[1] != "--config":
+    if len(sys.argv) not in (3, 5) or sys.argv[1] != "--config":
         sys.stderr.write("client.py: Configuration not provided\n")
         sys.exit(1)
+    if len(sys.argv) == 5 and sys.argv[3] != "--loop":
+        sys.stderr.write(f"client.py: Unknown option {sys.argv[3]}\n")
+        sys.exit(1)
 
     config_path = Path(sys.argv[2])
     if not config_path.exists():
@@ -265,17 +746,24 @@ def parse_config_path() -> Path:
     return config_path
 
 
-async def main():
-    config_path = parse_config_path()
-    file = config_path.open("r", encoding='utf-8')
-    config = json.load(file)
-    file.close()
+def load_client_config(config_path: Path) -> dict[str, Any]:
+    with config_path.open("r", encoding='utf-8') as file:
+        return json.load(file)
+
+
+async def main(config: dict[str, Any] | None = None):
+    if config is None:
+        config = load_client_config(parse_config_path())
 
     username = config.get('username')
     mode = config.get('client_mode')
     ollama_config = config.get('ollama_config')
         
-    client = Client(username, mode, ollama_config)
+    try:
+        client = Client(username, mode, ollama_config, hooks=ClientHooks.printing())
+    except ValueError as e:
+        sys.stderr.write(f"client.py: {e}")
+        sys.exit(1)
 
     input_reader_task = asyncio.create_task(client.input_reader())
     client_loop_task = asyncio.create_task(client.run_loop())
@@ -285,14 +773,25 @@ async def main():
         return_when=asyncio.FIRST_COMPLETED
     )
     try:
-        while await receive_message(client.reader):
+        while await receive_message(client.reader, client._compressor):
             pass
     except Exception:
         pass
+    for line in client.answer_time_report():
+        sys.stderr.write(f"client.py: {line}\n")
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    config = load_client_config(parse_config_path())
+    # --loop on the command line wins over the config's event_loop key
+    backend = sys.argv[4] if len(sys.argv) == 5 else config.get("event_loop")
+    try:
+        _, loop_factory = event_loop_factory(backend)
+    except ValueError as e:
+        sys.stderr.write(f"client.py: {e}\n")
+        sys.exit(1)
+    with asyncio.Runner(loop_factory=loop_factory) as runner:
+        runner.run(main(config))
 
         
         
\ No newline at end of file
@@ -0,0 +1,204 @@
+"""Wire codec for protocol messages.
+
+Encoding is compiled per message shape: the first time a (message_type, keys)
+combination is seen, its constant JSON fragments are built once and every
+later message of that shape only escapes and formats its values. The output
+is byte-for-byte what json.dumps produces with default separators, so the
+compression dictionary and the server's byte-level frame checks keep working.
+The shapes the protocol actually uses are compiled at import.
+
+Decoding parses the frame (with orjson when it is installed, imported on the
+first decode rather than at startup) and checks the fields of known message
+types against MESSAGE_FIELDS in one pass. Frames that are not JSON objects or
+carry a wrongly typed field raise ProtocolError.
+orjson is not used for encoding: its compact separators would no longer match
+the preset compression dictionary.
+"""
+
+import json
+from json.encoder import encode_basestring_ascii as _escape
+from typing import Any, Callable
+
+NUMBER = (int, float)
+NoneType = type(None)
+
+
+class ProtocolError(ValueError):
+    """A frame is not a valid protocol message."""
+
+
+# message_type -> (required fields, optional fields), each field -> accepted types.
+# Fields not listed here are passed through untouched.
+MESSAGE_FIELDS: dict[str, tuple[dict[str, Any], dict[str, Any]]] = {
+    # client -> server
+    "HI": ({"username": str}, {"compression": list, "question_templates": bool,
+                               "resume_token": (str, NoneType)}),
+    "BYE": ({}, {}),
+    # Clients leave "answer" out when the player gave none
+    "ANSWER": ({}, {"answer": str}),
+    "ANSWERS": ({"answers": list}, {}),
+    "LEADERBOARD_SYNC": ({}, {}),
+    # both directions
+    "PING": ({}, {"sent_at": NUMBER}),
+    "PONG": ({}, {"sent_at": (int, float, NoneType)}),
+    # server -> client
+    "READY": ({"info": str}, {"resume_token": str, "compression": dict, "question_templates": dict}),
+    "RESUMED": ({"round": int, "points": int},
+                {"resume_token": (str, NoneType), "info": str, "question": dict,
+                 "questions": dict, "time_remaining": NUMBER, "leaderboard": dict, "compression": dict,
+                 "question_templates": dict}),
+    "QUEUED": ({"position": int}, {"info": str}),
+    "REJECTED": ({"reason": str}, {"info": str}),
+    # Full frames carry question_type and trivia_question, compact ones qtype and round
+    "QUESTION": ({"short_question": str, "time_limit": NUMBER},
+                 {"question_type": str, "trivia_question": str, "qtype": int, "round": int}),
+    "RESULT": ({"correct": bool, "feedback": str},
+               {"duplicate": bool, "late": bool, "late_by": NUMBER, "elapsed": NUMBER}),
+    # Blitz rounds: one frame for the whole batch each way
+    "QUESTIONS": ({"short_questions": list, "time_limit": NUMBER},
+                  {"question_type": str, "trivia_questions": list, "qtype": int, "round": int}),
+    "RESULTS": ({"correct": list, "score": int, "feedback": str},
+                {"late": bool, "late_by": NUMBER, "elapsed": NUMBER}),
+    "LEADERBOARD": ({}, {"state": str, "version": int, "full": bool, "nouns": list,
+                         "base_version": int, "entries": list}),
+    "FINISHED": ({"final_standings": str}, {}),
+}
+
+# Key orders the server and client build, compiled up front
+_KNOWN_SHAPES: list[tuple[str, ...]] = [
+    ("HI", "username"),
+    ("HI", "username", "compression"),
+    ("HI", "username", "compression", "resume_token"),
+    ("HI", "username", "compression", "question_templates"),
+    ("HI", "username", "compression", "question_templates", "resume_token"),
+    ("BYE",),
+    ("ANSWER", "answer"),
+    ("ANSWERS", "answers"),
+    ("LEADERBOARD_SYNC",),
+    ("PING", "sent_at"),
+    ("PONG", "sent_at"),
+    ("READY", "info"),
+    ("READY", "info", "resume_token"),
+    ("READY", "info", "resume_token", "compression"),
+    ("READY", "info", "resume_token", "question_templates"),
+    ("READY", "info", "resume_token", "compression", "question_templates"),
+    ("QUEUED", "position", "info"),
+    ("REJECTED", "reason", "info"),
+    ("QUESTION", "question_type", "short_question", "trivia_question", "time_limit"),
+    ("QUESTION", "qtype", "round", "short_question", "time_limit"),
+    ("RESULT", "correct", "feedback"),
+    ("RESULT", "correct", "feedback", "elapsed"),
+    ("RESULT", "correct", "duplicate", "feedback"),
+    ("RESULT", "correct", "late", "late_by", "feedback"),
+    ("RESULT", "correct", "late", "late_by", "feedback", "elapsed"),
+    ("QUESTIONS", "question_type", "round", "short_questions", "trivia_questions", "time_limit"),
+    ("QUESTIONS", "qtype", "round", "short_questions", "time_limit"),
+    ("RESULTS", "correct", "score", "feedback", "elapsed"),
+    ("RESULTS", "correct", "score", "late", "late_by", "feedback", "elapsed"),
+    ("LEADERBOARD", "state"),
+    ("LEADERBOARD", "version", "full", "nouns", "entries"),
+    ("LEADERBOARD", "version", "base_version", "entries"),
+    ("FINISHED", "final_standings"),
+]
+
+# Shapes compiled on first use are capped so a peer cannot grow the table
+_MAX_SHAPES = 256
+
+_INFINITIES = (float("inf"), float("-inf"))
+
+
+def _encode_value(value: Any) -> str:
+    kind = type(value)
+    if kind is str:
+        return _escape(value)
+    if kind is bool:
+        return "true" if value else "false"
+    if kind is int:
+        return int.__repr__(value)
+    if kind is float and value == value and value not in _INFINITIES:
+        return float.__repr__(value)
+    if value is None:
+        return "null"
+    # Containers, NaN/Infinity and subclasses take the general path
+    return json.dumps(value)
+
+
+def _compile(message_type: str, keys: tuple[str, ...]) -> Callable[[dict], bytes]:
+    head = '{"message_type": ' + _escape(message_type)
+    if not keys:
+        frame = (head + "}").encode("ascii")
+        return lambda message: frame
+    fragments = tuple((", " + _escape(key) + ": ", key) for key in keys)
+
+    def encode(message: dict) -> bytes:
+        parts = [head]
+        for fragment, key in fragments:
+            parts.append(fragment)
+            parts.append(_encode_value(message[key]))
+        parts.append("}")
+        # Every string was escaped to ASCII, so this never fails
+        return "".join(parts).encode("ascii")
+
+    return encode
+
+
+_ENCODERS: dict[tuple, Callable[[dict], bytes]] = {
+    (shape[0], shape[1:]): _compile(shape[0], shape[1:]) for shape in _KNOWN_SHAPES
+}
+
+
+def encode(message: dict) -> bytes:
+    """The message as json.dumps would encode it, through its shape's compiled encoder."""
+    keys = tuple(message)
+    if keys and keys[0] == "message_type" and type(message["message_type"]) is str:
+        shape = (message["message_type"], keys[1:])
+        encoder = _ENCODERS.get(shape)
+        if encoder is None and len(_ENCODERS) < _MAX_SHAPES:
+            encoder = _ENCODERS[shape] = _compile(*shape)
+        if encoder is not None:
+            return encoder(message)
+    return json.dumps(message).encode("utf-8")
+
+
+def _json_loads(frame: bytes) -> Any:
+    # json.loads is quicker on str than on bytes (no encoding sniffing)
+    return json.loads(frame.decode("utf-8"))
+
+
+def _loads(frame: bytes) -> Any:
+    # Rebinds itself on the first frame, so importing codec stays cheap
+    global _loads
+    try:
+        import orjson
+    except ImportError:
+        _loads = _json_loads
+    else:
+        _loads = orjson.loads
+    return _loads(frame)
+
+
+def decode(frame: bytes) -> dict:
+    """Parse one frame and validate it against its message type's fields."""
+    try:
+        message = _loads(frame)
+    except ValueError as exc:
+        raise ProtocolError(f"invalid JSON: {exc}") from None
+    if type(message) is not dict:
+        raise ProtocolError("frame is not a JSON object")
+    message_type = message.get("message_type")
+    if type(message_type) is not str:
+        raise ProtocolError("frame has no message_type")
+    spec = MESSAGE_FIELDS.get(message_type)
+    if spec is None:
+        # Unknown types are left for the receiver to ignore
+        return message
+    required, optional = spec
+    for field, kinds in required.items():
+        if field not in message:
+            raise ProtocolError(f"{message_type} is missing {field!r}")
+        if not isinstance(message[field], kinds):
+            raise ProtocolError(f"{message_type} field {field!r} has the wrong type")
+    for field, kinds in optional.items():
+        if field in message and not isinstance(message[field], kinds):
+            raise ProtocolError(f"{message_type} field {field!r} has the wrong type")
+    return message
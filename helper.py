@@ -1,28 +1,244 @@
-import json
 import asyncio
+import base64
+import sys
+import zlib
+from typing import Callable
 
-def encode_message(message):
-    return json.dumps(message).encode("utf-8")
+import codec
 
+# Compressed frames are still one line: this marker (never the first byte of
+# a JSON object) followed by base85 of the zlib stream.
+COMPRESSED_MARKER = b"Z"
 
-def decode_message(json_bytes):
-    return json.loads(json_bytes.decode("utf-8"))
 
+class FrameCompressor:
+    """Per-frame zlib with a shared preset dictionary, applied above a size threshold.
 
-async def send_message(writer: asyncio.StreamWriter, message: dict):
-    load = encode_message(message) + b"\n"
+    Every frame is compressed on its own, so frames can be dropped, reordered
+    between writers or resent without any shared stream state.
+    """
+
+    CODEC = "zlib"
+
+    def __init__(self, dictionary: bytes = b"", threshold: int = 512, level: int = 6):
+        self.dictionary = dictionary
+        self.threshold = threshold
+        self.level = level
+
+    def describe(self) -> dict:
+        return {
+            "codec": self.CODEC,
+            "dictionary": self.dictionary.decode("utf-8"),
+            "threshold": self.threshold,
+        }
+
+    @classmethod
+    def from_description(cls, description: dict | None) -> "FrameCompressor | None":
+        if not description or description.get("codec") != cls.CODEC:
+            return None
+        return cls(description.get("dictionary", "").encode("utf-8"), description.get("threshold", 512))
+
+    def compress(self, payload: bytes) -> bytes:
+        if len(payload) < self.threshold:
+            return payload
+        if self.dictionary:
+            comp = zlib.compressobj(self.level, zlib.DEFLATED, zlib.MAX_WBITS, zdict=self.dictionary)
+        else:
+            comp = zlib.compressobj(self.level)
+        packed = COMPRESSED_MARKER + base64.b85encode(comp.compress(payload) + comp.flush())
+        # Tiny or incompressible frames can grow; send those as they are
+        return packed if len(packed) < len(payload) else payload
+
+    def decompress(self, frame: bytes) -> bytes:
+        if not frame.startswith(COMPRESSED_MARKER):
+            return frame
+        raw = base64.b85decode(frame[len(COMPRESSED_MARKER):].rstrip(b"\r\n"))
+        if self.dictionary:
+            decomp = zlib.decompressobj(zlib.MAX_WBITS, zdict=self.dictionary)
+        else:
+            decomp = zlib.decompressobj()
+        return decomp.decompress(raw) + decomp.flush()
+
+
+def build_preset_dictionary(phrases: list[str]) -> bytes:
+    # zlib favours matches near the end of the dictionary, so the most
+    # common phrases should be passed last.
+    seen: list[str] = []
+    for phrase in phrases:
+        if phrase and phrase not in seen:
+            seen.append(phrase)
+    # Only the last 32 KiB fit in the deflate window. Keep whole phrases from
+    # the end and top up with whole characters, never half of a UTF-8 sequence.
+    kept: list[bytes] = []
+    room = 32768
+    for phrase in reversed(seen):
+        encoded = phrase.encode("utf-8")
+        if len(encoded) > room:
+            if room:
+                kept.append(encoded[-room:].decode("utf-8", "ignore").encode("utf-8"))
+            break
+        kept.append(encoded)
+        room -= len(encoded)
+    return b"".join(reversed(kept))
+
+
+def encode_message(message, compressor: FrameCompressor | None = None):
+    payload = codec.encode(message)
+    if compressor is not None:
+        return compressor.compress(payload)
+    return payload
+
+
+def decode_message(json_bytes, compressor: FrameCompressor | None = None):
+    if json_bytes.startswith(COMPRESSED_MARKER):
+        if compressor is None:
+            raise ValueError("Received a compressed frame without negotiated compression")
+        json_bytes = compressor.decompress(json_bytes)
+    return codec.decode(json_bytes)
+
+
+async def send_message(writer: asyncio.StreamWriter, message: dict,
+                       compressor: FrameCompressor | None = None):
+    load = encode_message(message, compressor) + b"\n"
     writer.write(load)
     await writer.drain()
 
 
-async def receive_message(reader: asyncio.StreamReader) -> dict | None:
+class FrameTooLarge(ValueError):
+    """A line did not fit in the StreamReader's limit."""
+
+
+async def receive_frame(reader: asyncio.StreamReader) -> bytes | None:
+    """One raw newline-terminated frame, or None once the connection is gone."""
     try:
-        line = await reader.readline() 
+        line = await reader.readline()
     except asyncio.CancelledError:
-        raise                                   
+        raise
     except (ConnectionResetError, OSError, asyncio.IncompleteReadError):
-        return None                             
-    if not line:
         return None
-    decoded = decode_message(line)  
-    return decoded
\ No newline at end of file
+    except ValueError as exc:
+        # readline reports an overrun of the reader's limit as ValueError
+        raise FrameTooLarge(str(exc)) from None
+    return line or None
+
+
+async def receive_message(reader: asyncio.StreamReader,
+                          compressor: FrameCompressor | None = None) -> dict | None:
+    line = await receive_frame(reader)
+    if line is None:
+        return None
+    decoded = decode_message(line, compressor)  
+    return decoded
+
+
+class CoalescingWriter:
+    """StreamWriter proxy that coalesces bursts of frames to one connection.
+
+    The first frame written in an event-loop iteration goes straight to the
+    transport, so a lone reply pays no extra latency. Any further frames in
+    the same iteration are gathered and handed over in a single writelines
+    call at the end of it.
+
+    drain() waits for that flush before applying the usual backpressure, so
+    callers keep the send_message write-then-drain pattern unchanged.
+    """
+
+    def __init__(self, writer: asyncio.StreamWriter):
+        self._writer = writer
+        self._frames: list[bytes] = []
+        self._flushed: asyncio.Future | None = None
+        self._busy = False
+        self.flushes = 0
+        self.frames_written = 0
+
+    def write(self, data: bytes) -> None:
+        if not self._busy:
+            # first frame this iteration: write through, batch what follows
+            self._busy = True
+            asyncio.get_running_loop().call_soon(self._flush)
+            if not self._writer.is_closing():
+                self.flushes += 1
+                self.frames_written += 1
+                self._writer.write(data)
+            return
+        self._frames.append(data)
+        if self._flushed is None:
+            self._flushed = asyncio.get_running_loop().create_future()
+
+    def writelines(self, data) -> None:
+        for chunk in data:
+            self.write(chunk)
+
+    def _flush(self) -> None:
+        self._busy = False
+        frames, self._frames = self._frames, []
+        flushed, self._flushed = self._flushed, None
+        if frames and not self._writer.is_closing():
+            self.flushes += 1
+            self.frames_written += len(frames)
+            try:
+                if len(frames) == 1:
+                    self._writer.write(frames[0])
+                else:
+                    self._writer.writelines(frames)
+            except Exception as exc:
+                if flushed is not None and not flushed.done():
+                    flushed.set_exception(exc)
+                    # drain() may never run for this batch; mark it retrieved
+                    # so the loop does not log it as an orphaned error
+                    flushed.exception()
+                return
+        if flushed is not None and not flushed.done():
+            flushed.set_result(None)
+
+    async def drain(self) -> None:
+        if self._flushed is not None:
+            await asyncio.shield(self._flushed)
+        await self._writer.drain()
+
+    def close(self) -> None:
+        if self._frames:
+            self._flush()
+        self._writer.close()
+
+    async def wait_closed(self) -> None:
+        await self._writer.wait_closed()
+
+    def is_closing(self) -> bool:
+        return self._writer.is_closing()
+
+    def get_extra_info(self, name, default=None):
+        return self._writer.get_extra_info(name, default)
+
+    def __getattr__(self, name):
+        return getattr(self._writer, name)
+
+
+# "auto" picks uvloop when it is importable and stock asyncio otherwise
+EVENT_LOOP_BACKENDS = ("asyncio", "uvloop", "auto")
+
+
+def event_loop_factory(backend: str | None = None) -> tuple[str, Callable[[], asyncio.AbstractEventLoop]]:
+    """Resolve a backend name to (backend actually used, loop factory)."""
+    backend = backend or "asyncio"
+    if backend not in EVENT_LOOP_BACKENDS:
+        raise ValueError(f"Unknown event loop backend {backend!r}; expected one of {', '.join(EVENT_LOOP_BACKENDS)}")
+    if backend == "asyncio":
+        return "asyncio", asyncio.new_event_loop
+    try:
+        import uvloop
+    except ImportError:
+        if backend == "uvloop":
+            sys.stderr.write("uvloop is not installed; falling back to the asyncio event loop\n")
+        return "asyncio", asyncio.new_event_loop
+    return "uvloop", uvloop.new_event_loop
+
+
+def describe_event_loop(loop: asyncio.AbstractEventLoop | None = None) -> str:
+    loop = loop or asyncio.get_running_loop()
+    if type(loop).__module__.startswith("uvloop"):
+        return "uvloop (libuv transports)"
+    selector = getattr(loop, "_selector", None)
+    if selector is not None:
+        return f"asyncio {type(loop).__name__} ({type(selector).__name__} socket transports)"
+    return f"asyncio {type(loop).__name__} (proactor transports)"
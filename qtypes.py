@@ -0,0 +1,170 @@
+"""Question type registry.
+
+Each question type bundles a generator for short questions (called with the
+room's random.Random, or None for the shared default stream), a solver that
+turns a short question into the expected answer, a canonicalizer applied to
+both sides before answers are compared, and optional batch variants of the
+first two. Server and answer code dispatch with a single dict lookup.
+
+Third-party types are picked up from the "trivia.question_types" entry point
+group. An entry point may resolve to a QuestionType, an iterable of them, or a
+callable returning either, e.g. in a plugin's pyproject.toml:
+
+    [project.entry-points."trivia.question_types"]
+    hex = "trivia_hex:QUESTION_TYPE"
+"""
+
+import random
+from dataclasses import dataclass
+from typing import Callable, Iterable
+
+from answer import (
+    _generate_mathematics_answer,
+    _generate_network_broadcast_answer,
+    _generate_roman_numerals_answer,
+    _generate_usable_ipv4_answer,
+)
+from questions import (
+    generate_mathematics_question,
+    generate_network_broadcast_question,
+    generate_roman_numerals_question,
+    generate_usable_addresses_question,
+)
+
+ENTRY_POINT_GROUP = "trivia.question_types"
+
+
+def collapse_whitespace(answer: str) -> str:
+    return " ".join(answer.split())
+
+
+def canonical_integer(answer: str) -> str:
+    # "042", " 42 " and "+42" are all the same answer
+    answer = answer.strip()
+    try:
+        return str(int(answer))
+    except ValueError:
+        return answer
+
+
+@dataclass(frozen=True, slots=True)
+class QuestionType:
+    name: str
+    generate: Callable[[random.Random | None], str]
+    solve: Callable[[str], str]
+    canonicalize: Callable[[str], str] = collapse_whitespace
+    generate_batch: Callable[[int, random.Random | None], list[str]] | None = None
+    solve_batch: Callable[[list[str]], list[str]] | None = None
+    # Used when the server config has no question_formats entry for this type
+    default_format: str | None = None
+    # Generation or solving is slow enough that the server prefetches it off the loop
+    blocking: bool = False
+    # What a bare answer looks like, for prompting a model ("a single integer")
+    answer_format: str | None = None
+
+    def generate_many(self, count: int, rng: random.Random | None = None) -> list[str]:
+        if self.generate_batch is not None:
+            return self.generate_batch(count, rng)
+        return [self.generate(rng) for _ in range(count)]
+
+    def solve_many(self, short_questions: list[str]) -> list[str]:
+        if self.solve_batch is not None:
+            return self.solve_batch(short_questions)
+        return [self.solve(short_question) for short_question in short_questions]
+
+    def is_correct(self, answer: str, expected: str) -> bool:
+        return self.canonicalize(answer) == self.canonicalize(expected)
+
+
+_REGISTRY: dict[str, QuestionType] = {}
+_plugins_loaded = False
+
+
+def register(qtype: QuestionType, replace: bool = False) -> QuestionType:
+    if not replace and qtype.name in _REGISTRY:
+        raise ValueError(f"Question type {qtype.name!r} is already registered")
+    _REGISTRY[qtype.name] = qtype
+    return qtype
+
+
+def unregister(name: str) -> None:
+    _REGISTRY.pop(name, None)
+
+
+def get(name: str) -> QuestionType | None:
+    qtype = _REGISTRY.get(name)
+    if qtype is None and not _plugins_loaded:
+        # Plugins are only scanned for the first time a name is missing
+        load_plugins()
+        qtype = _REGISTRY.get(name)
+    return qtype
+
+
+def names() -> list[str]:
+    load_plugins()
+    return list(_REGISTRY)
+
+
+def load_plugins(group: str = ENTRY_POINT_GROUP) -> list[str]:
+    """Register every question type exposed under the entry point group (once)."""
+    global _plugins_loaded
+    if _plugins_loaded:
+        return []
+    _plugins_loaded = True
+
+    from importlib.metadata import entry_points
+
+    loaded = []
+    for entry_point in entry_points(group=group):
+        try:
+            found = entry_point.load()
+            if callable(found) and not isinstance(found, QuestionType):
+                found = found()
+            for qtype in ([found] if isinstance(found, QuestionType) else found):
+                if not isinstance(qtype, QuestionType):
+                    raise TypeError(f"expected QuestionType, got {type(qtype).__name__}")
+                register(qtype)
+                loaded.append(qtype.name)
+        except Exception as exc:
+            print(f"Skipping question type plugin {entry_point.name!r}: {exc}")
+    return loaded
+
+
+def _register_builtins(qtypes: Iterable[QuestionType]) -> None:
+    for qtype in qtypes:
+        register(qtype)
+
+
+_register_builtins([
+    QuestionType(
+        name="Mathematics",
+        generate=generate_mathematics_question,
+        solve=_generate_mathematics_answer,
+        canonicalize=canonical_integer,
+        default_format="Evaluate {}",
+        answer_format="the resulting integer, e.g. -17",
+    ),
+    QuestionType(
+        name="Roman Numerals",
+        generate=generate_roman_numerals_question,
+        solve=_generate_roman_numerals_answer,
+        canonicalize=canonical_integer,
+        default_format="Calculate the decimal value of {}",
+        answer_format="the value as a decimal integer, e.g. 1968",
+    ),
+    QuestionType(
+        name="Usable IP Addresses of a Subnet",
+        generate=generate_usable_addresses_question,
+        solve=_generate_usable_ipv4_answer,
+        canonicalize=canonical_integer,
+        default_format="How many usable addresses in {}?",
+        answer_format="the number of usable host addresses as an integer, e.g. 254",
+    ),
+    QuestionType(
+        name="Network and Broadcast Address of a Subnet",
+        generate=generate_network_broadcast_question,
+        solve=_generate_network_broadcast_answer,
+        default_format="Network and broadcast addresses of {}?",
+        answer_format="the network address, the word and, then the broadcast address, e.g. 10.0.0.0 and 10.0.0.255",
+    ),
+])
@@ -1,5 +1,10 @@
 """Simple requests stub for offline testing."""
 
+
+class RequestException(IOError):
+    pass
+
+
 class _Response:
     def __init__(self, content: str = "42") -> None:
         self._content = content
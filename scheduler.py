@@ -0,0 +1,127 @@
+import asyncio
+import heapq
+import itertools
+from typing import Any, Callable
+
+
+class TimerHandle:
+    __slots__ = ("when", "callback", "args", "cancelled")
+
+    def __init__(self, when: float, callback: Callable[..., Any], args: tuple):
+        self.when = when
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        self.cancelled = True
+
+
+class RoundScheduler:
+    """Single heap of deadlines shared by every game running on the loop.
+
+    Only one loop timer is armed at a time (for the earliest deadline), so the
+    timer overhead stays constant no matter how many rooms are scheduled.
+    Callbacks may be plain functions or coroutine functions; coroutines are
+    wrapped in a task so a slow broadcast in one room never delays another.
+    """
+
+    # Cancelled entries are purged once they make up this share of the heap
+    _COMPACT_RATIO = 0.5
+
+    def __init__(self) -> None:
+        self._heap: list[tuple[float, int, TimerHandle]] = []
+        self._seq = itertools.count()
+        self._armed: asyncio.TimerHandle | None = None
+        self._armed_at: float | None = None
+        self._cancelled = 0
+        self._tasks: set[asyncio.Task] = set()
+
+    def __len__(self) -> int:
+        return len(self._heap) - self._cancelled
+
+    def time(self) -> float:
+        return asyncio.get_running_loop().time()
+
+    def call_at(self, when: float, callback: Callable[..., Any], *args: Any) -> TimerHandle:
+        handle = TimerHandle(when, callback, args)
+        heapq.heappush(self._heap, (when, next(self._seq), handle))
+        if self._armed_at is None or when < self._armed_at:
+            self._arm(when)
+        return handle
+
+    def call_later(self, delay: float, callback: Callable[..., Any], *args: Any) -> TimerHandle:
+        return self.call_at(self.time() + max(0.0, delay), callback, *args)
+
+    def call_soon(self, callback: Callable[..., Any], *args: Any) -> TimerHandle:
+        return self.call_at(self.time(), callback, *args)
+
+    def cancel(self, handle: TimerHandle | None) -> None:
+        if handle is None or handle.cancelled:
+            return
+        handle.cancel()
+        self._cancelled += 1
+        if self._cancelled > len(self._heap) * self._COMPACT_RATIO:
+            self._heap = [entry for entry in self._heap if not entry[2].cancelled]
+            heapq.heapify(self._heap)
+            self._cancelled = 0
+
+    def close(self) -> None:
+        if self._armed is not None:
+            self._armed.cancel()
+        self._armed = None
+        self._armed_at = None
+        self._heap.clear()
+        self._cancelled = 0
+        for task in list(self._tasks):
+            task.cancel()
+
+    def _arm(self, when: float) -> None:
+        if self._armed is not None:
+            self._armed.cancel()
+        loop = asyncio.get_running_loop()
+        self._armed_at = when
+        self._armed = loop.call_at(when, self._fire)
+
+    def _fire(self) -> None:
+        loop = asyncio.get_running_loop()
+        self._armed = None
+        self._armed_at = None
+        # The loop may wake a hair early; treat anything within clock
+        # resolution as due so it is not deferred to another iteration.
+        horizon = loop.time() + getattr(loop, "_clock_resolution", 1e-3)
+        heap = self._heap
+        while heap and heap[0][0] <= horizon:
+            _, _, handle = heapq.heappop(heap)
+            if handle.cancelled:
+                self._cancelled -= 1
+                continue
+            handle.cancelled = True
+            self._run(handle)
+
+        while heap and heap[0][2].cancelled:
+            heapq.heappop(heap)
+            self._cancelled -= 1
+        if heap:
+            self._arm(heap[0][0])
+
+    def spawn(self, coro) -> asyncio.Task:
+        """Run a transition coroutine now, tracked like scheduled ones."""
+        task = asyncio.get_running_loop().create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._task_done)
+        return task
+
+    def _run(self, handle: TimerHandle) -> None:
+        try:
+            result = handle.callback(*handle.args)
+        except Exception as exc:
+            print(f"Scheduled callback {handle.callback!r} failed: {exc}")
+            return
+        if asyncio.iscoroutine(result):
+            self.spawn(result)
+
+    def _task_done(self, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Scheduled task failed: {task.exception()}")
@@ -1,19 +1,40 @@
 import asyncio
-from helper import send_message, receive_message
-from questions import (
-    generate_mathematics_question, 
-    generate_network_broadcast_question, 
-    generate_roman_numerals_question,
-    generate_usable_addresses_question,
-) 
+from helper import (
+    send_message,
+    receive_frame,
+    decode_message,
+    encode_message,
+    FrameTooLarge,
+    FrameCompressor,
+    CoalescingWriter,
+    build_preset_dictionary,
+    describe_event_loop,
+    event_loop_factory,
+)
+import qtypes
+from answer import generate_answer
+from questions import derive_rng
 from enum import Enum, auto
 from typing import Any
-from dataclasses import dataclass, field, fields, asdict
-from answer import generate_answer
+from dataclasses import dataclass, field, fields, asdict, InitVar, MISSING
+from array import array
+from collections.abc import Iterable, Iterator
+from scheduler import RoundScheduler, TimerHandle
+from admission import AdmissionController, TokenBucket
+from transport import TcpTransport
 import sys
+import os
 import json
+import hashlib
+import marshal
+import math
+import re
+import string
 from pathlib import Path
 import time
+import random
+import secrets
+from typing import Callable
 
 @dataclass
 class ServerMessageConfig:
@@ -32,14 +53,218 @@ class ServerMessageConfig:
     final_standings_heading: str
     one_winner: str
     multiple_winners: str
+    max_connections: int = 1024
+    connections_per_ip_per_second: float = 5.0
+    connection_burst_per_ip: int = 20
+    waiting_queue_size: int = 64
+    hi_timeout_seconds: float = 10.0
+    queued_info: str = "The game is full. You are number {position} in the waiting queue."
+    rejected_info: str = "Connection rejected: {reason}."
+    heartbeat_interval_seconds: float = 5.0
+    heartbeat_timeout_seconds: float = 15.0
+    resumed_info: str = "Welcome back, {username}! You have {points} points."
+    compression_threshold_bytes: int = 512
+    coalesce_writes: bool = True
+    event_loop: str = "asyncio"
+    seed: int | str | None = None
+    room_id: str = ""
+    max_latency_compensation_seconds: float = 0.5
+    late_answer: str = "Too late! Your answer arrived {late_by:.2f}s after the deadline."
+    already_answered: str = "You have already answered this question."
+    max_frame_bytes: int = 16384
+    inbound_messages_per_second: float = 20.0
+    inbound_burst: int = 40
+    compact_questions: bool = True
+    blitz_questions: int = 0
+    blitz_result: str = "You got {correct} of {total} right."
+    bot_fill_seconds: float = 0.0
+    bot_skill: list[float] = field(default_factory=lambda: [0.6, 0.9])
+    bot_latency_seconds: list[float] = field(default_factory=lambda: [1.0, 4.0])
+    bot_name: str = "Bot {n}"
     
 
 class ClientSession:
-    def __init__(self, username: str, writer: asyncio.StreamWriter | None):
+    is_bot = False
+
+    # Only what a round or broadcast touches lives here; liveness, resume
+    # tokens, RTT state and the HI offers are kept by SessionTable
+    __slots__ = ("sid", "username", "point", "writer", "is_active",
+                 "leaderboard_version", "compressor", "compact_questions")
+
+    def __init__(self, username: str, writer: asyncio.StreamWriter | None, sid: int = -1):
+        self.sid = sid
         self.username = username
         self.point = 0 
         self.writer = writer 
         self.is_active = True
+        # Last leaderboard version delivered on this connection (0 = none yet)
+        self.leaderboard_version = 0
+        # Switched on once READY/RESUMED has told the client which dictionary to use
+        self.compressor: FrameCompressor | None = None
+        # Once READY/RESUMED carried the templates, QUESTION frames to this
+        # client drop the rendered text
+        self.compact_questions = False
+
+
+class BotSession(ClientSession):
+    """In-process player used to fill empty seats; it has no writer.
+
+    The server schedules its answers on the room's timer and records them
+    straight into the round, so a bot costs no socket, task or frame.
+    """
+    is_bot = True
+
+    __slots__ = ("skill",)
+
+    # Never matches a canonicalized answer
+    WRONG_ANSWER = "?"
+
+    def __init__(self, username: str, writer: None = None, sid: int = -1):
+        super().__init__(username, None, sid)
+        # Probability of answering any one question correctly
+        self.skill = 1.0
+
+    def answer(self, qtype: str, short_question: str, rng: random.Random) -> str:
+        if rng.random() < self.skill:
+            return generate_answer(qtype, short_question)
+        return self.WRONG_ANSWER
+
+    def answer_batch(self, qtype: str, short_questions: list[str], rng: random.Random) -> list[str]:
+        return [self.answer(qtype, short_question, rng) for short_question in short_questions]
+
+
+class SessionTable:
+    """Sessions stored densely by integer id, with a writer -> id index.
+
+    Ids are handed out in join order and never reused during a game, so they
+    can index straight into the per-round bytearrays of QuestionRound. A
+    withdrawn session (one that left before the game started) keeps its id
+    slot but is no longer listed.
+
+    Per-connection state that rounds never read (when the connection was last
+    heard from, what HI offered, resume tokens, smoothed RTT and the
+    outstanding PING) is kept here by id rather than on each session.
+    """
+
+    OFFERS_COMPRESSION = 1
+    OFFERS_QUESTION_TEMPLATES = 2
+
+    def __init__(self) -> None:
+        self._by_id: list[ClientSession | None] = []
+        self._withdrawn = 0
+        self._ids_by_writer: dict[Any, int] = {}
+        # Smoothed round-trip time from PING/PONG, in seconds (0 = no sample yet)
+        self._rtt = array("d")
+        # sent_at of the latest unanswered PING per session (NaN = none)
+        self._ping_sent_at = array("d")
+        self._resume_tokens: dict[int, str] = {}
+        self._last_seen = array("d")
+        # OFFERS_* bits from the session's latest HI
+        self._offers = bytearray()
+
+    def add(self, username: str, writer: asyncio.StreamWriter | None,
+            session_type: type[ClientSession] = ClientSession) -> ClientSession:
+        sess = session_type(username, writer, len(self._by_id))
+        self._by_id.append(sess)
+        self._rtt.append(0.0)
+        self._ping_sent_at.append(math.nan)
+        self._last_seen.append(0.0)
+        self._offers.append(0)
+        if writer is not None:
+            self._ids_by_writer[writer] = sess.sid
+        return sess
+
+    def withdraw(self, sess: ClientSession) -> None:
+        if self._by_id[sess.sid] is sess:
+            self._by_id[sess.sid] = None
+            self._withdrawn += 1
+            self._resume_tokens.pop(sess.sid, None)
+
+    def last_seen(self, sess: ClientSession) -> float:
+        return self._last_seen[sess.sid]
+
+    def touch(self, sess: ClientSession, when: float) -> None:
+        self._last_seen[sess.sid] = when
+
+    def set_offers(self, sess: ClientSession, compression: bool, question_templates: bool) -> None:
+        self._offers[sess.sid] = ((self.OFFERS_COMPRESSION if compression else 0)
+                                  | (self.OFFERS_QUESTION_TEMPLATES if question_templates else 0))
+
+    def offers(self, sess: ClientSession, offer: int) -> bool:
+        return bool(self._offers[sess.sid] & offer)
+
+    def resume_token(self, sess: ClientSession) -> str | None:
+        return self._resume_tokens.get(sess.sid)
+
+    def set_resume_token(self, sess: ClientSession, token: str | None) -> None:
+        if token is None:
+            self._resume_tokens.pop(sess.sid, None)
+        else:
+            self._resume_tokens[sess.sid] = token
+
+    def rtt(self, sess: ClientSession) -> float:
+        return self._rtt[sess.sid]
+
+    def observe_rtt(self, sess: ClientSession, sample: float) -> None:
+        # Same smoothing as TCP's SRTT (RFC 6298, alpha = 1/8)
+        if sample < 0:
+            return
+        rtt = self._rtt[sess.sid]
+        self._rtt[sess.sid] = sample if rtt == 0.0 else rtt + (sample - rtt) / 8
+
+    def note_ping(self, sess: ClientSession, sent_at: float) -> None:
+        # Only the latest PING is tracked; a PONG to an earlier one is just not a sample
+        self._ping_sent_at[sess.sid] = sent_at
+
+    def clear_ping(self, sess: ClientSession) -> None:
+        self._ping_sent_at[sess.sid] = math.nan
+
+    def observe_pong(self, sess: ClientSession, sent_at: Any, received_at: float) -> None:
+        # Only an echo of the PING we sent is a sample, and it counts once;
+        # anything else would let a client claim any RTT it likes (NaN never matches)
+        if sent_at != self._ping_sent_at[sess.sid]:
+            return
+        self._ping_sent_at[sess.sid] = math.nan
+        self.observe_rtt(sess, received_at - sent_at)
+
+    def rebind(self, sess: ClientSession, writer: asyncio.StreamWriter) -> None:
+        self._ids_by_writer[writer] = sess.sid
+
+    def forget_writer(self, writer: Any) -> None:
+        self._ids_by_writer.pop(writer, None)
+
+    def by_id(self, sid: int) -> ClientSession | None:
+        if 0 <= sid < len(self._by_id):
+            return self._by_id[sid]
+        return None
+
+    def get(self, writer: Any, default: ClientSession | None = None) -> ClientSession | None:
+        sid = self._ids_by_writer.get(writer)
+        return default if sid is None else self._by_id[sid]
+
+    def __getitem__(self, writer: Any) -> ClientSession:
+        return self._by_id[self._ids_by_writer[writer]]
+
+    def __contains__(self, writer: Any) -> bool:
+        return writer in self._ids_by_writer
+
+    def __len__(self) -> int:
+        return len(self._by_id) - self._withdrawn
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._ids_by_writer)
+
+    def keys(self):
+        return self._ids_by_writer.keys()
+
+    def values(self) -> list[ClientSession]:
+        if not self._withdrawn:
+            return self._by_id
+        return [sess for sess in self._by_id if sess is not None]
+
+    @property
+    def capacity(self) -> int:
+        return len(self._by_id)
 
 
 class GameState(Enum):
@@ -49,6 +274,24 @@ class GameState(Enum):
     FINISHED = auto()
 
 
+@dataclass(slots=True)
+class PreparedRound:
+    """Everything about a round that does not depend on when it starts."""
+    round_no: int
+    qtype: str
+    short_question: str
+    trivia_question: str
+    correct_answer: str
+    message: dict[str, Any]
+    # Same question without the rendered text, for clients holding the templates
+    compact_message: dict[str, Any]
+    # Encoded QUESTION lines keyed by (id of message, id of compressor), as _broadcast caches them
+    frames: dict[tuple[int, int], tuple[dict[str, Any], bytes]]
+    # Blitz rounds only: every question of the batch and its answer, in order
+    short_questions: list[str] = field(default_factory=list)
+    correct_answers: list[str] = field(default_factory=list)
+
+
 @dataclass
 class QuestionRound:
     round_no: int
@@ -60,16 +303,122 @@ class QuestionRound:
     finished_at: float     
     num_of_users: int
     is_open: bool = True
-    answers_by_session: dict[ClientSession, str | None] = field(default_factory=dict)  
-
-    def has_everyone_answered(self, active_sessions: set[ClientSession]) -> bool:
-        for sess in active_sessions:
-            if self.answers_by_session.get(sess) is None:
-                return False
-        return True
+    # Blitz rounds carry a whole batch; short_question and correct_answer stay empty
+    short_questions: list[str] = field(default_factory=list)
+    correct_answers: list[str] = field(default_factory=list)
+    awaiting: InitVar[Iterable[ClientSession]] = ()
+    capacity: InitVar[int] = 0
+    # Per-round answer state indexed by session id: expected/answered flags,
+    # and an index into answer_texts (-1 when no answer was given). The
+    # pending counter lets the early-close check run in O(1).
+    expected: bytearray = field(init=False, default_factory=bytearray)
+    answered: bytearray = field(init=False, default_factory=bytearray)
+    answer_idx: array = field(init=False, default_factory=lambda: array("i"))
+    answer_texts: list[str] = field(init=False, default_factory=list)
+    pending: int = field(init=False, default=0)
+    # Repeat answers turned away this round (only the first one counts)
+    duplicates: int = field(init=False, default=0)
+    # Per-session answer deadline (finished_at plus that player's latency
+    # allowance) and the latest of them, which is when the round closes
+    deadlines: array = field(init=False, default_factory=lambda: array("d"))
+    closes_at: float = field(init=False, default=0.0)
+
+    def __post_init__(self, awaiting: Iterable[ClientSession], capacity: int) -> None:
+        self._answer_ids: dict[str, int] = {}
+        self.closes_at = self.finished_at
+        self._grow(capacity)
+        for sess in awaiting:
+            self.add_session(sess)
+
+    def _grow(self, size: int) -> None:
+        missing = size - len(self.expected)
+        if missing > 0:
+            self.expected.extend(bytes(missing))
+            self.answered.extend(bytes(missing))
+            self.answer_idx.extend(array("i", [-1]) * missing)
+
+    def extend_deadline(self, sess: ClientSession, allowance: float) -> float:
+        # Sessions without an allowance keep finished_at, so deadlines only
+        # grows as far as the highest id that was actually given extra time
+        sid = sess.sid
+        if allowance <= 0:
+            return self.deadline_of(sess)
+        missing = sid + 1 - len(self.deadlines)
+        if missing > 0:
+            self.deadlines.extend(array("d", [self.finished_at]) * missing)
+        self.deadlines[sid] = self.finished_at + allowance
+        self.closes_at = max(self.closes_at, self.deadlines[sid])
+        return self.deadlines[sid]
+
+    def deadline_of(self, sess: ClientSession) -> float:
+        sid = sess.sid
+        return self.deadlines[sid] if sid < len(self.deadlines) else self.finished_at
+
+    @property
+    def is_blitz(self) -> bool:
+        return bool(self.correct_answers)
+
+    def has_answered(self, sess: ClientSession) -> bool:
+        sid = sess.sid
+        return sid < len(self.answered) and self.answered[sid] == 1
+
+    def record_answer(self, sess: ClientSession, answer: str) -> bool:
+        """Store a player's first answer; returns True when it was the last outstanding one.
+
+        Later answers from the same player are counted as duplicates and ignored.
+        """
+        sid = sess.sid
+        self._grow(sid + 1)
+        if self.answered[sid]:
+            self.duplicates += 1
+            return False
+        idx = self._answer_ids.get(answer)
+        if idx is None:
+            idx = self._answer_ids[answer] = len(self.answer_texts)
+            self.answer_texts.append(answer)
+        self.answer_idx[sid] = idx
+        self.answered[sid] = 1
+        return self._settle(sid)
+
+    def record_late(self, sess: ClientSession) -> bool:
+        """A late answer still uses up the player's one attempt; same return as record_answer."""
+        sid = sess.sid
+        self._grow(sid + 1)
+        if self.answered[sid]:
+            self.duplicates += 1
+            return False
+        self.answered[sid] = 1
+        return self._settle(sid)
+
+    def answer_of(self, sess: ClientSession) -> str | None:
+        sid = sess.sid
+        if sid >= len(self.answer_idx) or self.answer_idx[sid] < 0:
+            return None
+        return self.answer_texts[self.answer_idx[sid]]
+
+    def add_session(self, sess: ClientSession) -> None:
+        sid = sess.sid
+        self._grow(sid + 1)
+        if not self.expected[sid] and not self.answered[sid]:
+            self.expected[sid] = 1
+            self.pending += 1
+
+    def discard_session(self, sess: ClientSession) -> bool:
+        """Stop waiting on a dropped session; returns True if nobody is left to wait for."""
+        return self._settle(sess.sid)
+
+    def _settle(self, sid: int) -> bool:
+        if sid >= len(self.expected) or not self.expected[sid]:
+            return False
+        self.expected[sid] = 0
+        self.pending -= 1
+        return self.pending == 0
+
+    def has_everyone_answered(self, active_sessions: set[ClientSession] | None = None) -> bool:
+        return self.pending == 0
     
-    def is_finished(self, active_essions: set[ClientSession], now: float):
-        if self.has_everyone_answered(active_essions) or now >= self.finished_at:
+    def is_finished(self, active_essions: set[ClientSession] | None, now: float):
+        if self.has_everyone_answered(active_essions) or now >= self.closes_at:
             self.is_open = False
             return True
         return False
@@ -82,12 +431,35 @@ class Server:
                  question_word: str, correct_answer: str,
                  incorrect_answer: str, points_noun_singular: str,
                  points_noun_plural: str, final_standings_heading: str,
-                 one_winner: str, multiple_winners: str, config_message: ServerMessageConfig):
+                 one_winner: str, multiple_winners: str, config_message: ServerMessageConfig,
+                 scheduler: RoundScheduler | None = None, max_connections: int = 1024,
+                 connections_per_ip_per_second: float = 5.0, connection_burst_per_ip: int = 20,
+                 waiting_queue_size: int = 64, hi_timeout_seconds: float = 10.0,
+                 queued_info: str = "The game is full. You are number {position} in the waiting queue.",
+                 rejected_info: str = "Connection rejected: {reason}.",
+                 heartbeat_interval_seconds: float = 5.0, heartbeat_timeout_seconds: float = 15.0,
+                 resumed_info: str = "Welcome back, {username}! You have {points} points.",
+                 compression_threshold_bytes: int = 512, coalesce_writes: bool = True,
+                 event_loop: str = "asyncio", seed: int | str | None = None, room_id: str = "",
+                 max_latency_compensation_seconds: float = 0.5,
+                 late_answer: str = "Too late! Your answer arrived {late_by:.2f}s after the deadline.",
+                 already_answered: str = "You have already answered this question.",
+                 max_frame_bytes: int = 16384, inbound_messages_per_second: float = 20.0,
+                 inbound_burst: int = 40, compact_questions: bool = True,
+                 blitz_questions: int = 0, blitz_result: str = "You got {correct} of {total} right.",
+                 bot_fill_seconds: float = 0.0, bot_skill: list[float] | tuple[float, float] = (0.6, 0.9),
+                 bot_latency_seconds: list[float] | tuple[float, float] = (1.0, 4.0), bot_name: str = "Bot {n}",
+                 transport: Any = None):
         self._host = "0.0.0.0"
         self._port = port
         self._num_players = players
         self._question_types = question_types
-        self._question_formats = question_formats
+        # Registered question types may bring their own format
+        self._question_formats = {
+            **{qtype: registered.default_format for qtype in question_types
+               if (registered := qtypes.get(qtype)) is not None and registered.default_format},
+            **question_formats,
+        }
         self._question_seconds = question_seconds
         self._question_interval = question_interval_seconds
         self._ready_info = ready_info
@@ -99,19 +471,120 @@ class Server:
         self._final_standings_heading = final_standings_heading
         self._one_winner_message = one_winner
         self._multiple_winner_message = multiple_winners
+        self._hi_timeout = hi_timeout_seconds
+        self._queued_info = queued_info
+        self._rejected_info = rejected_info
+        self._heartbeat_interval = heartbeat_interval_seconds
+        self._heartbeat_timeout = heartbeat_timeout_seconds
+        self._resumed_info = resumed_info
+        self._coalesce_writes = coalesce_writes
+        # Only reported here; the loop itself is chosen before the server exists
+        self._event_loop = event_loop
+        # Questions come from this room's own stream, so a logged (seed, room)
+        # pair replays the same game and rooms never share RNG state
+        self._seed = seed if seed is not None else secrets.randbits(64)
+        self._room_id = room_id or str(port)
+        self._rng = derive_rng(self._seed, self._room_id)
+        # Separate stream so bots never shift the question sequence
+        self._bot_rng = derive_rng(self._seed, f"{self._room_id}:bots")
+        self._max_latency_compensation = max_latency_compensation_seconds
+        self._late_answer_message = late_answer
+        # Repeat ANSWERs in a round all get this same frame, encoded once
+        self._already_answered_frame = encode_message({
+            "message_type": "RESULT",
+            "correct": False,
+            "duplicate": True,
+            "feedback": already_answered
+        }) + b"\n"
+        self._duplicate_answers = 0
+        # Inbound limits, enforced per connection before any JSON is decoded
+        self._max_frame_bytes = max_frame_bytes
+        self._inbound_rate = inbound_messages_per_second
+        self._inbound_burst = inbound_burst
+        self._throttled_frames = 0
+        # Sent once in READY/RESUMED to clients that ask for them; their QUESTION
+        # frames then carry an index into question_types instead of the text
+        self._compact_questions = compact_questions
+        self._question_type_index = {qtype: i for i, qtype in enumerate(dict.fromkeys(question_types))}
+        # Blitz mode: each round is one QUESTIONS frame with this many questions,
+        # answered by a single ANSWERS frame and scored in one RESULTS frame
+        self._blitz_questions = blitz_questions
+        self._blitz_result_message = blitz_result
+        # Empty seats are filled with in-process bots this long after the
+        # first player joins (0 = wait for real players forever)
+        self._bot_fill = bot_fill_seconds
+        self._bot_skill = tuple(bot_skill)
+        self._bot_latency = tuple(bot_latency_seconds)
+        self._bot_name = bot_name
+        self._bot_fill_timer: TimerHandle | None = None
+        self._bots = 0
+        self._question_templates = {
+            "question_word": question_word,
+            "question_types": list(self._question_type_index),
+            "question_formats": {qtype: self._question_formats.get(qtype, "{}") for qtype in self._question_type_index}
+        }
+        self._compressor: FrameCompressor | None = None
+        if compression_threshold_bytes > 0:
+            self._compressor = FrameCompressor(self._build_compression_dictionary(), compression_threshold_bytes)
         
         self.config_message: ServerMessageConfig = config_message
-        self._join_cond: asyncio.Condition = asyncio.Condition()
-        self._answer_cond: asyncio.Condition | None = None
+        self._config_dict: dict[str, Any] | None = None
+        # TcpTransport or, for tests and benchmarks, a transport.LoopbackTransport
+        self._transport = transport if transport is not None else TcpTransport()
+        # Rooms hosted in the same process can share one scheduler; all state
+        # transitions are timer events on it rather than a sleeping coroutine.
+        self._scheduler: RoundScheduler = scheduler if scheduler is not None else RoundScheduler()
+        self._round_timer: TimerHandle | None = None
+        # Next round's question, answer and encoded frame, built while the current one runs
+        self._prefetch_task: asyncio.Task | None = None
+        self._heartbeat_timer: TimerHandle | None = None
+        self._orchestrating = False
+        self._game_started = False
+        self._game_over: asyncio.Event = asyncio.Event()
         self._round_no = 0
         self._question_round: QuestionRound | None = None
-        self._sessions : dict[asyncio.StreamWriter, ClientSession] = dict()
+        self._sessions : SessionTable = SessionTable()
         self._active_sessions : set[ClientSession] = set()
+        self._resume_tokens : dict[str, ClientSession] = dict()
+        self._leaderboard_version = 0
+        self._leaderboard_ranks : dict[int, tuple[int, int]] = dict()
+        self._admission = AdmissionController(
+            max_connections=max_connections,
+            rate_per_ip=connections_per_ip_per_second,
+            burst_per_ip=connection_burst_per_ip,
+            queue_size=waiting_queue_size,
+        )
+        # Connections that have not said HI yet, with their deadline on the shared scheduler
+        self._hi_timers: dict[asyncio.StreamWriter, TimerHandle] = dict()
 
         self._TRIVIA_QUESTION_FORMAT = "{question_word} {question_number} ({question_type}):\n{question}"
 
         self._state : GameState = GameState.WAITING_FOR_PLAYERS
         self._log(f"Initialised server on {self._host}:{self._port}; awaiting {self._num_players} players; state={self._state.name}")
+        self._log(f"Question seed {self._seed} for room {self._room_id!r}")
+
+
+    def _build_compression_dictionary(self) -> bytes:
+        # LEADERBOARD and FINISHED are the frames that grow with the room, so
+        # the dictionary is their boilerplate as it appears in encoded JSON.
+        def escaped(text: str) -> str:
+            return json.dumps(text)[1:-1]
+
+        phrases = [
+            '{"message_type": "FINISHED", "final_standings": "',
+            escaped(self._final_standings_heading + "\n"),
+            escaped(self._one_winner_message.replace("{}", "")),
+            escaped(self._multiple_winner_message.replace("{}", "")),
+            '{"message_type": "LEADERBOARD", "version": ',
+            ', "full": true, "nouns": [',
+            ', "base_version": ',
+            ', "entries": [[',
+        ]
+        for noun in (self._points_noun_plural, self._points_noun_singular):
+            phrases.append(escaped(f" {noun}\n"))
+            phrases.append(f', "{escaped(noun)}"')
+        phrases += ["], [", escaped(": 0 " + self._points_noun_plural + "\n")]
+        return build_preset_dictionary(phrases)
 
 
     def _log(self, message: str) -> None:
@@ -127,12 +600,28 @@ class Server:
             if mtype == "READY":
                 return f"READY interval={self._question_interval}"
             if mtype == "LEADERBOARD":
+                if "entries" in message:
+                    kind = "full" if message.get("full") else "delta"
+                    return f"LEADERBOARD v{message.get('version')} {kind} entries={len(message['entries'])}"
                 state = message.get("state", "")
                 return f"LEADERBOARD lines={len(state.splitlines())}"
             if mtype == "FINISHED":
                 return "FINISHED final_standings"
             if mtype == "RESULT":
                 return f"RESULT correct={message.get('correct')}"
+            if mtype == "QUESTIONS":
+                return (f"QUESTIONS round={self._round_no} type={message.get('question_type')} "
+                        f"count={len(message.get('short_questions', []))} timeout={message.get('time_limit')}")
+            if mtype == "RESULTS":
+                return f"RESULTS score={message.get('score')}/{len(message.get('correct', []))}"
+            if mtype == "PING":
+                return f"PING sent_at={message.get('sent_at')}"
+            if mtype == "RESUMED":
+                return f"RESUMED round={message.get('round')} time_remaining={message.get('time_remaining')}"
+            if mtype == "QUEUED":
+                return f"QUEUED position={message.get('position')}"
+            if mtype == "REJECTED":
+                return f"REJECTED reason={message.get('reason')}"
             return f"{mtype} keys={list(message.keys())}"
         except Exception:
             return "<unprintable message>"
@@ -149,82 +638,266 @@ class Server:
 
     async def start(self) -> None:
         try:
-            server = await asyncio.start_server(self._handle_client, host=self._host, port=self._port)
+            server = await self._transport.start_server(self._handle_client, self._host, self._port,
+                                                        limit=self._max_frame_bytes)
         except Exception as e:
             sys.stderr.write(f"server.py: Binding to port {self._port} was unsuccessful\n")
             sys.exit(1)
 
-        socknames = ", ".join(str(s.getsockname()) for s in (server.sockets or []))
+        socknames = ", ".join(str(s.getsockname()) for s in (server.sockets or [])) \
+            or f"{self._transport.name} port {server.port}"
         self._log(f"Listening on {socknames}")
+        write_path = "write-through, bursts coalesced per loop iteration" if self._coalesce_writes else "one write per frame"
+        self._log(f"Event loop: {describe_event_loop()}; writes: {write_path}")
 
         async with server:
             await self._orchestrator()
 
 
     async def _orchestrator(self): 
-        while True:
-            if self._state is GameState.WAITING_FOR_PLAYERS:
-                async with self._join_cond:
-                    await self._join_cond.wait_for(lambda: len(self._sessions) >= self._num_players)
-
-                self._log("Everyone has joined!")
-                ready_msg = self._construct_ready_message()
-                self._log("Sending ready message...")
-                # question_round_start = cur_time + self._question_interval
-                await self._broadcast(ready_msg)
-                print("Finished sending ready message!")
-                await asyncio.sleep(self._question_interval)
-                self._transition_state(GameState.QUESTION, "Starting first question round")
-
-            elif self._state is GameState.QUESTION:
-                self._answer_cond = asyncio.Condition()
-                self._round_no += 1
-                self._question_round = self._generate_question_round()
-                question_msg = self._construct_question_message()
-                await self._broadcast(question_msg)
+        if self._state is not GameState.FINISHED:
+            self._orchestrating = True
+            self._schedule_heartbeat()
+            self._maybe_begin_game()
+            await self._game_over.wait()
+            self._scheduler.cancel(self._heartbeat_timer)
+            self._heartbeat_timer = None
+
+        finished_msg = self._construct_finished_message()
+        await self._broadcast(finished_msg)
+        await self._reject_waiting_queue("the game has finished")
+        await self._shutdown_everything()
+
+
+    def _maybe_begin_game(self) -> None:
+        if not self._orchestrating or self._game_started or self._state is not GameState.WAITING_FOR_PLAYERS:
+            return
+        if len(self._active_sessions) < self._num_players:
+            self._arm_bot_fill()
+            return
+        self._scheduler.cancel(self._bot_fill_timer)
+        self._bot_fill_timer = None
+        self._game_started = True
+        self._scheduler.call_soon(self._begin_game)
 
-                try:
-                    # Deadline-based cancel that doesn't require making a separate task
-                    async with asyncio.timeout(self._question_round.finished_at - asyncio.get_running_loop().time()):
-                        async with self._answer_cond:
-                            await self._answer_cond.wait_for(
-                                lambda: self._question_round.has_everyone_answered(self._active_sessions)
-                            )
-
-                except asyncio.TimeoutError:  
-                    pass
-                
-                if self._round_no >= len(self._question_types):
-                    self._transition_state(GameState.FINISHED, "All question types completed")
-                    continue
 
-                leaderboard_msg = self._construct_leaderboard_message()
-                await self._broadcast(leaderboard_msg)
+    def _arm_bot_fill(self) -> None:
+        if self._bot_fill <= 0 or self._bot_fill_timer is not None or not self._active_sessions:
+            return
+        self._bot_fill_timer = self._scheduler.call_later(self._bot_fill, self._fill_with_bots)
 
-                self._transition_state(GameState.BETWEEN_ROUNDS, "Round finished; sending leaderboard and waiting before next question")
-                self._answer_cond = None
-                await asyncio.sleep(self._question_interval)
 
-                self._transition_state(GameState.QUESTION, f"Starting round {self._round_no}")
+    def _fill_with_bots(self) -> None:
+        self._bot_fill_timer = None
+        if self._game_started or self._state is not GameState.WAITING_FOR_PLAYERS:
+            return
+        if not self._active_sessions:
+            # Everyone left again; the next player to join re-arms the timer
+            return
+        missing = self._num_players - len(self._active_sessions)
+        for _ in range(missing):
+            self._add_bot()
+        self._log(f"Filled {missing} empty seats with bots after waiting {self._bot_fill}s")
+        self._maybe_begin_game()
 
-            elif self._state is GameState.FINISHED:
-                finished_msg = self._construct_finished_message()
-                await self._broadcast(finished_msg)
-                await self._shutdown_everything()
-                return
-            
+
+    def _add_bot(self) -> BotSession:
+        self._bots += 1
+        bot = self._sessions.add(self._bot_name.format(n=self._bots), None, BotSession)
+        bot.skill = self._bot_rng.uniform(*self._bot_skill)
+        self._sessions.touch(bot, self._scheduler.time())
+        self._active_sessions.add(bot)
+        return bot
+
+
+    def _schedule_bot_answers(self, question_round: QuestionRound) -> None:
+        # Seat order, not set order: the draws from _bot_rng must repeat for the same seed
+        for sess in self._sessions.values():
+            if not sess.is_bot or not sess.is_active:
+                continue
+            answer_at = question_round.started_at + self._bot_rng.uniform(*self._bot_latency)
+            # A bot slower than the deadline simply does not answer
+            if answer_at <= question_round.finished_at:
+                self._scheduler.call_at(answer_at, self._bot_answer, sess, question_round)
+
+
+    def _bot_answer(self, bot: BotSession, question_round: QuestionRound) -> None:
+        if question_round is not self._question_round or self._state is not GameState.QUESTION \
+                or not question_round.is_open or not bot.is_active:
+            return
+        if question_round.is_blitz:
+            answers = bot.answer_batch(question_round.qtype, question_round.short_questions, self._bot_rng)
+            last_outstanding = question_round.record_answer(bot, "\n".join(answers))
+            bot.point += sum(self._score_batch(answers, question_round.correct_answers))
+        else:
+            answer = bot.answer(question_round.qtype, question_round.short_question, self._bot_rng)
+            last_outstanding = question_round.record_answer(bot, answer)
+            if self._is_correct_answer(answer, question_round.correct_answer):
+                bot.point += 1
+        if last_outstanding and question_round.is_finished(None, self._scheduler.time()):
+            self._end_question_round("Everyone has answered")
+
+
+    def _personalise_ready(self, ready_msg: dict[str, Any], sess: ClientSession) -> dict[str, Any]:
+        msg = {**ready_msg, "resume_token": self._sessions.resume_token(sess)}
+        msg.update(self._negotiate_compression(sess))
+        msg.update(self._negotiate_question_templates(sess))
+        return msg
+
+
+    def _negotiate_compression(self, sess: ClientSession) -> dict[str, Any]:
+        # Takes effect from the next frame; the frame carrying the
+        # description itself is always sent uncompressed.
+        if not self._sessions.offers(sess, SessionTable.OFFERS_COMPRESSION) or self._compressor is None:
+            sess.compressor = None
+            return {}
+        sess.compressor = self._compressor
+        return {"compression": self._compressor.describe()}
+
+
+    def _negotiate_question_templates(self, sess: ClientSession) -> dict[str, Any]:
+        sess.compact_questions = (self._compact_questions
+                                  and self._sessions.offers(sess, SessionTable.OFFERS_QUESTION_TEMPLATES))
+        if not sess.compact_questions:
+            return {}
+        return {"question_templates": self._question_templates}
+
+
+    def _schedule_heartbeat(self) -> None:
+        if self._heartbeat_interval > 0:
+            self._heartbeat_timer = self._scheduler.call_later(self._heartbeat_interval, self._heartbeat_tick)
+
+
+    async def _heartbeat_tick(self) -> None:
+        # One reaper entry on the scheduler covers every connection: reap
+        # whoever has been silent too long, then ping the rest.
+        self._heartbeat_timer = None
+        if self._state is GameState.FINISHED:
+            return
+        now = self._scheduler.time()
+        cutoff = now - self._heartbeat_timeout
+        last_seen = self._sessions.last_seen
+        for sess in [sess for sess in self._active_sessions if last_seen(sess) < cutoff and not sess.is_bot]:
+            self._log(f"Reaping {sess.username}: silent for {now - last_seen(sess):.1f}s")
+            if sess.writer is None:
+                self._active_sessions.discard(sess)
+                sess.is_active = False
+                await self._settle_dropped_session(sess)
             else:
-                pass
+                await self._drop_session(sess.writer)
+
+        if self._state is not GameState.FINISHED:
+            self._schedule_heartbeat()
+            if self._active_sessions:
+                for sess in self._active_sessions:
+                    self._sessions.note_ping(sess, now)
+                await self._broadcast(self._construct_ping_message(now))
+
+
+    async def _begin_game(self) -> None:
+        self._log("Everyone has joined!")
+        ready_msg = self._construct_ready_message()
+        self._log("Sending ready message...")
+        await self._broadcast(ready_msg, per_session=lambda sess: self._personalise_ready(ready_msg, sess))
+        print("Finished sending ready message!")
+        self._round_timer = self._scheduler.call_later(self._question_interval, self._start_question_round)
+        self._prefetch_round(1)
+
+
+    async def _start_question_round(self) -> None:
+        due = self._round_timer.when if self._round_timer is not None else self._scheduler.time()
+        self._round_timer = None
+        self._round_no += 1
+        prepared = await self._take_prepared_round(self._round_no)
+        # Install the new round before entering QUESTION: a drop settled while
+        # the prefetch was awaited must not land on the previous round
+        self._question_round = self._round_from_prepared(prepared)
+        self._transition_state(GameState.QUESTION, f"Starting round {self._round_no}")
+        await self._broadcast(
+            prepared.message,
+            per_session=lambda sess: prepared.compact_message if sess.compact_questions else prepared.message,
+            frames=prepared.frames,
+        )
+        self._log(f"Round {self._round_no} QUESTION written {(self._question_round.started_at - due) * 1000:.2f} ms after its start time")
+        self._schedule_bot_answers(self._question_round)
+        self._prefetch_round(self._round_no + 1)
+
+        if self._question_round.has_everyone_answered():
+            self._end_question_round("Everyone has answered")
+            return
+        self._round_timer = self._scheduler.call_at(
+            self._question_round.closes_at, self._end_question_round, "Question deadline reached"
+        )
+
+
+    def _end_question_round(self, reason: str) -> None:
+        # Both the deadline timer and the last answer can land here; the state
+        # check makes whichever comes second a no-op.
+        if self._state is not GameState.QUESTION:
+            return
+        if self._question_round is not None:
+            self._question_round.is_open = False
+            if self._question_round.duplicates:
+                self._log(f"Round {self._round_no}: rejected {self._question_round.duplicates} duplicate answers "
+                          f"({self._duplicate_answers} this game)")
+        self._scheduler.cancel(self._round_timer)
+        self._round_timer = None
+
+        if self._round_no >= len(self._question_types):
+            self._transition_state(GameState.FINISHED, f"All question types completed; {reason}")
+            self._game_over.set()
+            return
+
+        self._transition_state(GameState.BETWEEN_ROUNDS, f"{reason}; sending leaderboard and waiting before next question")
+        # Started as a task straight away (not via a timer) so the leaderboard
+        # lands in the same write batch as the RESULT that closed the round
+        self._scheduler.spawn(self._run_between_rounds())
+
+
+    async def _run_between_rounds(self) -> None:
+        await self._broadcast_leaderboard()
+        self._round_timer = self._scheduler.call_later(self._question_interval, self._start_question_round)
+
+
+    def _prefetch_round(self, round_no: int) -> None:
+        if round_no > len(self._question_types):
+            return
+        self._prefetch_task = self._scheduler.spawn(self._prepare_round_async(round_no))
+
+
+    async def _prepare_round_async(self, round_no: int) -> PreparedRound:
+        registered = qtypes.get(self._question_types[round_no - 1])
+        if registered is not None and registered.blocking:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, self._prepare_round, round_no)
+        return self._prepare_round(round_no)
+
+
+    async def _take_prepared_round(self, round_no: int) -> PreparedRound:
+        task, self._prefetch_task = self._prefetch_task, None
+        if task is not None:
+            try:
+                # Normally finished long ago, in which case this does not yield
+                prepared = await task
+                if prepared.round_no == round_no:
+                    return prepared
+            except Exception as exc:
+                self._log(f"Prefetch for round {round_no} failed: {exc}")
+        return self._prepare_round(round_no)
 
 
     async def _shutdown_everything(self):
         self._log("Shutting down server and closing client sessions")
-        for sess in self._sessions.values():
+        if self._prefetch_task is not None:
+            self._prefetch_task.cancel()
+            self._prefetch_task = None
+        for sess in list(self._sessions.values()):
             if sess.writer is None:
-                print(f"{sess.username} has no writer")
+                if not sess.is_bot:
+                    print(f"{sess.username} has no writer")
                 continue
             try:
-                await self._drop_session(sess.writer)
+                await self._drop_session(sess.writer, shutting_down=True)
             except Exception:
                 pass
             
@@ -235,20 +908,58 @@ class Server:
         return self._question_round.correct_answer
 
 
-    async def _broadcast(self, message: dict[str, Any]) -> None:
+    async def _broadcast_leaderboard(self) -> None:
+        ranking = self._rank_sessions()
+        previous = self._leaderboard_ranks
+        self._leaderboard_ranks = {sess.sid: (sess.point, rank) for sess, rank in ranking}
+        self._leaderboard_version += 1
+        version = self._leaderboard_version
+
+        changed = [(sess, rank) for sess, rank in ranking
+                   if previous.get(sess.sid) != (sess.point, rank)]
+        delta_msg = self._construct_leaderboard_delta(changed, version - 1)
+        full_msg = self._construct_leaderboard_snapshot(ranking)
+
+        def pick(sess: ClientSession) -> dict[str, Any]:
+            # Anyone who missed the previous version cannot apply a delta
+            up_to_date = sess.leaderboard_version > 0 and sess.leaderboard_version == version - 1
+            sess.leaderboard_version = version
+            return delta_msg if up_to_date else full_msg
+
+        await self._broadcast(delta_msg, per_session=pick)
+
+
+    async def _broadcast(self, message: dict[str, Any],
+                         per_session: Callable[[ClientSession], dict[str, Any]] | None = None,
+                         frames: dict[tuple[int, int], tuple[dict[str, Any], bytes]] | None = None) -> None:
         # print("broadcasting...")
-        tasks = []
+        drains = []
 
         recipients: list[str] = []
+        # Each distinct (message, compressor) pair is serialised once for the
+        # whole room; the message is kept alive here so its id stays unique.
+        # Callers may hand in frames they already encoded, keyed the same way.
+        encoded: dict[tuple[int, int], tuple[dict[str, Any], bytes]] = dict(frames or {})
         for sess in list(self._active_sessions):
             if sess.writer is None:
-                print(f"{sess.username} has no writer")
+                if not sess.is_bot:
+                    print(f"{sess.username} has no writer")
+                continue
+            compressor = sess.compressor
+            outgoing = message if per_session is None else per_session(sess)
+            key = (id(outgoing), id(compressor))
+            if key not in encoded:
+                encoded[key] = (outgoing, encode_message(outgoing, compressor) + b"\n")
+            try:
+                sess.writer.write(encoded[key][1])
+            except Exception as exc:
+                self._log(f"Broadcast send error to {sess.username}: {exc}")
                 continue
             recipients.append(sess.username)
-            tasks.append(asyncio.create_task(send_message(sess.writer, message)))
+            drains.append(sess.writer.drain())
 
         self._log(f"Broadcast -> {recipients} | {self._summarize_message(message)}")
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        results = await asyncio.gather(*drains, return_exceptions=True)
         # Surface any exceptions for visibility
         for idx, res in enumerate(results):
             if isinstance(res, Exception):
@@ -258,30 +969,187 @@ class Server:
 
 
     async def _handle_client(self, reader, writer) -> None:
+        if self._coalesce_writes and isinstance(writer, asyncio.StreamWriter):
+            writer = CoalescingWriter(writer)
         peer = writer.get_extra_info("peername")
         self._log(f"[+] connected {peer}")
-        while True:
-            if reader is None or writer is None:
-                # print("reader or writer is None!")
-                break
-            try:
-                data = await receive_message(reader)  
-                # print(data) 
-            except Exception as e:
-                self._log(f"Receive error from {peer}: {e}")
-                break                                   
-            if data is None:
-                print("Data is none!")                            
-                break
+        ip = peer[0] if isinstance(peer, tuple) and peer else str(peer)
+        reason = self._admission.admit(ip, self._scheduler.time())
+        if reason is not None:
+            self._log(f"Rejected {peer}: {reason}")
+            await self._reject(writer, reason)
+            return
+
+        self._hi_timers[writer] = self._scheduler.call_later(
+            self._hi_timeout, self._expire_silent_connection, writer, peer
+        )
+        bucket = TokenBucket(self._inbound_rate, self._inbound_burst, self._scheduler.time())
+        try:
+            while True:
+                if reader is None or writer is None:
+                    # print("reader or writer is None!")
+                    break
+                try:
+                    line = await receive_frame(reader)
+                    received_at = self._scheduler.time()
+                    # print(line) 
+                except FrameTooLarge:
+                    self._log(f"Frame from {peer} exceeds {self._max_frame_bytes} bytes; closing")
+                    await self._reject(writer, f"frames may not exceed {self._max_frame_bytes} bytes")
+                    break
+                except Exception as e:
+                    self._log(f"Receive error from {peer}: {e}")
+                    break                                   
+                if line is None:
+                    print("Data is none!")                            
+                    break
+
+                # Over its rate, a connection simply is not read until its next
+                # token is due, so TCP backpressure slows the sender down
+                while not bucket.consume(self._scheduler.time()):
+                    self._throttled_frames += 1
+                    await asyncio.sleep((1 - bucket.tokens) / bucket.rate)
+
+                # Every client frame is a JSON object; anything else is refused unparsed
+                if line[:1] != b"{":
+                    if not line.strip():
+                        continue
+                    self._log(f"Malformed frame from {peer}; closing")
+                    await self._reject(writer, "malformed frame")
+                    break
+                if self._is_repeat_answer_frame(line, writer):
+                    await self._send_already_answered(writer)
+                    continue
+                try:
+                    data = decode_message(line)
+                except ValueError as exc:
+                    # Includes frames that parse but fail codec field validation
+                    self._log(f"Undecodable frame from {peer} ({exc}); closing")
+                    await self._reject(writer, "malformed frame")
+                    break
+
+                try:
+                    await self._process_message(data, writer, received_at)
+                except Exception as e:
+                    self._log(f"Process message error from {peer}: {e}")
+                    break
+        finally:
+            self._scheduler.cancel(self._hi_timers.pop(writer, None))
+            self._admission.forget(writer)
+            self._admission.release()
+            await self._close_connection(writer)
+
+
+    def _expire_silent_connection(self, writer: asyncio.StreamWriter, peer: Any) -> None:
+        self._hi_timers.pop(writer, None)
+        self._log(f"No HI from {peer} within {self._hi_timeout}s; closing")
+        try:
+            writer.close()
+        except Exception:
+            pass
+
 
+    async def _close_connection(self, writer: asyncio.StreamWriter) -> None:
+        sess = self._find_session_by_writer(writer)
+        if sess is not None and sess.writer is writer:
+            await self._drop_session(writer)
+            return
+        try:
+            writer.close()
+            await writer.wait_closed()
+        except Exception:
+            pass
+
+
+    async def _reject(self, writer: asyncio.StreamWriter, reason: str) -> None:
+        try:
+            await send_message(writer, self._construct_rejected_message(reason))
+        except Exception:
+            pass
+        try:
+            writer.close()
+            await writer.wait_closed()
+        except Exception:
+            pass
+
+
+    async def _reject_waiting_queue(self, reason: str) -> None:
+        for writer, _ in self._admission.drain_queue():
+            await self._reject(writer, reason)
+
+
+    async def _admit_from_queue(self) -> None:
+        while len(self._active_sessions) < self._num_players:
+            queued = self._admission.dequeue()
+            if queued is None:
+                return
+            writer, hello = queued
+            if writer.is_closing():
+                continue
+            new_session = self._add_session(hello["username"], writer,
+                                            FrameCompressor.CODEC in (hello.get("compression") or []),
+                                            hello.get("question_templates") is True)
+            await self._probe_rtt(new_session)
+        self._maybe_begin_game()
+
+
+    def _add_session(self, username: str, writer: asyncio.StreamWriter,
+                     wants_compression: bool = False, wants_question_templates: bool = False) -> ClientSession:
+        new_session = self._sessions.add(username, writer)
+        self._sessions.set_offers(new_session, wants_compression, wants_question_templates)
+        self._sessions.touch(new_session, self._scheduler.time())
+        resume_token = secrets.token_urlsafe(16)
+        self._sessions.set_resume_token(new_session, resume_token)
+        self._resume_tokens[resume_token] = new_session
+        self._active_sessions.add(new_session)
+        self._log(f"Session added: {username}. Sessions: {len(self._active_sessions)}/{self._num_players}")
+        return new_session
+
+
+    async def _probe_rtt(self, sess: ClientSession) -> None:
+        # First RTT sample straight after HI, so round 1 is already compensated
+        now = self._scheduler.time()
+        self._sessions.note_ping(sess, now)
+        try:
+            await send_message(sess.writer, self._construct_ping_message(now))
+        except Exception as exc:
+            self._log(f"RTT probe to {sess.username} failed: {exc}")
+
+
+    async def _resume_session(self, sess: ClientSession, writer: asyncio.StreamWriter) -> None:
+        old_writer = sess.writer
+        if old_writer is not None and old_writer is not writer:
+            # The previous connection is half-open; the reconnect takes over
+            self._sessions.forget_writer(old_writer)
             try:
-                await self._process_message(data, writer)
-            except Exception as e:
-                self._log(f"Process message error from {peer}: {e}")
-                break
-    
+                old_writer.close()
+            except Exception:
+                pass
+
+        sess.writer = writer
+        self._sessions.clear_ping(sess)
+        sess.is_active = True
+        self._sessions.touch(sess, self._scheduler.time())
+        sess.leaderboard_version = self._leaderboard_version
+        self._sessions.rebind(sess, writer)
+        self._active_sessions.add(sess)
+
+        question_round = self._question_round
+        if (self._state is GameState.QUESTION and question_round is not None
+                and question_round.is_open and question_round.answer_of(sess) is None):
+            question_round.add_session(sess)
+        else:
+            question_round = None
 
-    async def _drop_session(self, writer : asyncio.StreamWriter) -> None:
+        sess.compressor = None
+        resumed_msg = self._construct_resumed_message(sess, question_round)
+        resumed_msg.update(self._negotiate_compression(sess))
+        resumed_msg.update(self._negotiate_question_templates(sess))
+        self._log(f"Session resumed: {sess.username} | {self._summarize_message(resumed_msg)}")
+        await send_message(writer, resumed_msg)
+
+
+    async def _drop_session(self, writer : asyncio.StreamWriter, shutting_down: bool = False) -> None:
         discarded_ses = self._find_session_by_writer(writer)
 
         if discarded_ses is None:
@@ -293,15 +1161,35 @@ class Server:
         self._log(f"Active sessions: {len(self._active_sessions)}/{self._num_players}")
         discarded_ses.is_active = False
         discarded_ses.writer = None
+        self._sessions.forget_writer(writer)
+        before_game = (not shutting_down and self._state is GameState.WAITING_FOR_PLAYERS
+                       and not self._game_started)
+        if before_game:
+            # Never played: not ranked in any LEADERBOARD or FINISHED, and cannot resume
+            resume_token = self._sessions.resume_token(discarded_ses)
+            if resume_token is not None:
+                self._resume_tokens.pop(resume_token, None)
+            self._sessions.withdraw(discarded_ses)
+        await self._settle_dropped_session(discarded_ses)
         try: 
             writer.close()
             await writer.wait_closed()
         except Exception:
             pass
+        # A seat freed up before the game started goes to the next queued player
+        if before_game:
+            await self._admit_from_queue()
         return
+
+
+    async def _settle_dropped_session(self, sess: ClientSession) -> None:
+        if self._question_round is None or self._state is not GameState.QUESTION:
+            return
+        if self._question_round.discard_session(sess):
+            self._end_question_round("Every remaining player has answered")
     
     
-    async def _process_message(self, received: dict, writer) -> None:
+    async def _process_message(self, received: dict, writer, received_at: float | None = None) -> None:
         try:
             mtype = received["message_type"]
         except Exception:
@@ -311,29 +1199,60 @@ class Server:
 
         sess = self._find_session_by_writer(writer)
         uname = sess.username if sess is not None else "<unknown>"
+        if received_at is None:
+            received_at = self._scheduler.time()
+        if sess is not None and sess.writer is writer:
+            self._sessions.touch(sess, received_at)
+        if mtype == "PONG":
+            sent_at = received.get("sent_at")
+            if sess is not None and sess.writer is writer and isinstance(sent_at, (int, float)):
+                self._sessions.observe_pong(sess, sent_at, received_at)
+            return
+        if mtype in ("ANSWER", "ANSWERS") and sess is not None and self._question_round is not None \
+                and self._question_round.has_answered(sess):
+            # Constant-time reject before any logging, scoring or formatting
+            await self._send_already_answered(writer)
+            return
         self._log(f"Recv <- {uname} | {mtype} {received}")
 
         if mtype == "HI":
             username = received["username"]
+            self._scheduler.cancel(self._hi_timers.pop(writer, None))
+            if sess is not None or self._admission.is_queued(writer):
+                return
 
-            async with self._join_cond:
-                if len(self._sessions.keys()) >= self._num_players:
-                    print("Max players reached.")
-                    return
-                new_session = ClientSession(username, writer)
-                self._sessions[writer] = new_session
-                self._active_sessions.add(new_session)
-                if len(self._sessions) >= self._num_players:
-                    self._join_cond.notify_all()
+            wants_compression = FrameCompressor.CODEC in (received.get("compression") or [])
+            wants_question_templates = received.get("question_templates") is True
+            resumed = self._resume_tokens.get(received.get("resume_token") or "")
+            if resumed is not None and self._game_started and self._state is not GameState.FINISHED:
+                self._sessions.set_offers(resumed, wants_compression, wants_question_templates)
+                await self._resume_session(resumed, writer)
+                return
 
-            self._log(f"Session added: {username}. Sessions: {len(self._sessions)}/{self._num_players}")
+            if self._game_started or len(self._active_sessions) >= self._num_players:
+                print("Max players reached.")
+                position = self._admission.enqueue(writer, received)
+                if position is None:
+                    await self._reject(writer, "the game is full")
+                    return
+                queued_msg = self._construct_queued_message(position)
+                self._log(f"Send -> {username} | {self._summarize_message(queued_msg)}")
+                await send_message(writer, queued_msg)
+                return
+            new_session = self._add_session(username, writer, wants_compression, wants_question_templates)
+            await self._probe_rtt(new_session)
+            self._maybe_begin_game()
 
         elif mtype == "BYE":
             await self._drop_session(writer)
-            if self._answer_cond:
-                async with self._answer_cond:
-                    if self._question_round and self._question_round.is_finished(self._active_sessions, asyncio.get_running_loop().time()):
-                        self._answer_cond.notify_all()
+
+        elif mtype == "PING":
+            await send_message(writer, {"message_type": "PONG", "sent_at": received.get("sent_at")})
+
+        elif mtype == "LEADERBOARD_SYNC":
+            if sess is not None and self._leaderboard_version:
+                sess.leaderboard_version = self._leaderboard_version
+                await send_message(writer, self._construct_leaderboard_snapshot(self._rank_sessions()), sess.compressor)
 
         elif mtype == "ANSWER":
             # Detailed answer logging
@@ -341,25 +1260,86 @@ class Server:
             if answer == "":
                 return
             correct_answer = self._get_correct_answer()
-
-            if self._state is GameState.QUESTION and self._question_round is not None:
-                sess = self._find_session_by_writer(writer)
-                if sess is not None and self._answer_cond:
-                    self._question_round.answers_by_session[sess] = answer
-                    if correct_answer is not None and correct_answer == answer:
+            question_round = self._question_round
+            late_by: float | None = None
+
+            # Judged on the server's receive stamp against this player's own
+            # deadline, so task ordering around the round timer cannot matter
+            if question_round is not None and sess is not None:
+                deadline = question_round.deadline_of(sess)
+                last_outstanding = False
+                if received_at > deadline:
+                    late_by = received_at - deadline
+                    last_outstanding = question_round.record_late(sess)
+                elif self._state is GameState.QUESTION and question_round.is_open:
+                    last_outstanding = question_round.record_answer(sess, answer)
+                    if self._is_correct_answer(answer, correct_answer):
                         sess.point += 1
 
-                    async with self._answer_cond:
-                        if self._question_round.is_finished(self._active_sessions, asyncio.get_running_loop().time()):
-                            self._answer_cond.notify_all()
-
+                # Only close the round early once the outstanding set drains
+                if last_outstanding and question_round.is_finished(None, received_at):
+                    self._end_question_round("Everyone has answered")
 
-            result_msg = self._construct_result_message(answer, correct_answer)
+            if late_by is not None:
+                result_msg = self._construct_late_result_message(answer, correct_answer, late_by)
+            else:
+                result_msg = self._construct_result_message(answer, correct_answer,
+                                                            self._is_correct_answer(answer, correct_answer))
+            if question_round is not None:
+                result_msg["elapsed"] = round(received_at - question_round.started_at, 4)
             to_uname = sess.username if sess is not None else "<unknown>"
             self._log(f"Send -> {to_uname} | {self._summarize_message(result_msg)} answer='{answer}' correct_answer='{correct_answer}'")
-            await send_message(writer, result_msg)
+            await send_message(writer, result_msg, sess.compressor if sess is not None else None)
+
+        elif mtype == "ANSWERS":
+            question_round = self._question_round
+            if question_round is None or sess is None or not question_round.is_blitz:
+                self._log(f"Ignoring ANSWERS from {uname} outside a blitz round")
+                return
+            answers = received["answers"]
+            total = len(question_round.correct_answers)
+            deadline = question_round.deadline_of(sess)
+            last_outstanding = False
+            if received_at > deadline:
+                last_outstanding = question_round.record_late(sess)
+                results_msg = self._construct_late_results_message(total, received_at - deadline)
+            else:
+                verdicts = [False] * total
+                if self._state is GameState.QUESTION and question_round.is_open:
+                    # One attempt per batch; it is stored as a single answer entry
+                    last_outstanding = question_round.record_answer(sess, "\n".join(map(str, answers)))
+                    verdicts = self._score_batch(answers, question_round.correct_answers)
+                    sess.point += sum(verdicts)
+                results_msg = self._construct_results_message(verdicts)
+            results_msg["elapsed"] = round(received_at - question_round.started_at, 4)
+            if last_outstanding and question_round.is_finished(None, received_at):
+                self._end_question_round("Everyone has answered")
+            self._log(f"Send -> {uname} | {self._summarize_message(results_msg)}")
+            await send_message(writer, results_msg, sess.compressor)
 
     
+    _ANSWER_MARKERS = (b'"message_type": "ANSWER"', b'"message_type":"ANSWER"',
+                       b'"message_type": "ANSWERS"', b'"message_type":"ANSWERS"')
+
+    def _is_repeat_answer_frame(self, line: bytes, writer) -> bool:
+        # Byte-level peek so repeat ANSWERs never reach json.loads
+        question_round = self._question_round
+        if question_round is None:
+            return False
+        sess = self._sessions.get(writer)
+        if sess is None or not question_round.has_answered(sess):
+            return False
+        return any(marker in line for marker in self._ANSWER_MARKERS)
+
+
+    async def _send_already_answered(self, writer) -> None:
+        if self._question_round is not None:
+            self._question_round.duplicates += 1
+        self._duplicate_answers += 1
+        writer.write(self._already_answered_frame)
+        await writer.drain()
+
+
     def _find_session_by_writer(self, writer : asyncio.StreamWriter) -> ClientSession | None:
         return self._sessions.get(writer)
         # for ses in self._active_sessions:
@@ -368,36 +1348,115 @@ class Server:
         # return None
     
 
-    def _generate_question_round(self) -> QuestionRound:
-        loop = asyncio.get_running_loop()
-        qtype = self._question_types[self._round_no - 1]
-        short_question = self._generate_short_question(qtype)
-        trivia_question = self._TRIVIA_QUESTION_FORMAT.format(
+    def _render_trivia_question(self, question_number: int | str, qtype: str, short_question: str) -> str:
+        return self._TRIVIA_QUESTION_FORMAT.format(
             question_word=self._question_word,
-            question_number=self._round_no,
+            question_number=question_number,
             question_type=qtype,
             question=self._question_formats[qtype].replace("{}", short_question)
         )
-        started_at = loop.time()
-        finished_at = started_at + self._question_seconds
-        correct_answer = generate_answer(qtype, short_question)
 
 
+    def _encode_question_frames(self, *messages: dict[str, Any]) -> dict[tuple[int, int], tuple[dict[str, Any], bytes]]:
+        frames = {}
+        for outgoing in messages:
+            for compressor in {None, self._compressor}:
+                frames[id(outgoing), id(compressor)] = (outgoing, encode_message(outgoing, compressor) + b"\n")
+        return frames
+
+
+    def _prepare_round(self, round_no: int) -> PreparedRound:
+        if self._blitz_questions > 0:
+            return self._prepare_blitz_round(round_no)
+        qtype = self._question_types[round_no - 1]
+        registered = qtypes.get(qtype)
+        short_question = self._generate_short_question(qtype)
+        trivia_question = self._render_trivia_question(round_no, qtype, short_question)
+        correct_answer = registered.solve(short_question) if registered is not None else ""
+        message = self._question_message(qtype, short_question, trivia_question)
+        compact_message = self._compact_question_message(round_no, qtype, short_question)
+        frames = self._encode_question_frames(message, compact_message)
+
         self._log(
-            f"Round generated: round={self._round_no} type={qtype} users={len(self._active_sessions)} time_limit={self._question_seconds} correct='{correct_answer}'"
+            f"Round prepared: round={round_no} type={qtype} time_limit={self._question_seconds} correct='{correct_answer}'"
         )
-
-        return QuestionRound(
-            round_no=self._round_no,
+        return PreparedRound(
+            round_no=round_no,
             qtype=qtype,
             short_question=short_question,
             trivia_question=trivia_question,
+            correct_answer=correct_answer,
+            message=message,
+            compact_message=compact_message,
+            frames=frames,
+        )
+
+
+    def _prepare_blitz_round(self, round_no: int) -> PreparedRound:
+        qtype = self._question_types[round_no - 1]
+        registered = qtypes.get(qtype)
+        if registered is None:
+            print("Unrecognised question type.")
+            print(qtype)
+            short_questions = [""] * self._blitz_questions
+            correct_answers = [""] * self._blitz_questions
+        else:
+            # The batch hooks let a question type generate and solve all at once
+            short_questions = registered.generate_many(self._blitz_questions, self._rng)
+            correct_answers = registered.solve_many(short_questions)
+        trivia_questions = [self._render_trivia_question(f"{round_no}.{i}", qtype, short_question)
+                            for i, short_question in enumerate(short_questions, 1)]
+        message = self._questions_message(round_no, qtype, short_questions, trivia_questions)
+        compact_message = self._compact_questions_message(round_no, qtype, short_questions)
+
+        self._log(
+            f"Blitz round prepared: round={round_no} type={qtype} questions={len(short_questions)} "
+            f"time_limit={self._question_seconds}"
+        )
+        return PreparedRound(
+            round_no=round_no,
+            qtype=qtype,
+            short_question="",
+            trivia_question="",
+            correct_answer="",
+            message=message,
+            compact_message=compact_message,
+            frames=self._encode_question_frames(message, compact_message),
+            short_questions=short_questions,
+            correct_answers=correct_answers,
+        )
+
+
+    def _round_from_prepared(self, prepared: PreparedRound) -> QuestionRound:
+        # Only the clock readings and the set of players are left for start time
+        started_at = self._scheduler.time()
+        question_round = QuestionRound(
+            round_no=prepared.round_no,
+            qtype=prepared.qtype,
+            short_question=prepared.short_question,
+            trivia_question=prepared.trivia_question,
             started_at=started_at,
-            finished_at=finished_at,
+            finished_at=started_at + self._question_seconds,
             num_of_users=len(self._active_sessions),
-            correct_answer=correct_answer,
-            answers_by_session={sess: None for sess in self._active_sessions},
+            correct_answer=prepared.correct_answer,
+            short_questions=prepared.short_questions,
+            correct_answers=prepared.correct_answers,
+            awaiting=self._active_sessions,
+            capacity=self._sessions.capacity,
         )
+        for sess in self._active_sessions:
+            question_round.extend_deadline(sess, self._latency_allowance(sess))
+        return question_round
+
+
+    def _latency_allowance(self, sess: ClientSession) -> float:
+        # The QUESTION reaches the player half an RTT late and the ANSWER
+        # needs another half to come back, so a full RTT is added (capped)
+        return min(self._sessions.rtt(sess), self._max_latency_compensation)
+
+
+    def _generate_question_round(self) -> QuestionRound:
+        return self._round_from_prepared(self._prepare_round(self._round_no))
 
 
     def _construct_ready_message(self) -> dict[str, Any]:
@@ -408,7 +1467,7 @@ class Server:
         self._log("Ready message is halfway done!")
         try:
             ready_text = self._ready_info.format(
-                **asdict(self.config_message)
+                **self._config_placeholders()
             )
         except Exception as exc:
             self._log(f"Ready message formatting failed: {exc}")
@@ -418,13 +1477,143 @@ class Server:
         return msg
 
 
-    def _construct_result_message(self, user_answer, generated_answer) -> dict[str, Any]:
+    def _construct_resumed_message(self, sess: ClientSession,
+                                   question_round: QuestionRound | None) -> dict[str, Any]:
+        # Catch-up frame: just enough to rejoin the current round, no history
+        msg: dict[str, Any] = {
+            "message_type": "RESUMED",
+            "resume_token": self._sessions.resume_token(sess),
+            "round": self._round_no,
+            "points": sess.point
+        }
+        try:
+            msg["info"] = self._resumed_info.format(username=sess.username, points=sess.point)
+        except Exception as exc:
+            self._log(f"Resumed message formatting failed: {exc}")
+            msg["info"] = self._resumed_info
+        if question_round is not None and question_round.is_blitz:
+            remaining = max(0.0, question_round.finished_at - self._scheduler.time())
+            questions = question_round.short_questions
+            msg["questions"] = {
+                **self._questions_message(
+                    question_round.round_no, question_round.qtype, questions,
+                    [self._render_trivia_question(f"{question_round.round_no}.{i}", question_round.qtype, q)
+                     for i, q in enumerate(questions, 1)]),
+                "time_limit": remaining
+            }
+            msg["time_remaining"] = remaining
+        elif question_round is not None:
+            remaining = max(0.0, question_round.finished_at - self._scheduler.time())
+            msg["question"] = {
+                "question_type": question_round.qtype,
+                "short_question": question_round.short_question,
+                "trivia_question": question_round.trivia_question,
+                "time_limit": remaining
+            }
+            msg["time_remaining"] = remaining
+        if self._leaderboard_version:
+            msg["leaderboard"] = self._construct_leaderboard_snapshot(self._rank_sessions())
+        return msg
+
+
+    def _construct_ping_message(self, now: float) -> dict[str, Any]:
+        return {
+            "message_type": "PING",
+            "sent_at": now
+        }
+
+
+    def _construct_queued_message(self, position: int) -> dict[str, Any]:
+        msg: dict[str, Any] = {
+            "message_type": "QUEUED",
+            "position": position
+        }
+        try:
+            msg["info"] = self._queued_info.format(position=position)
+        except Exception as exc:
+            self._log(f"Queued message formatting failed: {exc}")
+            msg["info"] = self._queued_info
+        return msg
+
+
+    def _construct_rejected_message(self, reason: str) -> dict[str, Any]:
+        msg: dict[str, Any] = {
+            "message_type": "REJECTED",
+            "reason": reason
+        }
+        try:
+            msg["info"] = self._rejected_info.format(reason=reason)
+        except Exception as exc:
+            self._log(f"Rejected message formatting failed: {exc}")
+            msg["info"] = self._rejected_info
+        return msg
+
+
+    def _is_correct_answer(self, answer: str, correct_answer: str | None) -> bool:
+        if correct_answer is None or self._question_round is None:
+            return False
+        registered = qtypes.get(self._question_round.qtype)
+        if registered is None:
+            return answer == correct_answer
+        return registered.is_correct(answer, correct_answer)
+
+
+    def _score_batch(self, answers: list, correct_answers: list[str]) -> list[bool]:
+        # Missing, extra or non-string entries simply count as wrong
+        registered = qtypes.get(self._question_round.qtype)
+        canonicalize = registered.canonicalize if registered is not None else str.strip
+        return [
+            i < len(answers) and isinstance(answers[i], str) and answers[i] != ""
+            and canonicalize(answers[i]) == canonicalize(correct)
+            for i, correct in enumerate(correct_answers)
+        ]
+
+
+    def _construct_results_message(self, verdicts: list[bool]) -> dict[str, Any]:
+        score = sum(verdicts)
+        msg: dict[str, Any] = {
+            "message_type": "RESULTS",
+            "correct": verdicts,
+            "score": score
+        }
+        try:
+            msg["feedback"] = self._blitz_result_message.format(correct=score, total=len(verdicts))
+        except Exception as exc:
+            self._log(f"Blitz result feedback formatting failed: {exc}")
+            msg["feedback"] = self._blitz_result_message
+        return msg
+
+
+    def _construct_late_results_message(self, total: int, late_by: float) -> dict[str, Any]:
+        msg = self._construct_results_message([False] * total)
+        msg["late"] = True
+        msg["late_by"] = round(late_by, 4)
+        try:
+            msg["feedback"] = self._late_answer_message.format(answer="", correct_answer="", late_by=late_by)
+        except Exception as exc:
+            self._log(f"Late answer feedback formatting failed: {exc}")
+            msg["feedback"] = self._late_answer_message
+        return msg
+
+
+    def _config_placeholders(self) -> dict[str, Any]:
+        # asdict() deep-copies the whole config; it never changes once the
+        # server exists, so it is done once rather than for every RESULT
+        if self._config_dict is None:
+            self._config_dict = asdict(self.config_message)
+        return self._config_dict
+
+
+    def _construct_result_message(self, user_answer, generated_answer,
+                                  correct: bool | None = None) -> dict[str, Any]:
         msg: dict[str, Any] = {
             "message_type": "RESULT"
         }
-        current_config_message: dict[str, Any] = asdict(self.config_message).copy()
-        current_config_message.pop("correct_answer", None)
-        if generated_answer is not None and generated_answer == user_answer:
+        current_config_message = {key: value for key, value in self._config_placeholders().items()
+                                  if key != "correct_answer"}
+        if correct is None:
+            correct = generated_answer is not None and generated_answer == user_answer
+        if correct:
             msg["correct"] = True
             try:
                 msg["feedback"] = self._correct_answer_message.format(
@@ -450,24 +1639,67 @@ class Server:
         return msg
     
     
-    def _construct_leaderboard_message(self) -> dict[str, Any]:
-        msg = {
-            "message_type" : "LEADERBOARD"
+    def _construct_late_result_message(self, user_answer, generated_answer, late_by: float) -> dict[str, Any]:
+        msg: dict[str, Any] = {
+            "message_type": "RESULT",
+            "correct": False,
+            "late": True,
+            "late_by": round(late_by, 4)
         }
+        try:
+            msg["feedback"] = self._late_answer_message.format(
+                answer=user_answer,
+                correct_answer=generated_answer,
+                late_by=late_by
+            )
+        except Exception as exc:
+            self._log(f"Late answer feedback formatting failed: {exc}")
+            msg["feedback"] = self._late_answer_message
+        return msg
 
+
+    def _rank_sessions(self) -> list[tuple[ClientSession, int]]:
         ranking = sorted(self._sessions.values(),
                         key=lambda session: (-1*session.point, session.username))
-        
-        str_ranking = ""
+        ranked = []
         prev_point = -1
         rank = 0
         for i in range(len(ranking)):
             sess = ranking[i]
-
             if sess.point != prev_point:
                 rank = i + 1
                 prev_point = sess.point
+            ranked.append((sess, rank))
+        return ranked
+
+
+    def _construct_leaderboard_snapshot(self, ranking: list[tuple[ClientSession, int]]) -> dict[str, Any]:
+        return {
+            "message_type": "LEADERBOARD",
+            "version": self._leaderboard_version,
+            "full": True,
+            "nouns": [self._points_noun_singular, self._points_noun_plural],
+            "entries": [[sess.sid, sess.username, sess.point, rank] for sess, rank in ranking]
+        }
+
+
+    def _construct_leaderboard_delta(self, changed: list[tuple[ClientSession, int]],
+                                     base_version: int) -> dict[str, Any]:
+        return {
+            "message_type": "LEADERBOARD",
+            "version": self._leaderboard_version,
+            "base_version": base_version,
+            "entries": [[sess.sid, sess.username, sess.point, rank] for sess, rank in changed]
+        }
+
 
+    def _construct_leaderboard_message(self) -> dict[str, Any]:
+        msg = {
+            "message_type" : "LEADERBOARD"
+        }
+
+        str_ranking = ""
+        for sess, rank in self._rank_sessions():
             str_ranking += f"{rank}. {sess.username}: {sess.point}"
             if sess.point == 1:
                 str_ranking += f" {self._points_noun_singular}\n"
@@ -489,7 +1721,7 @@ class Server:
         
         try:
             standings_heading = self._final_standings_heading.format(
-                **asdict(self.config_message)
+                **self._config_placeholders()
             )
         except Exception as exc:
             self._log(f"Final standings heading formatting failed: {exc}")
@@ -509,7 +1741,7 @@ class Server:
             try:
                 str_ranking += self._multiple_winner_message.format(
                     temp,
-                    **asdict(self.config_message)
+                    **self._config_placeholders()
                 )
             except Exception as exc:
                 self._log(f"Multiple winners message formatting failed: {exc}")
@@ -518,7 +1750,7 @@ class Server:
             try:
                 str_ranking += self._one_winner_message.format(
                     ranking[0].username,
-                    **asdict(self.config_message)
+                    **self._config_placeholders()
                 )
             except Exception as exc:
                 self._log(f"One winner message formatting failed: {exc}")
@@ -532,28 +1764,63 @@ class Server:
         if self._question_round is None:
             self._log("Question round is none!")
         
+        return self._question_message(
+            self._question_round.qtype,
+            self._question_round.short_question,
+            self._question_round.trivia_question,
+        )
+
+
+    def _question_message(self, qtype: str, short_question: str, trivia_question: str) -> dict[str, Any]:
         return {
             "message_type" : "QUESTION",
-            "question_type" : self._question_round.qtype,
-            "short_question" :  self._question_round.short_question,
-            "trivia_question" :  self._question_round.trivia_question,
+            "question_type" : qtype,
+            "short_question" :  short_question,
+            "trivia_question" :  trivia_question,
+            "time_limit" : self._question_seconds
+        }
+
+
+    def _compact_question_message(self, round_no: int, qtype: str, short_question: str) -> dict[str, Any]:
+        # Rendered by the client from the templates it got in READY/RESUMED
+        return {
+            "message_type" : "QUESTION",
+            "qtype" : self._question_type_index[qtype],
+            "round" : round_no,
+            "short_question" : short_question,
+            "time_limit" : self._question_seconds
+        }
+
+
+    def _questions_message(self, round_no: int, qtype: str, short_questions: list[str],
+                           trivia_questions: list[str]) -> dict[str, Any]:
+        return {
+            "message_type" : "QUESTIONS",
+            "question_type" : qtype,
+            "round" : round_no,
+            "short_questions" : short_questions,
+            "trivia_questions" : trivia_questions,
+            "time_limit" : self._question_seconds
+        }
+
+
+    def _compact_questions_message(self, round_no: int, qtype: str, short_questions: list[str]) -> dict[str, Any]:
+        return {
+            "message_type" : "QUESTIONS",
+            "qtype" : self._question_type_index[qtype],
+            "round" : round_no,
+            "short_questions" : short_questions,
             "time_limit" : self._question_seconds
         }
 
 
     def _generate_short_question(self, question_type) -> str:
-        if question_type == "Usable IP Addresses of a Subnet":
-            return generate_usable_addresses_question()
-        elif question_type == "Network and Broadcast Address of a Subnet":
-            return generate_network_broadcast_question()
-        elif question_type == "Roman Numerals":
-            return generate_roman_numerals_question()
-        elif question_type == "Mathematics":
-            return generate_mathematics_question()
-        else:
+        registered = qtypes.get(question_type)
+        if registered is None:
             print("Unrecognised question type.")
             print(question_type)
             return ""
+        return registered.generate(self._rng)
 
 def from_dict(data: dict[str, Any]) -> ServerMessageConfig:
     allowed = {f.name for f in fields(ServerMessageConfig)}
@@ -562,9 +1829,223 @@ def from_dict(data: dict[str, Any]) -> ServerMessageConfig:
     return ServerMessageConfig(**clean)
 
 
-def load_config(path: Path) -> Server:
-    with Path.open(path, "r", encoding="utf-8") as f:
-        cfg = json.load(f)
+class ConfigError(ValueError):
+    def __init__(self, problems: list[str]):
+        super().__init__("; ".join(problems))
+        self.problems = problems
+
+
+def _template_fields(template: str) -> list[str]:
+    return [name for _, name, _, _ in string.Formatter().parse(template) if name is not None]
+
+
+def _question_type_problems(question_types: list[str], formats: dict[str, str]) -> list[str]:
+    # Depends on which plugins are installed, so cached configs are checked again on load
+    problems = []
+    for qtype in dict.fromkeys(question_types):
+        registered = qtypes.get(qtype)
+        if registered is None:
+            problems.append(f"unknown question type '{qtype}'")
+        elif qtype not in formats and registered.default_format is None:
+            problems.append(f"question type '{qtype}' has no entry in 'question_formats'")
+    return problems
+
+
+def validate_config(cfg: dict[str, Any]) -> list[str]:
+    """Everything that would otherwise only fail mid-game; returns the problems found."""
+    if not isinstance(cfg, dict):
+        return ["configuration must be a JSON object"]
+    known = {f.name for f in fields(ServerMessageConfig)}
+    required = {f.name for f in fields(ServerMessageConfig)
+                if f.default is MISSING and f.default_factory is MISSING}
+    problems = [f"missing key '{key}'" for key in sorted(required - cfg.keys())]
+    problems += [f"unknown key '{key}'" for key in sorted(cfg.keys() - known)]
+    if problems:
+        return problems
+
+    if not isinstance(cfg["players"], int) or cfg["players"] < 1:
+        problems.append("'players' must be a positive integer")
+    for key in ("question_seconds", "question_interval_seconds"):
+        if not isinstance(cfg[key], (int, float)) or cfg[key] < 0:
+            problems.append(f"'{key}' must be a non-negative number")
+    if "bot_fill_seconds" in cfg and (not isinstance(cfg["bot_fill_seconds"], (int, float)) or cfg["bot_fill_seconds"] < 0):
+        problems.append("'bot_fill_seconds' must be a non-negative number")
+    for key, upper in (("bot_skill", 1), ("bot_latency_seconds", float("inf"))):
+        bounds = cfg.get(key, [0, 0])
+        if (not isinstance(bounds, list) or len(bounds) != 2
+                or not all(isinstance(b, (int, float)) for b in bounds) or not 0 <= bounds[0] <= bounds[1] <= upper):
+            problems.append(f"'{key}' must be a [low, high] pair with 0 <= low <= high"
+                            + (f" <= {upper}" if upper != float("inf") else ""))
+    if "blitz_questions" in cfg and (not isinstance(cfg["blitz_questions"], int) or cfg["blitz_questions"] < 0):
+        problems.append("'blitz_questions' must be a non-negative integer")
+    for key, minimum in (("max_frame_bytes", 64), ("inbound_messages_per_second", 1e-3), ("inbound_burst", 1)):
+        if key in cfg and (not isinstance(cfg[key], (int, float)) or cfg[key] < minimum):
+            problems.append(f"'{key}' must be a number of at least {minimum}")
+
+    formats = cfg["question_formats"]
+    if not isinstance(formats, dict):
+        return problems + ["'question_formats' must be an object"]
+    if not isinstance(cfg["question_types"], list) or not cfg["question_types"]:
+        problems.append("'question_types' must be a non-empty list")
+    else:
+        problems += _question_type_problems(cfg["question_types"], formats)
+    for qtype, template in formats.items():
+        # Filled by str.replace, so the only placeholder is a single bare {}
+        if not isinstance(template, str) or template.count("{}") != 1 or _template_fields(template) != [""]:
+            problems.append(f"question format for '{qtype}' must contain exactly one '{{}}' placeholder")
+
+    # template key -> (named placeholders it is formatted with, positional arguments)
+    config_names = known
+    answer_names = (config_names - {"correct_answer"}) | {"answer", "correct_answer"}
+    templates = {
+        "ready_info": (config_names, 0),
+        "final_standings_heading": (config_names, 0),
+        "correct_answer": (answer_names, 0),
+        "incorrect_answer": (answer_names, 0),
+        "one_winner": (config_names, 1),
+        "multiple_winners": (config_names, 1),
+        "queued_info": ({"position"}, 0),
+        "rejected_info": ({"reason"}, 0),
+        "resumed_info": ({"username", "points"}, 0),
+        "late_answer": ({"answer", "correct_answer", "late_by"}, 0),
+        "already_answered": (set(), 0),
+        "blitz_result": ({"correct", "total"}, 0),
+        "bot_name": ({"n"}, 0),
+    }
+    for key, (allowed, positional) in templates.items():
+        if key not in cfg:
+            continue
+        try:
+            names = _template_fields(cfg[key])
+        except (ValueError, TypeError) as exc:
+            problems.append(f"'{key}' is not a valid format string: {exc}")
+            continue
+        auto_numbered = 0
+        for name in names:
+            # Only the root of {a.b} / {a[0]} has to exist
+            root = name.split(".", 1)[0].split("[", 1)[0]
+            if root == "":
+                auto_numbered += 1
+                if auto_numbered > positional:
+                    problems.append(f"'{key}' has more '{{}}' placeholders than the {positional} value(s) it is given")
+            elif root.isdigit():
+                if int(root) >= positional:
+                    problems.append(f"'{key}' refers to positional placeholder '{{{name}}}', which is never filled")
+            elif root not in allowed:
+                problems.append(f"'{key}' refers to unknown placeholder '{{{name}}}'")
+    return problems
+
+
+def _config_cache_dir() -> Path | None:
+    # Off unless TRIVIA_CONFIG_CACHE names a directory
+    configured = os.environ.get("TRIVIA_CONFIG_CACHE")
+    return Path(configured) if configured else None
+
+
+_schema_fingerprint: str | None = None
+
+
+def _config_schema_fingerprint() -> str:
+    """Changes whenever the validator or the config fields do, so cache entries never outlive them."""
+    global _schema_fingerprint
+    if _schema_fingerprint is None:
+        digest = hashlib.sha256(sys.version.encode())
+        for function in (validate_config, _question_type_problems, _template_fields, from_dict):
+            digest.update(marshal.dumps(function.__code__))
+        for f in fields(ServerMessageConfig):
+            default = f.default_factory() if f.default_factory is not MISSING else f.default
+            digest.update(repr((f.name, f.type, default)).encode())
+        _schema_fingerprint = digest.hexdigest()[:16]
+    return _schema_fingerprint
+
+
+# Entries kept on disk; older ones and ones from another schema are removed on write
+MAX_CACHED_CONFIGS = 32
+
+_compiled_configs: dict[str, dict[str, Any]] = dict()
+
+
+def _read_cached_config(cache_file: Path) -> dict[str, Any] | None:
+    # Anything unreadable or not shaped like a compiled config is just a miss
+    try:
+        compiled = json.loads(cache_file.read_bytes())
+    except (OSError, ValueError):
+        return None
+    if not isinstance(compiled, dict) or compiled.keys() != {f.name for f in fields(ServerMessageConfig)}:
+        return None
+    if not isinstance(compiled["question_types"], list) or not isinstance(compiled["question_formats"], dict):
+        return None
+    try:
+        from_dict(compiled)
+    except (TypeError, ValueError):
+        return None
+    return compiled
+
+
+_CACHE_ENTRY_NAME = re.compile(r"[0-9a-f]{64}-[0-9a-f]{16}\.json")
+
+
+def _write_cached_config(cache_dir: Path, cache_file: Path, compiled: dict[str, Any]) -> None:
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp = cache_file.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(compiled), encoding="utf-8")
+        tmp.replace(cache_file)
+        suffix = f"-{_config_schema_fingerprint()}.json"
+        current = []
+        for entry in cache_dir.glob("*.json"):
+            # The directory may hold other files; only entries named like our keys are ours
+            if not _CACHE_ENTRY_NAME.fullmatch(entry.name):
+                continue
+            if entry.name.endswith(suffix):
+                current.append(entry)
+            else:
+                entry.unlink(missing_ok=True)
+        current.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+        for entry in current[MAX_CACHED_CONFIGS:]:
+            entry.unlink(missing_ok=True)
+    except OSError:
+        pass
+
+
+def compile_config(path: Path, cache_dir: Path | None = None) -> dict[str, Any]:
+    """Parse and validate a server config, reusing earlier results for identical files.
+
+    Compiled configs (validated, with defaults filled in) are cached in memory and,
+    when cache_dir or TRIVIA_CONFIG_CACHE names a directory, on disk. Entries are
+    keyed by a hash of the file contents and of the validator itself. A hit still
+    re-checks the question types against the registry, and falls back to full
+    validation if they no longer resolve.
+    """
+    raw = Path(path).read_bytes()
+    key = f"{hashlib.sha256(raw).hexdigest()}-{_config_schema_fingerprint()}"
+    cache_dir = cache_dir if cache_dir is not None else _config_cache_dir()
+    cache_file = cache_dir / f"{key}.json" if cache_dir is not None else None
+
+    compiled = _compiled_configs.get(key)
+    if compiled is None and cache_file is not None:
+        compiled = _read_cached_config(cache_file)
+    if compiled is not None and _question_type_problems(compiled["question_types"], compiled["question_formats"]):
+        compiled = None
+    if compiled is None:
+        try:
+            cfg = json.loads(raw)
+        except ValueError as exc:
+            raise ConfigError([f"not valid JSON: {exc}"]) from None
+        problems = validate_config(cfg)
+        if problems:
+            raise ConfigError(problems)
+        compiled = asdict(from_dict(cfg))
+        if cache_file is not None:
+            _write_cached_config(cache_dir, cache_file, compiled)
+    elif cache_file is not None and not cache_file.exists():
+        _write_cached_config(cache_dir, cache_file, compiled)
+    _compiled_configs[key] = compiled
+    return compiled
+
+
+def load_config(path: Path, cache_dir: Path | None = None) -> Server:
+    cfg = compile_config(path, cache_dir)
     return Server(**cfg, config_message=from_dict(cfg))
 
 
@@ -573,8 +2054,11 @@ def parse_config_path() -> Path:
         sys.stderr.write("server.py: Configuration not provided\n")
         sys.exit(1)
 
-    if len(sys.argv) != 3 or sys.argv[1] != "--config":
+    if len(sys.argv) not in (3, 5) or sys.argv[1] != "--config":
         _missing_config()
+    if len(sys.argv) == 5 and sys.argv[3] != "--loop":
+        sys.stderr.write(f"server.py: Unknown option {sys.argv[3]}\n")
+        sys.exit(1)
 
     config_path = Path(sys.argv[2])
     if not config_path.exists():
@@ -583,14 +2067,36 @@ def parse_config_path() -> Path:
     return config_path
 
 
-async def main():
-    config_path = parse_config_path()
-    server = load_config(config_path)
+def parse_loop_backend(config_path: Path) -> str | None:
+    """--loop on the command line wins over the config's event_loop key."""
+    if len(sys.argv) == 5:
+        return sys.argv[4]
+    try:
+        return compile_config(config_path).get("event_loop")
+    except (OSError, ConfigError):
+        # main() reports configuration problems once the loop is running
+        return None
+
+
+async def main(config_path: Path | None = None):
+    config_path = config_path or parse_config_path()
+    try:
+        server = load_config(config_path)
+    except ConfigError as e:
+        sys.stderr.write(f"server.py: Invalid configuration {config_path}: {e}\n")
+        sys.exit(1)
 
     await server.start()
     
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    config_path = parse_config_path()
+    try:
+        _, loop_factory = event_loop_factory(parse_loop_backend(config_path))
+    except ValueError as e:
+        sys.stderr.write(f"server.py: {e}\n")
+        sys.exit(1)
+    with asyncio.Runner(loop_factory=loop_factory) as runner:
+        runner.run(main(config_path))
     
         
\ No newline at end of file
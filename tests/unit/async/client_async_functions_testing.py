@@ -1,4 +1,5 @@
 import asyncio
+import os
 import sys
 import unittest
 from types import SimpleNamespace
@@ -16,9 +17,11 @@ class _DummyResponse:
 
 
 if "requests" not in sys.modules:
-    sys.modules["requests"] = SimpleNamespace(post=lambda *args, **kwargs: _DummyResponse())
+    sys.modules["requests"] = SimpleNamespace(post=lambda *args, **kwargs: _DummyResponse(),
+                                              RequestException=IOError)
 
-from client import Client
+from client import Client, ClientHooks, open_fd_reader
+from helper import encode_message
 
 
 class _DummyWriter:
@@ -38,10 +41,6 @@ class _DummyWriter:
 class TestClientFunction(unittest.IsolatedAsyncioTestCase):
 
     async def asyncSetUp(self):
-        self.input_queue = asyncio.Queue()
-        self.queue_patch = patch("client.INPUT_QUEUE", new=self.input_queue)
-        self.queue_patch.start()
-
         self.sent_messages = asyncio.Queue()
 
         async def fake_send_message(writer, message):
@@ -59,12 +58,11 @@ class TestClientFunction(unittest.IsolatedAsyncioTestCase):
         self.open_connection_patch.start()
 
         self.client = Client(username="test1", mode="you")
+        self.input_queue = self.client.inputs
 
     async def asyncTearDown(self):
         if self.send_patch:
             self.send_patch.stop()
-        if self.queue_patch:
-            self.queue_patch.stop()
         if self.open_connection_patch:
             self.open_connection_patch.stop()
 
@@ -145,6 +143,187 @@ class TestClientFunction(unittest.IsolatedAsyncioTestCase):
         sent = await asyncio.wait_for(self.sent_messages.get(), timeout=1)
         self.assertEqual(sent, {"message_type": "ANSWER", "answer": "10"})
 
+    async def test_clients_read_their_own_inputs(self):
+        other = Client(username="test2", mode="you")
+        other.writer = object()
+        other.feed("7")
+        self.client.writer = object()
+        question = {"question_type": "Mathematics", "short_question": "3 + 4",
+                    "trivia_question": "Compute 3 + 4", "time_limit": 0.1}
+
+        await other._answer_question(question, 0.1)
+        await self.client._answer_question(question, 0.1)
+
+        sent = await asyncio.wait_for(self.sent_messages.get(), timeout=1)
+        self.assertEqual(sent, {"message_type": "ANSWER", "answer": "7"})
+        self.assertTrue(self.sent_messages.empty())
+
+    async def test_hooks_cannot_stall_or_end_the_receive_loop(self):
+        never = asyncio.Event()
+        finished = []
+
+        async def stuck(result):
+            await never.wait()
+
+        def broken(state):
+            raise RuntimeError("hook bug")
+
+        client = Client(username="sdk", mode="you",
+                        hooks=ClientHooks(on_result=stuck, on_leaderboard=broken, on_finished=finished.append))
+        client.reader = asyncio.StreamReader()
+        client.writer = object()
+        client.connected = True
+        for message in ({"message_type": "RESULT", "correct": True, "feedback": "ok"},
+                        {"message_type": "LEADERBOARD", "state": "1. sdk: 1 point"},
+                        {"message_type": "PING", "sent_at": 1.5},
+                        {"message_type": "FINISHED", "final_standings": "done"}):
+            client.reader.feed_data(encode_message(message) + b"\n")
+        errors = []
+        asyncio.get_running_loop().set_exception_handler(lambda loop, context: errors.append(context))
+
+        await asyncio.wait_for(client._recv_message_loop(), timeout=1)
+
+        sent = await asyncio.wait_for(self.sent_messages.get(), timeout=1)
+        self.assertEqual(sent["message_type"], "PONG")
+        never.set()
+        await asyncio.wait_for(client.flush_hooks(), timeout=1)
+        self.assertEqual(finished, ["done"])
+        self.assertIsInstance(errors[0]["exception"], RuntimeError)
+        await client.request_shutdown()
+
+    async def test_events_after_shutdown_start_no_hook_task(self):
+        seen = []
+        client = Client(username="sdk", mode="you", hooks=ClientHooks(on_info=seen.append))
+        await client.request_shutdown()
+
+        client._emit("info", "late")
+
+        self.assertIsNone(client._hook_task)
+        self.assertTrue(client._hook_calls.empty())
+        self.assertEqual(seen, [])
+
+    async def test_answerer_overrides_the_mode(self):
+        async def answerer(question):
+            return question["short_question"].upper()
+
+        client = Client(username="sdk", mode="you", answerer=answerer)
+        client.writer = object()
+        await client._answer_question({"question_type": "Roman Numerals", "short_question": "xii",
+                                       "trivia_question": "Convert xii", "time_limit": 1}, 1)
+
+        sent = await asyncio.wait_for(self.sent_messages.get(), timeout=1)
+        self.assertEqual(sent, {"message_type": "ANSWER", "answer": "XII"})
+
+    async def test_ai_mode_without_ollama_config_is_an_error(self):
+        with self.assertRaises(ValueError):
+            Client(username="ai", mode="ai")
+
+    async def test_input_reader_queues_lines_and_stops_on_exit(self):
+        stream = asyncio.StreamReader()
+        stream.feed_data(b"CONNECT example.com:1234\r\n42\nEXIT\nignored\n")
+
+        await asyncio.wait_for(self.client.input_reader(stream), timeout=1)
+
+        self.assertTrue(self.client.is_shutting_down())
+        self.assertEqual([self.input_queue.get_nowait() for _ in range(self.input_queue.qsize())],
+                         ["CONNECT example.com:1234", "42"])
+
+    async def test_fd_reader_streams_a_pipe_until_eof(self):
+        read_fd, write_fd = os.pipe()
+        self.addCleanup(os.close, read_fd)
+        reader, close = open_fd_reader(read_fd)
+        self.addCleanup(close)
+
+        os.write(write_fd, b"one\ntw")
+        self.assertEqual(await asyncio.wait_for(reader.readline(), timeout=1), b"one\n")
+        os.write(write_fd, b"o\n")
+        os.close(write_fd)
+        self.assertEqual(await asyncio.wait_for(reader.readline(), timeout=1), b"two\n")
+        self.assertEqual(await asyncio.wait_for(reader.readline(), timeout=1), b"")
+
+    async def test_ollama_requests_are_constrained_per_question_type(self):
+        ollama_config = {
+            "ollama_host": "localhost",
+            "ollama_port": 11434,
+            "ollama_model": "llama2",
+            "keep_alive": "1h",
+            "num_predict": {"Mathematics": 8},
+            "system_prompts": {"Roman Numerals": "Digits only."},
+        }
+        ai_client = Client(username="ai", mode="ai", ollama_config=ollama_config)
+        timings = []
+        ai_client.hooks.on_timing = timings.append
+        posted = []
+
+        def fake_post(url, json=None, **kwargs):
+            posted.append(json)
+            return _DummyResponse({"message": {"content": " 4\n"}})
+
+        with patch.object(sys.modules["requests"], "post", new=fake_post, create=True):
+            self.assertEqual(await ai_client._ask_ollama(
+                {"question_type": "Mathematics", "trivia_question": "Evaluate 2 + 2"}, 1), "4")
+            await ai_client._ask_ollama({"question_type": "Roman Numerals", "trivia_question": "Convert IV"}, 1)
+        await ai_client.flush_hooks()
+
+        maths, roman = posted
+        self.assertEqual(maths["keep_alive"], "1h")
+        self.assertEqual(maths["options"], {"num_predict": 8})
+        self.assertIn("integer", maths["messages"][0]["content"])
+        self.assertEqual(maths["messages"][1], {"role": "user", "content": "Evaluate 2 + 2"})
+        self.assertNotIn("options", roman)
+        self.assertEqual(roman["messages"][0], {"role": "system", "content": "Digits only."})
+        self.assertEqual([timing["question_type"] for timing in timings], ["Mathematics", "Roman Numerals"])
+        self.assertEqual(len(ai_client.answer_time_report()), 2)
+
+    async def test_failed_ollama_requests_count_as_no_answer(self):
+        import requests
+
+        ai_client = Client(username="ai", mode="ai", ollama_config={
+            "ollama_host": "localhost", "ollama_port": 11434, "ollama_model": "llama2"})
+        question = {"question_type": "Mathematics", "trivia_question": "Evaluate 2 + 2"}
+
+        def unreachable(*args, **kwargs):
+            raise requests.RequestException("connection refused")
+
+        for post in (unreachable,
+                     lambda *args, **kwargs: _DummyResponse({"error": "model not found"}),
+                     lambda *args, **kwargs: _DummyResponse({"message": {"content": " \n "}})):
+            with patch.object(requests, "post", new=post, create=True):
+                self.assertIsNone(await ai_client._ask_ollama(question, 1))
+        self.assertEqual([answered for _, answered in ai_client.answer_times["Mathematics"]], [False] * 3)
+
+    async def test_ai_client_warms_the_model_up_on_connect(self):
+        ai_client = Client(username="ai", mode="ai", ollama_config={
+            "ollama_host": "localhost", "ollama_port": 11434, "ollama_model": "llama2"})
+        posted = []
+
+        def fake_post(url, json=None, **kwargs):
+            posted.append((url, json))
+            return _DummyResponse()
+
+        with patch.object(sys.modules["requests"], "post", new=fake_post, create=True):
+            self.assertTrue(await ai_client.connect_to("example.com", 1234))
+            await asyncio.wait_for(ai_client._warm_up_task, timeout=1)
+
+        self.assertEqual(posted, [("http://localhost:11434/api/chat",
+                                   {"model": "llama2", "messages": [], "keep_alive": "30m"})])
+        await ai_client._disconnect()
+
+    async def test_blitz_sends_typed_answers_at_the_deadline(self):
+        batch = {
+            "question_type": "Mathematics",
+            "short_questions": ["2 + 3", "1 + 1", "4 - 2"],
+            "trivia_questions": ["Compute 2 + 3", "Compute 1 + 1", "Compute 4 - 2"],
+            "time_limit": 0.1,
+        }
+        self.client.writer = object()
+        self.client.feed("5")
+
+        await self.client._answer_questions(batch, 0.1)
+
+        sent = await asyncio.wait_for(self.sent_messages.get(), timeout=1)
+        self.assertEqual(sent, {"message_type": "ANSWERS", "answers": ["5", "", ""]})
+
     async def test_answer_question_times_out_without_input(self):
         question = {
             "question_type": "Mathematics",
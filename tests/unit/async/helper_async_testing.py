@@ -1,8 +1,16 @@
 import asyncio
+import gc
 import json
 import unittest
 
-from helper import receive_message, send_message
+from helper import (
+    COMPRESSED_MARKER,
+    CoalescingWriter,
+    FrameCompressor,
+    build_preset_dictionary,
+    receive_message,
+    send_message,
+)
 
 
 class _DummyWriter:
@@ -80,3 +88,92 @@ class TestHelperMessaging(unittest.IsolatedAsyncioTestCase):
             received.append(json.loads(raw.decode("utf-8").strip()))
 
         self.assertEqual(received, payloads)
+
+    async def test_large_frames_are_compressed_with_preset_dictionary(self):
+        dictionary = build_preset_dictionary([" points\\n", ": 0 points\\n"])
+        compressor = FrameCompressor(dictionary, threshold=256)
+        writer = _DummyWriter()
+        standings = "\n".join(f"{i}. player{i}: {i % 5} points" for i in range(1, 200))
+        payload = {"message_type": "FINISHED", "final_standings": standings}
+
+        await send_message(writer, payload, compressor)
+        raw = await asyncio.wait_for(writer.buffer.get(), timeout=1)
+
+        self.assertTrue(raw.startswith(COMPRESSED_MARKER))
+        self.assertEqual(raw.count(b"\n"), 1)
+        self.assertLess(len(raw), len(json.dumps(payload)) // 3)
+
+        reader = _DummyReader()
+        reader.feed_line(raw)
+        received = await asyncio.wait_for(receive_message(reader, compressor), timeout=1)
+        self.assertEqual(received, payload)
+
+    async def test_preset_dictionary_is_trimmed_on_character_boundaries(self):
+        # 32767 bytes of three-byte snowmen would start mid-character
+        dictionary = build_preset_dictionary(["☃" * 20000, "x"])
+
+        self.assertEqual(dictionary.decode("utf-8"), "☃" * 10922 + "x")
+
+    async def test_small_frames_stay_plain_json(self):
+        compressor = FrameCompressor(b"", threshold=256)
+        writer = _DummyWriter()
+        payload = {"message_type": "RESULT", "correct": True, "feedback": "Correct!"}
+
+        await send_message(writer, payload, compressor)
+        raw = await asyncio.wait_for(writer.buffer.get(), timeout=1)
+
+        self.assertEqual(json.loads(raw), payload)
+
+    async def test_coalescing_writer_batches_frames_from_one_iteration(self):
+        inner = _CountingWriter()
+        writer = CoalescingWriter(inner)
+
+        writer.write(b"one\n")
+        self.assertEqual(inner.calls, 1)
+        writer.write(b"two\n")
+        await send_message(writer, {"message_type": "THREE"})
+
+        self.assertEqual(inner.calls, 2)
+        self.assertEqual(b"".join(inner.data), b'one\ntwo\n{"message_type": "THREE"}\n')
+
+        await send_message(writer, {"message_type": "FOUR"})
+        self.assertEqual(inner.calls, 3)
+
+    async def test_coalescing_writer_failed_flush_is_not_left_unretrieved(self):
+        inner = _FailingWriter()
+        writer = CoalescingWriter(inner)
+        errors = []
+        asyncio.get_running_loop().set_exception_handler(lambda loop, ctx: errors.append(ctx))
+
+        writer.write(b"one\n")
+        writer.write(b"two\n")
+        await asyncio.sleep(0)
+        writer = None
+        gc.collect()
+
+        self.assertEqual(errors, [])
+
+
+class _CountingWriter(_DummyWriter):
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+        self.data: list[bytes] = []
+
+    def write(self, data: bytes) -> None:
+        self.calls += 1
+        self.data.append(data)
+
+    def writelines(self, data) -> None:
+        self.calls += 1
+        self.data.extend(data)
+
+    def is_closing(self) -> bool:
+        return self.closed
+
+
+class _FailingWriter(_CountingWriter):
+    def write(self, data: bytes) -> None:
+        super().write(data)
+        if self.calls > 1:
+            raise ConnectionResetError("peer went away")
@@ -0,0 +1,56 @@
+import asyncio
+import unittest
+
+from scheduler import RoundScheduler
+
+
+class TestRoundScheduler(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self) -> None:
+        self.scheduler = RoundScheduler()
+
+    async def asyncTearDown(self) -> None:
+        self.scheduler.close()
+
+    async def test_callbacks_fire_in_deadline_order(self):
+        fired = []
+        done = asyncio.Event()
+        self.scheduler.call_later(0.03, fired.append, "late")
+        self.scheduler.call_later(0.01, fired.append, "early")
+        self.scheduler.call_later(0.05, done.set)
+
+        await asyncio.wait_for(done.wait(), timeout=1)
+
+        self.assertEqual(fired, ["early", "late"])
+        self.assertEqual(len(self.scheduler), 0)
+
+    async def test_cancelled_callback_does_not_fire(self):
+        fired = []
+        done = asyncio.Event()
+        handle = self.scheduler.call_later(0.01, fired.append, "cancelled")
+        self.scheduler.call_later(0.02, done.set)
+        self.scheduler.cancel(handle)
+
+        await asyncio.wait_for(done.wait(), timeout=1)
+
+        self.assertEqual(fired, [])
+
+    async def test_coroutine_callbacks_run_as_tasks(self):
+        done = asyncio.Event()
+
+        async def transition():
+            await asyncio.sleep(0)
+            done.set()
+
+        self.scheduler.call_soon(transition)
+
+        await asyncio.wait_for(done.wait(), timeout=1)
+
+    async def test_many_rooms_share_one_loop_timer(self):
+        loop = asyncio.get_running_loop()
+        for i in range(1000):
+            self.scheduler.call_later(10 + i, lambda: None)
+
+        self.assertEqual(len(self.scheduler), 1000)
+        timers = [h for h in loop._scheduled if not h.cancelled()]
+        self.assertEqual(len(timers), 1)
@@ -1,6 +1,9 @@
 import asyncio
+import json
 import unittest
-from unittest.mock import AsyncMock, MagicMock, patch
+from unittest.mock import ANY, AsyncMock, MagicMock, patch
+
+from questions import derive_rng
 
 from server import (
     ClientSession,
@@ -85,13 +88,13 @@ class TestServerAsyncFunctions(unittest.IsolatedAsyncioTestCase):
         writer = MagicMock()
         writer.get_extra_info.return_value = ("127.0.0.1", 1234)
 
-        messages = [{"message_type": "PING"}, None]
+        frames = [b'{"message_type": "PING"}\n', None]
 
-        with patch("server.receive_message", new=AsyncMock(side_effect=messages)), \
+        with patch("server.receive_frame", new=AsyncMock(side_effect=frames)), \
              patch.object(self.server, "_process_message", new=AsyncMock()) as process_mock:
             await self.server._handle_client(reader, writer)
 
-        process_mock.assert_awaited_once_with({"message_type": "PING"}, writer)
+        process_mock.assert_awaited_once_with({"message_type": "PING"}, writer, ANY)
 
     async def test_broadcast_sends_to_all_sessions(self):
         writer_one = _DummyWriter()
@@ -100,15 +103,11 @@ class TestServerAsyncFunctions(unittest.IsolatedAsyncioTestCase):
         await self.server._process_message({"message_type": "HI", "username": "bob"}, writer_two)
         self.assertEqual(len(self.server._active_sessions), 2)
 
-        sent = []
-
-        async def fake_send_message(writer, message):
-            sent.append((writer, message))
-
-        with patch("server.send_message", new=fake_send_message):
-            await self.server._broadcast({"message_type": "PING"})
+        await self.server._broadcast({"message_type": "PING"})
 
+        sent = [writer for writer in (writer_one, writer_two) if writer.sent]
         self.assertEqual(len(sent), len(self.server._active_sessions))
+        self.assertEqual(writer_one.sent[-1], {"message_type": "PING"})
 
     async def test_shutdown_everything_closes_sessions(self):
         writer = _DummyWriter()
@@ -137,6 +136,7 @@ class TestServerAsyncFunctions(unittest.IsolatedAsyncioTestCase):
         self.server._active_sessions.clear()
         self.server._active_sessions.add(session)
         self.server._state = GameState.QUESTION
+        now = self.server._scheduler.time()
 
         question_round = QuestionRound(
             round_no=1,
@@ -144,10 +144,11 @@ class TestServerAsyncFunctions(unittest.IsolatedAsyncioTestCase):
             short_question="1 + 1",
             trivia_question="Question",
             correct_answer="2",
-            started_at=0.0,
-            finished_at=1.0,
+            started_at=now,
+            finished_at=now + 1.0,
             num_of_users=1,
-            answers_by_session={session: None},
+            awaiting=[session],
+            capacity=len(self.server._sessions),
         )
         question_round.is_finished = MagicMock(return_value=True)
         self.server._question_round = question_round
@@ -157,15 +158,500 @@ class TestServerAsyncFunctions(unittest.IsolatedAsyncioTestCase):
             await self.server._process_message({"message_type": "ANSWER", "answer": "2"}, writer)
 
         self.assertEqual(session.point, 1)
-        self.assertEqual(question_round.answers_by_session[session], "2")
+        self.assertEqual(question_round.answer_of(session), "2")
         self.assertTrue(question_round.is_finished.called)
         send_mock.assert_awaited_once()
 
+    async def test_hi_when_full_is_queued_and_admitted_on_drop(self):
+        writers = [_DummyWriter() for _ in range(3)]
+        for i, writer in enumerate(writers):
+            await self.server._process_message({"message_type": "HI", "username": f"p{i}"}, writer)
+
+        self.assertNotIn(writers[2], self.server._sessions)
+        self.assertEqual(writers[2].sent[0]["message_type"], "QUEUED")
+        self.assertEqual(writers[2].sent[0]["position"], 1)
+
+        await self.server._drop_session(writers[0])
+
+        self.assertIn(writers[2], self.server._sessions)
+        self.assertEqual(len(self.server._active_sessions), 2)
+
+    async def test_player_leaving_before_the_game_is_not_ranked(self):
+        writers = [_DummyWriter() for _ in range(3)]
+        for name, writer in zip(("alice", "carol", "dave"), writers):
+            await self.server._process_message({"message_type": "HI", "username": name}, writer)
+        carol = self.server._sessions[writers[1]]
+        token = self.server._sessions.resume_token(carol)
+
+        with patch.object(self.server, "_maybe_begin_game"):
+            await self.server._drop_session(writers[1])
+
+        self.assertIn(writers[2], self.server._sessions)
+        self.assertNotIn(token, self.server._resume_tokens)
+        self.assertIsNone(self.server._sessions.resume_token(carol))
+        self.assertEqual([sess.username for sess, _ in self.server._rank_sessions()], ["alice", "dave"])
+        standings = self.server._construct_finished_message()["final_standings"]
+        self.assertNotIn("carol", standings)
+        self.assertIn("alice", standings)
+        self.assertIn("dave", standings)
+
+    async def test_silent_connection_is_closed_after_hi_timeout(self):
+        self.server._hi_timeout = 0.01
+        reader = asyncio.StreamReader()
+        writer = _DummyWriter()
+        writer.close = lambda: (reader.feed_eof(), setattr(writer, "close_called", True))
+
+        await asyncio.wait_for(self.server._handle_client(reader, writer), timeout=1)
+
+        self.assertTrue(writer.close_called)
+        self.assertEqual(self.server._admission.open_connections, 0)
+
+    async def test_heartbeat_reaps_silent_sessions_and_closes_round(self):
+        writer_one = _DummyWriter()
+        writer_two = _DummyWriter()
+        await self.server._process_message({"message_type": "HI", "username": "alice"}, writer_one)
+        await self.server._process_message({"message_type": "HI", "username": "bob"}, writer_two)
+        alice = self.server._sessions[writer_one]
+        bob = self.server._sessions[writer_two]
+        self.server._question_types = ["Mathematics", "Mathematics"]
+        self.server._state = GameState.QUESTION
+        self.server._round_no = 1
+        self.server._question_round = QuestionRound(
+            round_no=1,
+            qtype="Mathematics",
+            short_question="1 + 1",
+            trivia_question="Question",
+            correct_answer="2",
+            started_at=0.0,
+            finished_at=1e9,
+            num_of_users=2,
+            awaiting=[alice, bob],
+            capacity=len(self.server._sessions),
+        )
+        self.server._question_round.record_answer(alice, "2")
+        self.server._sessions.touch(bob, self.server._sessions.last_seen(bob) - self.server._heartbeat_timeout - 1)
+
+        await self.server._heartbeat_tick()
+
+        self.assertFalse(bob.is_active)
+        self.assertIn(alice, self.server._active_sessions)
+        self.assertEqual(self.server._state, GameState.BETWEEN_ROUNDS)
+        self.assertIn("PING", [msg["message_type"] for msg in writer_one.sent])
+        self.server._scheduler.close()
+
+    async def test_resume_token_reattaches_session_mid_round(self):
+        writer_one = _DummyWriter()
+        writer_two = _DummyWriter()
+        await self.server._process_message({"message_type": "HI", "username": "alice"}, writer_one)
+        await self.server._process_message({"message_type": "HI", "username": "bob"}, writer_two)
+        alice = self.server._sessions[writer_one]
+        alice.point = 2
+        token = self.server._sessions.resume_token(alice)
+        self.server._game_started = True
+        self.server._state = GameState.QUESTION
+        self.server._question_round = QuestionRound(
+            round_no=1,
+            qtype="Mathematics",
+            short_question="1 + 1",
+            trivia_question="Question",
+            correct_answer="2",
+            started_at=0.0,
+            finished_at=1e9,
+            num_of_users=2,
+            awaiting=self.server._active_sessions,
+            capacity=len(self.server._sessions),
+        )
+        await self.server._drop_session(writer_one)
+        self.assertFalse(alice.is_active)
+
+        new_writer = _DummyWriter()
+        await self.server._process_message(
+            {"message_type": "HI", "username": "alice", "resume_token": token}, new_writer
+        )
+
+        self.assertIs(self.server._sessions[new_writer], alice)
+        self.assertTrue(alice.is_active)
+        self.assertEqual(alice.point, 2)
+        resumed = new_writer.sent[-1]
+        self.assertEqual(resumed["message_type"], "RESUMED")
+        self.assertEqual(resumed["question"]["short_question"], "1 + 1")
+        self.assertGreater(resumed["time_remaining"], 0)
+        self.assertEqual(self.server._question_round.pending, 2)
+
+    async def test_leaderboard_broadcast_sends_full_then_delta(self):
+        writer_one = _DummyWriter()
+        writer_two = _DummyWriter()
+        await self.server._process_message({"message_type": "HI", "username": "alice"}, writer_one)
+        await self.server._process_message({"message_type": "HI", "username": "bob"}, writer_two)
+        alice = self.server._sessions[writer_one]
+
+        await self.server._broadcast_leaderboard()
+        first = writer_one.sent[-1]
+        self.assertTrue(first["full"])
+        self.assertEqual(len(first["entries"]), 2)
+
+        alice.point = 1
+        await self.server._broadcast_leaderboard()
+        second = writer_one.sent[-1]
+        self.assertNotIn("full", second)
+        self.assertEqual(second["base_version"], 1)
+        self.assertEqual(second["entries"], [[alice.sid, "alice", 1, 1], [1, "bob", 0, 2]])
+
+        await self.server._broadcast_leaderboard()
+        self.assertEqual(writer_one.sent[-1]["entries"], [])
+
+    async def test_next_round_is_prefetched_and_sent_as_prepared(self):
+        writer = _DummyWriter()
+        await self.server._process_message({"message_type": "HI", "username": "alice"}, writer)
+        self.server._question_types = ["Mathematics", "Mathematics"]
+
+        self.server._prefetch_round(1)
+        prepared = await self.server._prefetch_task
+        self.server._round_no = 0
+        with patch.object(self.server, "_prepare_round", wraps=self.server._prepare_round) as prepare_mock:
+            await self.server._start_question_round()
+            # Round 1 came from the prefetch; only round 2 was prepared now
+            await self.server._prefetch_task
+            prepare_mock.assert_called_once_with(2)
+
+        question = writer.sent[-1]
+        self.assertEqual(question, prepared.message)
+        self.assertEqual(self.server._question_round.short_question, prepared.short_question)
+        self.assertEqual(self.server._question_round.correct_answer, prepared.correct_answer)
+        self.server._scheduler.close()
+
+    async def test_drop_while_next_round_is_prepared_leaves_old_round_alone(self):
+        writer_one = _DummyWriter()
+        writer_two = _DummyWriter()
+        await self.server._process_message({"message_type": "HI", "username": "alice"}, writer_one)
+        await self.server._process_message({"message_type": "HI", "username": "bob"}, writer_two)
+        bob = self.server._sessions[writer_two]
+        self.server._question_types = ["Mathematics", "Mathematics"]
+        self.server._game_started = True
+        self.server._state = GameState.BETWEEN_ROUNDS
+        self.server._round_no = 1
+        old_round = QuestionRound(
+            round_no=1,
+            qtype="Mathematics",
+            short_question="1 + 1",
+            trivia_question="Question",
+            correct_answer="2",
+            started_at=0.0,
+            finished_at=1e9,
+            num_of_users=2,
+            awaiting=self.server._active_sessions,
+            capacity=len(self.server._sessions),
+        )
+        old_round.is_open = False
+        self.server._question_round = old_round
+        release = asyncio.Event()
+        prepare = self.server._prepare_round
+
+        async def slow_prefetch():
+            await release.wait()
+            return prepare(2)
+
+        self.server._prefetch_task = asyncio.ensure_future(slow_prefetch())
+        starting = asyncio.ensure_future(self.server._start_question_round())
+        await asyncio.sleep(0)
+
+        await self.server._drop_session(writer_two)
+        self.assertIs(self.server._question_round, old_round)
+        self.assertEqual(old_round.pending, 2)
+        self.assertEqual(self.server._state, GameState.BETWEEN_ROUNDS)
+
+        release.set()
+        await starting
+        self.assertIsNot(self.server._question_round, old_round)
+        self.assertEqual(self.server._state, GameState.QUESTION)
+        self.assertFalse(self.server._question_round.has_answered(bob))
+        self.assertEqual(self.server._question_round.pending, 1)
+        self.server._scheduler.close()
+
+    async def test_template_clients_get_compact_questions_that_render_identically(self):
+        from client import Client
+
+        writer_one = _DummyWriter()
+        writer_two = _DummyWriter()
+        await self.server._process_message(
+            {"message_type": "HI", "username": "alice", "question_templates": True}, writer_one)
+        await self.server._process_message({"message_type": "HI", "username": "bob"}, writer_two)
+        ready = self.server._construct_ready_message()
+        alice_ready = self.server._personalise_ready(ready, self.server._sessions[writer_one])
+        bob_ready = self.server._personalise_ready(ready, self.server._sessions[writer_two])
+        self.assertNotIn("question_templates", bob_ready)
+
+        self.server._round_no = 0
+        await self.server._start_question_round()
+        compact, full = writer_one.sent[-1], writer_two.sent[-1]
+        self.assertEqual(compact["qtype"], 0)
+        self.assertEqual(compact["round"], 1)
+        self.assertNotIn("trivia_question", compact)
+
+        client = Client(username="alice", mode="you")
+        client._question_templates = alice_ready["question_templates"]
+        self.assertEqual(client._expand_question(compact)["trivia_question"], full["trivia_question"])
+        self.assertEqual(client._expand_question(compact)["question_type"], full["question_type"])
+        self.server._scheduler.close()
+
+    async def test_blitz_round_is_answered_and_scored_as_one_batch(self):
+        from client import Client
+
+        writer_one = _DummyWriter()
+        writer_two = _DummyWriter()
+        await self.server._process_message(
+            {"message_type": "HI", "username": "alice", "question_templates": True}, writer_one)
+        await self.server._process_message({"message_type": "HI", "username": "bob"}, writer_two)
+        alice, bob = self.server._sessions[writer_one], self.server._sessions[writer_two]
+        alice_ready = self.server._personalise_ready(self.server._construct_ready_message(), alice)
+        self.server._personalise_ready(self.server._construct_ready_message(), bob)
+        self.server._blitz_questions = 3
+        self.server._round_no = 0
+
+        await self.server._start_question_round()
+        full = writer_two.sent[-1]
+        self.assertEqual(full["message_type"], "QUESTIONS")
+        self.assertEqual(len(full["short_questions"]), 3)
+        self.assertTrue(full["trivia_questions"][1].startswith("Question 1.2 (Mathematics):"))
+        client = Client(username="alice", mode="you")
+        client._question_templates = alice_ready["question_templates"]
+        self.assertEqual(client._expand_questions(writer_one.sent[-1])["trivia_questions"], full["trivia_questions"])
+
+        correct = self.server._question_round.correct_answers
+        await self.server._process_message({"message_type": "ANSWERS", "answers": [correct[0], "x"]}, writer_one)
+        results = writer_one.sent[-1]
+        self.assertEqual(results["message_type"], "RESULTS")
+        self.assertEqual(results["correct"], [True, False, False])
+        self.assertEqual(alice.point, 1)
+
+        await self.server._process_message({"message_type": "ANSWERS", "answers": correct}, writer_one)
+        self.assertTrue(writer_one.sent[-1]["duplicate"])
+        self.assertEqual(alice.point, 1)
+
+        await self.server._process_message({"message_type": "ANSWERS", "answers": correct}, writer_two)
+        self.assertEqual(writer_two.sent[-1]["score"], 3)
+        self.assertEqual(bob.point, 3)
+        self.assertIs(self.server._state, GameState.FINISHED)
+        self.server._scheduler.close()
+
+    async def test_empty_seats_are_filled_with_bots_that_answer_on_the_timer(self):
+        self.server = _make_server(players=3)
+        self.server._bot_fill = 0.01
+        self.server._bot_skill = (1.0, 1.0)
+        self.server._bot_latency = (0.001, 0.002)
+        writer = _DummyWriter()
+        await self.server._process_message({"message_type": "HI", "username": "alice"}, writer)
+        orchestrator = asyncio.create_task(self.server._orchestrator())
+
+        while self.server._state is not GameState.QUESTION:
+            await asyncio.sleep(0.005)
+        bots = [sess for sess in self.server._sessions.values() if sess.is_bot]
+        self.assertEqual([bot.username for bot in bots], ["Bot 1", "Bot 2"])
+        self.assertTrue(all(bot.writer is None for bot in bots))
+
+        await asyncio.sleep(0.02)
+        self.assertEqual([bot.point for bot in bots], [1, 1])
+        answer = self.server._question_round.correct_answer
+        await self.server._process_message({"message_type": "ANSWER", "answer": answer}, writer)
+        await asyncio.wait_for(orchestrator, timeout=1)
+
+        self.assertEqual(writer.sent[-1]["message_type"], "FINISHED")
+        self.assertTrue(writer.close_called)
+
+    async def _bot_answers_for_seed(self, seed: int) -> list[tuple[str, float, bool]]:
+        server = _make_server(players=4)
+        server._bot_rng = derive_rng(seed, "room:bots")
+        server._bot_skill = (0.5, 0.5)
+        await server._process_message({"message_type": "HI", "username": "alice"}, _DummyWriter())
+        for _ in range(3):
+            server._add_bot()
+        server._question_types = ["Mathematics"]
+        server._round_no = 1
+        server._state = GameState.QUESTION
+        question_round = server._question_round = server._round_from_prepared(server._prepare_round(1))
+        scheduled = []
+        with patch.object(server._scheduler, "call_at",
+                          new=lambda when, callback, *args: scheduled.append((when, callback, args))):
+            server._schedule_bot_answers(question_round)
+        answers = []
+        for when, callback, (bot, round_) in sorted(scheduled, key=lambda entry: entry[0]):
+            before = bot.point
+            callback(bot, round_)
+            answers.append((bot.username, round(when - question_round.started_at, 9), bot.point > before))
+        server._scheduler.close()
+        return answers
+
+    async def test_bots_answer_the_same_way_for_the_same_seed(self):
+        first = await self._bot_answers_for_seed(7)
+        self.assertEqual(len(first), 3)
+        for _ in range(5):
+            self.assertEqual(await self._bot_answers_for_seed(7), first)
+
+    async def _start_round_with_rtts(self, rtts: list[float]) -> list[ClientSession]:
+        sessions = []
+        for i, rtt in enumerate(rtts):
+            writer = _DummyWriter()
+            await self.server._process_message({"message_type": "HI", "username": f"p{i}"}, writer)
+            sess = self.server._sessions[writer]
+            self.server._sessions.observe_rtt(sess, rtt)
+            sessions.append(sess)
+        self.server._question_types = ["Mathematics", "Mathematics"]
+        self.server._max_latency_compensation = 0.5
+        self.server._round_no = 1
+        self.server._state = GameState.QUESTION
+        self.server._question_round = self.server._round_from_prepared(self.server._prepare_round(1))
+        return sessions
+
+    async def test_pong_updates_smoothed_rtt(self):
+        writer = _DummyWriter()
+        await self.server._process_message({"message_type": "HI", "username": "alice"}, writer)
+        ping = writer.sent[-1]
+        self.assertEqual(ping["message_type"], "PING")
+
+        await self.server._process_message({"message_type": "PONG", "sent_at": ping["sent_at"]},
+                                           writer, ping["sent_at"] + 0.2)
+        sess = self.server._sessions[writer]
+        second = ping["sent_at"] + 1.0
+        self.server._sessions.note_ping(sess, second)
+        await self.server._process_message({"message_type": "PONG", "sent_at": second},
+                                           writer, second + 0.1)
+
+        self.assertAlmostEqual(self.server._sessions.rtt(sess), 0.2 + (0.1 - 0.2) / 8)
+
+    async def test_pong_must_echo_an_outstanding_ping(self):
+        writer = _DummyWriter()
+        await self.server._process_message({"message_type": "HI", "username": "alice"}, writer)
+        ping = writer.sent[-1]
+        sess = self.server._sessions[writer]
+
+        # A made-up timestamp, then a replay of an already answered PING
+        await self.server._process_message({"message_type": "PONG", "sent_at": ping["sent_at"] - 60},
+                                           writer, ping["sent_at"] + 0.1)
+        self.assertEqual(self.server._sessions.rtt(sess), 0.0)
+        await self.server._process_message({"message_type": "PONG", "sent_at": ping["sent_at"]},
+                                           writer, ping["sent_at"] + 0.1)
+        await self.server._process_message({"message_type": "PONG", "sent_at": ping["sent_at"]},
+                                           writer, ping["sent_at"] + 30)
+
+        self.assertAlmostEqual(self.server._sessions.rtt(sess), 0.1)
+
+    async def test_deadline_is_extended_by_capped_rtt(self):
+        near, far = await self._start_round_with_rtts([0.05, 2.0])
+        question_round = self.server._question_round
+
+        self.assertAlmostEqual(question_round.deadline_of(near), question_round.finished_at + 0.05)
+        self.assertAlmostEqual(question_round.deadline_of(far), question_round.finished_at + 0.5)
+        self.assertAlmostEqual(question_round.closes_at, question_round.finished_at + 0.5)
+
+    async def test_answer_after_personal_deadline_is_rejected_as_late(self):
+        near, far = await self._start_round_with_rtts([0.0, 0.4])
+        question_round = self.server._question_round
+        correct = question_round.correct_answer
+        received_at = question_round.finished_at + 0.2
+
+        await self.server._process_message({"message_type": "ANSWER", "answer": correct}, near.writer, received_at)
+        await self.server._process_message({"message_type": "ANSWER", "answer": correct}, far.writer, received_at)
+
+        late, on_time = near.writer.sent[-1], far.writer.sent[-1]
+        self.assertTrue(late["late"])
+        self.assertFalse(late["correct"])
+        self.assertAlmostEqual(late["late_by"], 0.2)
+        self.assertEqual(near.point, 0)
+        self.assertIsNone(question_round.answer_of(near))
+        self.assertTrue(on_time["correct"])
+        self.assertNotIn("late", on_time)
+        self.assertEqual(far.point, 1)
+        self.server._scheduler.close()
+
+    async def test_repeated_answers_score_once_and_get_the_duplicate_frame(self):
+        alice, _ = await self._start_round_with_rtts([0.0, 0.0])
+        correct = self.server._question_round.correct_answer
+
+        with patch.object(self.server, "_construct_result_message",
+                          wraps=self.server._construct_result_message) as result_mock:
+            for _ in range(5):
+                await self.server._process_message({"message_type": "ANSWER", "answer": correct}, alice.writer)
+
+        self.assertEqual(alice.point, 1)
+        self.assertEqual(result_mock.call_count, 1)
+        self.assertTrue(alice.writer.sent[-1]["duplicate"])
+        self.assertEqual(self.server._question_round.duplicates, 4)
+        self.assertEqual(self.server._duplicate_answers, 4)
+        self.server._scheduler.close()
+
+    async def _run_connection(self, *lines: bytes, limit: int = 2 ** 16) -> "_DummyWriter":
+        reader = asyncio.StreamReader(limit=limit)
+        for line in lines:
+            reader.feed_data(line)
+        reader.feed_eof()
+        writer = _DummyWriter()
+        await self.server._handle_client(reader, writer)
+        return writer
+
+    async def test_oversized_frame_gets_protocol_error(self):
+        self.server._max_frame_bytes = 128
+        writer = await self._run_connection(b'{"message_type": "HI", "username": "' + b"x" * 512 + b'"}\n',
+                                            limit=128)
+
+        self.assertEqual(writer.sent[-1]["message_type"], "REJECTED")
+        self.assertIn("128 bytes", writer.sent[-1]["reason"])
+        self.assertTrue(writer.close_called)
+
+    async def test_non_json_frame_is_rejected_without_decoding(self):
+        with patch("server.decode_message") as decode_mock:
+            writer = await self._run_connection(b"GET / HTTP/1.1\r\n")
+
+        decode_mock.assert_not_called()
+        self.assertEqual(writer.sent[-1]["reason"], "malformed frame")
+
+    async def test_frame_failing_field_validation_is_rejected(self):
+        writer = await self._run_connection(b'{"message_type": "HI", "username": 42}\n')
+
+        self.assertEqual(writer.sent[-1]["reason"], "malformed frame")
+        self.assertEqual(len(self.server._sessions), 0)
+
+    async def test_answer_without_answer_field_is_accepted(self):
+        with patch.object(self.server, "_process_message", wraps=self.server._process_message) as process_mock:
+            writer = await self._run_connection(b'{"message_type": "HI", "username": "alice"}\n',
+                                                b'{"message_type": "ANSWER"}\n')
+
+        process_mock.assert_any_await({"message_type": "ANSWER"}, writer, ANY)
+        self.assertNotIn("REJECTED", [m["message_type"] for m in writer.sent])
+
+    async def test_inbound_rate_is_throttled_per_connection(self):
+        self.server._inbound_rate = 200.0
+        self.server._inbound_burst = 2
+        ping = b'{"message_type": "PING", "sent_at": 1}\n'
+        started = self.server._scheduler.time()
+
+        writer = await self._run_connection(ping * 6)
+
+        # Two frames ride the burst; the other four wait for tokens at 200/s
+        self.assertGreaterEqual(self.server._scheduler.time() - started, 4 / 200 * 0.9)
+        self.assertGreaterEqual(self.server._throttled_frames, 4)
+        self.assertEqual([m["message_type"] for m in writer.sent], ["PONG"] * 6)
+
+    async def test_repeat_answer_frames_skip_json_decoding(self):
+        alice, _ = await self._start_round_with_rtts([0.0, 0.0])
+        self.server._question_round.record_answer(alice, "1")
+        frame = b'{"message_type": "ANSWER", "answer": "1"}\n'
+
+        self.assertTrue(self.server._is_repeat_answer_frame(frame, alice.writer))
+        self.assertFalse(self.server._is_repeat_answer_frame(b'{"message_type": "PING"}\n', alice.writer))
+        self.server._scheduler.close()
+
 
 class _DummyWriter:
     def __init__(self):
         self.close_called = False
         self.wait_closed_called = False
+        self.sent = []
+
+    def write(self, data):
+        self.sent.append(json.loads(data))
+
+    async def drain(self):
+        return None
 
     def close(self):
         self.close_called = True
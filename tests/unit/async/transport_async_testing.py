@@ -0,0 +1,100 @@
+import asyncio
+import unittest
+from dataclasses import asdict
+
+from answer import generate_answer
+from client import Client, ClientHooks
+from server import Server, ServerMessageConfig
+from transport import LoopbackTransport
+
+
+def _make_config(port: int) -> ServerMessageConfig:
+    return ServerMessageConfig(
+        port=port,
+        players=2,
+        question_types=["Mathematics", "Roman Numerals"],
+        question_formats={"Mathematics": "Evaluate {}", "Roman Numerals": "Convert {}"},
+        question_seconds=5,
+        question_interval_seconds=0,
+        ready_info="Ready",
+        question_word="Question",
+        correct_answer="Correct",
+        incorrect_answer="Incorrect",
+        points_noun_singular="point",
+        points_noun_plural="points",
+        final_standings_heading="Final standings:",
+        one_winner="Winner: {}",
+        multiple_winners="Winners: {}",
+    )
+
+
+class TestLoopbackTransport(unittest.IsolatedAsyncioTestCase):
+
+    async def test_bytes_flow_both_ways_and_close_reads_as_eof(self):
+        network = LoopbackTransport()
+        received = asyncio.Queue()
+
+        async def echo(reader, writer):
+            line = await reader.readline()
+            writer.write(line.upper())
+            await writer.drain()
+            await received.put(await reader.read())
+            writer.close()
+
+        listener = await network.start_server(echo, "0.0.0.0", 0)
+        reader, writer = await network.open_connection("anywhere", listener.port)
+        writer.write(b"hello\n")
+        await writer.drain()
+
+        self.assertEqual(await reader.readline(), b"HELLO\n")
+        writer.close()
+        await writer.wait_closed()
+        self.assertEqual(await asyncio.wait_for(received.get(), timeout=1), b"")
+        self.assertEqual(await reader.read(), b"")
+
+    async def test_connecting_to_a_closed_port_is_refused(self):
+        network = LoopbackTransport()
+        listener = await network.start_server(lambda reader, writer: None, "0.0.0.0", 7777)
+        listener.close()
+
+        with self.assertRaises(ConnectionRefusedError):
+            await network.open_connection("0.0.0.0", 7777)
+
+    async def test_full_game_runs_in_one_loop(self):
+        network = LoopbackTransport()
+        cfg = _make_config(7777)
+        cfg.heartbeat_interval_seconds = 0
+        server = Server(**asdict(cfg), config_message=cfg, transport=network)
+        standings = []
+        alice = Client(username="alice", mode="auto", transport=network,
+                       hooks=ClientHooks(on_finished=standings.append))
+        bob = Client(username="bob", mode="you", transport=network,
+                     answerer=lambda question: generate_answer(question["question_type"], question["short_question"]))
+        alice.feed("CONNECT loopback:7777")
+
+        async def play_bob() -> list:
+            await bob.connect_to("loopback", 7777)
+            play = asyncio.create_task(bob.play())
+            events = [event async for event in bob.events()]
+            await play
+            return events
+
+        server_task = asyncio.create_task(server.start())
+        await asyncio.sleep(0)
+        events = asyncio.create_task(play_bob())
+        await asyncio.sleep(0)
+        await asyncio.wait_for(alice.connect(), timeout=5)
+        await asyncio.wait_for(alice.play(), timeout=5)
+        events = await asyncio.wait_for(events, timeout=5)
+        await asyncio.wait_for(server_task, timeout=5)
+
+        self.assertEqual(len(standings), 1)
+        self.assertIn("Winners: alice, bob", standings[0])
+        self.assertEqual([kind for kind, _ in events].count("question"), 2)
+        self.assertEqual([kind for kind, _ in events].count("result"), 2)
+        self.assertEqual(events[-1], ("finished", standings[0]))
+        self.assertEqual(sorted(sess.point for sess in server._sessions.values()), [2, 2])
+
+
+if __name__ == "__main__":
+    unittest.main()
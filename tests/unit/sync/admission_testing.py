@@ -0,0 +1,46 @@
+import unittest
+
+from admission import AdmissionController, TokenBucket
+
+
+class TestTokenBucket(unittest.TestCase):
+    def test_bucket_refills_over_time(self):
+        bucket = TokenBucket(rate=2.0, capacity=2, now=0.0)
+        self.assertTrue(bucket.consume(0.0))
+        self.assertTrue(bucket.consume(0.0))
+        self.assertFalse(bucket.consume(0.0))
+        self.assertTrue(bucket.consume(0.5))
+        self.assertFalse(bucket.consume(0.5))
+
+
+class TestAdmissionController(unittest.TestCase):
+    def _make(self, **overrides) -> AdmissionController:
+        params = dict(max_connections=2, rate_per_ip=1.0, burst_per_ip=5, queue_size=1)
+        params.update(overrides)
+        return AdmissionController(**params)
+
+    def test_global_connection_cap(self):
+        admission = self._make()
+        self.assertIsNone(admission.admit("10.0.0.1", 0.0))
+        self.assertIsNone(admission.admit("10.0.0.2", 0.0))
+        self.assertIsNotNone(admission.admit("10.0.0.3", 0.0))
+        admission.release()
+        self.assertIsNone(admission.admit("10.0.0.3", 0.0))
+
+    def test_per_ip_rate_limit(self):
+        admission = self._make(max_connections=100, burst_per_ip=2)
+        self.assertIsNone(admission.admit("10.0.0.1", 0.0))
+        self.assertIsNone(admission.admit("10.0.0.1", 0.0))
+        self.assertEqual(admission.admit("10.0.0.1", 0.0), "too many connection attempts")
+        self.assertIsNone(admission.admit("10.0.0.2", 0.0))
+
+    def test_waiting_queue_is_bounded_and_fifo(self):
+        admission = self._make(queue_size=2)
+        first, second, third = object(), object(), object()
+        self.assertEqual(admission.enqueue(first, {"username": "a"}), 1)
+        self.assertEqual(admission.enqueue(second, {"username": "b"}), 2)
+        self.assertIsNone(admission.enqueue(third, {"username": "c"}))
+        admission.forget(first)
+        self.assertTrue(admission.is_queued(second))
+        self.assertEqual(admission.dequeue(), (second, {"username": "b"}))
+        self.assertIsNone(admission.dequeue())
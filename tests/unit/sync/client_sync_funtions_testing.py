@@ -19,4 +19,30 @@ class TestClientConstructMessages(unittest.TestCase):
     def test_construct_bye_message(self):
         client = Client(username="bob", mode="you")
         message = client._construct_bye_message()
-        self.assertEqual(message["message_type"], "BYE")
\ No newline at end of file
+        self.assertEqual(message["message_type"], "BYE")
+
+    def test_construct_hi_message_carries_resume_token(self):
+        client = Client(username="bob", mode="you")
+        client._resume_token = "token"
+        message = client._construct_hi_message()
+        self.assertEqual(message["resume_token"], "token")
+
+    def test_leaderboard_delta_renders_like_full_state(self):
+        client = Client(username="bob", mode="you")
+        full = {
+            "message_type": "LEADERBOARD", "version": 1, "full": True,
+            "nouns": ["point", "points"],
+            "entries": [[0, "alice", 1, 1], [1, "bob", 0, 2], [2, "zoe", 0, 2]],
+        }
+        delta = {
+            "message_type": "LEADERBOARD", "version": 2, "base_version": 1,
+            "entries": [[0, "alice", 2, 1], [1, "bob", 0, 3], [2, "zoe", 1, 2]],
+        }
+        self.assertTrue(client._apply_leaderboard(full))
+        self.assertTrue(client._apply_leaderboard(delta))
+        self.assertEqual(client._render_leaderboard(), "1. alice: 2 points\n2. zoe: 1 point\n3. bob: 0 points")
+
+    def test_leaderboard_delta_with_missing_base_is_refused(self):
+        client = Client(username="bob", mode="you")
+        delta = {"message_type": "LEADERBOARD", "version": 5, "base_version": 4, "entries": []}
+        self.assertFalse(client._apply_leaderboard(delta))
@@ -0,0 +1,57 @@
+import json
+import sys
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import codec
+
+
+class TestCodecEncoding(unittest.TestCase):
+    def test_compiled_shapes_match_json_dumps(self):
+        messages = [
+            {"message_type": "RESULT", "correct": True, "feedback": "Café \"ok\"\n✓"},
+            {"message_type": "RESULT", "correct": False, "late": True, "late_by": 0.1234, "feedback": "x"},
+            {"message_type": "QUESTION", "question_type": "Mathematics", "short_question": "1 + 2",
+             "trivia_question": "Question 1 (Mathematics):\nEvaluate 1 + 2", "time_limit": 5},
+            {"message_type": "LEADERBOARD", "version": 3, "full": True, "nouns": ["point", "points"],
+             "entries": [[1, "alï", 2, 1]]},
+            {"message_type": "PONG", "sent_at": None},
+            {"message_type": "PING", "sent_at": 1e-7},
+            {"message_type": "BYE"},
+            {"message_type": "NEW_TYPE", "value": float("nan"), "big": 2 ** 70},
+        ]
+        for message in messages:
+            self.assertEqual(codec.encode(message), json.dumps(message).encode("utf-8"))
+
+    def test_messages_without_leading_message_type_use_json(self):
+        message = {"answer": "4", "message_type": "ANSWER"}
+        self.assertEqual(codec.encode(message), json.dumps(message).encode("utf-8"))
+
+
+class TestCodecDecoding(unittest.TestCase):
+    def test_round_trip(self):
+        message = {"message_type": "RESULT", "correct": True, "feedback": "é", "elapsed": 1.5}
+        self.assertEqual(codec.decode(codec.encode(message)), message)
+
+    def test_unknown_types_pass_through(self):
+        self.assertEqual(codec.decode(b'{"message_type": "NEW_TYPE", "x": 1}'),
+                         {"message_type": "NEW_TYPE", "x": 1})
+
+    def test_answer_field_is_optional(self):
+        self.assertEqual(codec.decode(b'{"message_type": "ANSWER"}'), {"message_type": "ANSWER"})
+
+    def test_invalid_frames_raise_protocol_error(self):
+        for frame in (b"not json", b"[1, 2]", b'{"answer": "4"}', b'{"message_type": ["ANSWER"]}',
+                      b'{"message_type": "ANSWER", "answer": 4}',
+                      b'{"message_type": "HI", "username": "a", "compression": "zlib"}',
+                      b'{"message_type": "ANSWER", "answer": "\xff"}'):
+            with self.assertRaises(codec.ProtocolError, msg=frame):
+                codec.decode(frame)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,14 +1,23 @@
 from pathlib import Path
 import sys
 import unittest
+import asyncio
+import contextlib
+import io
 import json
+import os
+import tempfile
+from unittest.mock import patch
 
 ROOT = Path(__file__).resolve().parents[2]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
 from client import Client
-from server import load_config
+import server
+from server import ConfigError, compile_config, load_config, validate_config
+from helper import event_loop_factory
+import qtypes
 
 
 CONFIG_DIR = Path(__file__).resolve().parents[2] / "config_files"
@@ -20,6 +29,11 @@ def _load_json(path: Path) -> dict:
 
 
 class TestConfigLoading(unittest.TestCase):
+    def setUp(self) -> None:
+        env = patch.dict(os.environ, {"TRIVIA_CONFIG_CACHE": ""})
+        env.start()
+        self.addCleanup(env.stop)
+
     def test_client_config_loading_human(self):
         config = _load_json(CONFIG_DIR / "client_human.json")
         config["mode"] = config["client_mode"]
@@ -53,3 +67,144 @@ class TestConfigLoading(unittest.TestCase):
         self.assertEqual(server._num_players, 1)
         self.assertIn("Mathematics", server._question_types)
         self.assertIn("Roman Numerals", server._question_formats)
+
+    def test_server_event_loop_defaults_to_asyncio(self):
+        server = load_config(CONFIG_DIR / "server_one_player.json")
+        self.assertEqual(server._event_loop, "asyncio")
+
+
+class TestConfigPreflight(unittest.TestCase):
+    def setUp(self) -> None:
+        self.config = _load_json(CONFIG_DIR / "server_one_player.json")
+
+    def test_shipped_config_is_valid(self):
+        self.assertEqual(validate_config(self.config), [])
+
+    def test_unknown_question_type_is_reported(self):
+        self.config["question_types"].append("Astronomy")
+        self.assertIn("unknown question type 'Astronomy'", validate_config(self.config))
+
+    def test_question_type_without_format_is_reported(self):
+        qtypes.register(qtypes.QuestionType("Hex", generate=lambda rng: "ff", solve=lambda q: str(int(q, 16))))
+        self.addCleanup(qtypes.unregister, "Hex")
+        self.config["question_types"].append("Hex")
+        problems = validate_config(self.config)
+        self.assertIn("question type 'Hex' has no entry in 'question_formats'", problems)
+
+    def test_registered_default_format_fills_missing_entry(self):
+        qtype = self.config["question_types"][0]
+        del self.config["question_formats"][qtype]
+        self.assertEqual(validate_config(self.config), [])
+
+    def test_unresolvable_placeholders_are_reported(self):
+        self.config["ready_info"] = "Starting in {question_interval_secs} seconds"
+        self.config["one_winner"] = "{} and {} win"
+        problems = validate_config(self.config)
+        self.assertTrue(any("question_interval_secs" in p for p in problems))
+        self.assertTrue(any(p.startswith("'one_winner'") for p in problems))
+
+    def test_missing_and_unknown_keys_are_reported(self):
+        del self.config["players"]
+        self.config["player"] = 2
+        problems = validate_config(self.config)
+        self.assertIn("missing key 'players'", problems)
+        self.assertIn("unknown key 'player'", problems)
+
+    def test_scheduler_is_not_a_config_key(self):
+        # A RoundScheduler is passed to Server directly; JSON cannot carry one
+        self.config["scheduler"] = "shared"
+        self.assertIn("unknown key 'scheduler'", validate_config(self.config))
+
+    def test_compiled_config_is_cached_by_file_hash(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "server.json"
+            cache_dir = Path(tmp) / "cache"
+            path.write_text(json.dumps(self.config), encoding="utf-8")
+
+            compiled = compile_config(path, cache_dir)
+            self.assertEqual(compiled["players"], self.config["players"])
+            self.assertEqual(len(list(cache_dir.glob("*.json"))), 1)
+            self.assertIs(compile_config(path, cache_dir), compiled)
+
+            self.config["question_types"] = ["Astronomy"]
+            path.write_text(json.dumps(self.config), encoding="utf-8")
+            with self.assertRaises(ConfigError):
+                compile_config(path, cache_dir)
+
+    def _write_config(self, tmp: str) -> Path:
+        path = Path(tmp) / "server.json"
+        path.write_text(json.dumps(self.config), encoding="utf-8")
+        return path
+
+    def test_disk_cache_is_off_by_default(self):
+        with tempfile.TemporaryDirectory() as tmp, \
+                patch.dict(os.environ, {"XDG_CACHE_HOME": tmp, "HOME": tmp}):
+            os.environ.pop("TRIVIA_CONFIG_CACHE", None)
+            compile_config(self._write_config(tmp))
+            self.assertEqual(list(Path(tmp).rglob("*.json")), [Path(tmp) / "server.json"])
+
+    def test_corrupt_cache_entry_is_a_miss(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path, cache_dir = self._write_config(tmp), Path(tmp) / "cache"
+            compile_config(path, cache_dir)
+            server._compiled_configs.clear()
+            [entry] = cache_dir.glob("*.json")
+            entry.write_text(json.dumps({"players": "two"}), encoding="utf-8")
+
+            self.assertEqual(compile_config(path, cache_dir)["players"], self.config["players"])
+            self.assertIn('"players": 1', entry.read_text(encoding="utf-8"))
+
+    def test_cache_hit_rechecks_question_types(self):
+        qtypes.register(qtypes.QuestionType("Hex", generate=lambda rng: "ff", solve=lambda q: str(int(q, 16)),
+                                            default_format="Convert {}"))
+        self.addCleanup(qtypes.unregister, "Hex")
+        self.config["question_types"].append("Hex")
+        with tempfile.TemporaryDirectory() as tmp:
+            path, cache_dir = self._write_config(tmp), Path(tmp) / "cache"
+            compile_config(path, cache_dir)
+            qtypes.unregister("Hex")
+            with self.assertRaises(ConfigError) as raised:
+                compile_config(path, cache_dir)
+            self.assertIn("unknown question type 'Hex'", raised.exception.problems)
+
+    def test_entries_from_another_schema_are_pruned(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path, cache_dir = self._write_config(tmp), Path(tmp) / "cache"
+            cache_dir.mkdir()
+            stale = cache_dir / f"{'0' * 64}-{'f' * 16}.json"
+            stale.write_text("{}", encoding="utf-8")
+            compile_config(path, cache_dir)
+            [entry] = cache_dir.glob("*.json")
+            self.assertTrue(entry.name.endswith(f"-{server._config_schema_fingerprint()}.json"))
+
+    def test_unrelated_files_in_the_cache_directory_survive(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = self._write_config(tmp)
+            neighbour = Path(tmp) / "c.json"
+            neighbour.write_text('{"username": "wahyu"}', encoding="utf-8")
+
+            compile_config(path, Path(tmp))
+
+            self.assertTrue(path.exists())
+            self.assertEqual(neighbour.read_text(encoding="utf-8"), '{"username": "wahyu"}')
+            self.assertEqual(len(list(Path(tmp).glob("*.json"))), 3)
+
+
+class TestEventLoopSelection(unittest.TestCase):
+    def test_default_backend_is_stock_asyncio(self):
+        self.assertEqual(event_loop_factory(None), ("asyncio", asyncio.new_event_loop))
+        self.assertEqual(event_loop_factory("asyncio"), ("asyncio", asyncio.new_event_loop))
+
+    def test_unknown_backend_is_rejected(self):
+        with self.assertRaises(ValueError):
+            event_loop_factory("trio")
+
+    def test_uvloop_falls_back_when_missing(self):
+        with contextlib.redirect_stderr(io.StringIO()):
+            used, factory = event_loop_factory("uvloop")
+        try:
+            import uvloop
+        except ImportError:
+            self.assertEqual((used, factory), ("asyncio", asyncio.new_event_loop))
+        else:
+            self.assertEqual((used, factory), ("uvloop", uvloop.new_event_loop))
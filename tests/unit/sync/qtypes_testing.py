@@ -0,0 +1,63 @@
+import sys
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import qtypes
+from answer import generate_answer
+
+
+def _hex_question_type() -> qtypes.QuestionType:
+    return qtypes.QuestionType(
+        name="Hexadecimal",
+        generate=lambda rng: "ff",
+        solve=lambda short_question: str(int(short_question, 16)),
+        canonicalize=qtypes.canonical_integer,
+        default_format="Convert 0x{} to decimal",
+    )
+
+
+class TestQuestionTypeRegistry(unittest.TestCase):
+    def tearDown(self) -> None:
+        qtypes.unregister("Hexadecimal")
+
+    def test_builtin_types_are_registered(self):
+        for name in ("Mathematics", "Roman Numerals", "Usable IP Addresses of a Subnet",
+                     "Network and Broadcast Address of a Subnet"):
+            qtype = qtypes.get(name)
+            self.assertIsNotNone(qtype)
+            short_question = qtype.generate(None)
+            self.assertEqual(generate_answer(name, short_question), qtype.solve(short_question))
+
+    def test_registered_type_dispatches_through_generate_answer(self):
+        qtypes.register(_hex_question_type())
+        self.assertEqual(generate_answer("Hexadecimal", "ff"), "255")
+        with self.assertRaises(ValueError):
+            qtypes.register(_hex_question_type())
+
+    def test_canonicalizer_is_applied_to_both_sides(self):
+        self.assertTrue(qtypes.get("Roman Numerals").is_correct(" 042", "42"))
+        network = qtypes.get("Network and Broadcast Address of a Subnet")
+        self.assertTrue(network.is_correct("10.0.0.0  and 10.0.0.255 ", "10.0.0.0 and 10.0.0.255"))
+
+    def test_batch_variants_fall_back_to_single_calls(self):
+        math = qtypes.get("Mathematics")
+        questions = math.generate_many(3)
+        self.assertEqual(len(questions), 3)
+        self.assertEqual(math.solve_many(questions), [math.solve(q) for q in questions])
+
+    def test_entry_point_plugins_are_loaded_on_first_miss(self):
+        entry_point = SimpleNamespace(name="hex", load=lambda: _hex_question_type)
+        with patch.object(qtypes, "_plugins_loaded", False), \
+                patch("importlib.metadata.entry_points", return_value=[entry_point]) as found:
+            self.assertIsNotNone(qtypes.get("Hexadecimal"))
+            found.assert_called_once_with(group=qtypes.ENTRY_POINT_GROUP)
+
+
+if __name__ == "__main__":
+    unittest.main()
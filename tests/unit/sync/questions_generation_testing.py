@@ -14,6 +14,8 @@ from questions import (
     generate_roman_numerals_question,
     generate_usable_addresses_question,
     generate_network_broadcast_question,
+    derive_rng,
+    set_seed,
 )
 
 
@@ -40,6 +42,20 @@ class TestQuestionGeneration(unittest.TestCase):
             question = generate_network_broadcast_question()
             self._assert_valid_ip_cidr(question)
 
+    def test_room_streams_are_reproducible_and_independent(self):
+        def sample(rng):
+            return [generate_mathematics_question(rng), generate_roman_numerals_question(rng),
+                    generate_usable_addresses_question(rng)]
+
+        self.assertEqual(sample(derive_rng(1234, "room-a")), sample(derive_rng(1234, "room-a")))
+        self.assertNotEqual(sample(derive_rng(1234, "room-a")), sample(derive_rng(1234, "room-b")))
+
+    def test_set_seed_controls_the_default_stream(self):
+        set_seed("integration")
+        first = generate_mathematics_question()
+        set_seed("integration")
+        self.assertEqual(generate_mathematics_question(), first)
+
     def _assert_valid_ip_cidr(self, cidr_notation: str):
         pattern = re.compile(r"^(?:\d{1,3}\.){3}\d{1,3}/(3[0-2]|[12]?\d)$")
         self.assertRegex(cidr_notation, pattern)
@@ -6,6 +6,7 @@ from server import (
     QuestionRound,
     Server,
     ServerMessageConfig,
+    SessionTable,
 )
 
 
@@ -85,7 +86,6 @@ class TestServerFunctions(unittest.TestCase):
             started_at=0.0,
             finished_at=5.0,
             num_of_users=2,
-            answers_by_session={},
         )
 
         message = self.server._construct_question_message()
@@ -181,3 +181,43 @@ class TestServerFunctions(unittest.TestCase):
         self.server._transition_state(GameState.QUESTION, "testing")
         self.assertEqual(self.server._state, GameState.QUESTION)
 
+
+    def test_question_round_tracks_outstanding_answers(self):
+        table = SessionTable()
+        alice = table.add("alice", None)
+        bob = table.add("bob", None)
+        question_round = QuestionRound(
+            round_no=1,
+            qtype="Mathematics",
+            short_question="1 + 1",
+            trivia_question="Question 1",
+            correct_answer="2",
+            started_at=0.0,
+            finished_at=5.0,
+            num_of_users=2,
+            awaiting=[alice, bob],
+            capacity=table.capacity,
+        )
+
+        self.assertFalse(question_round.record_answer(alice, "2"))
+        self.assertFalse(question_round.record_answer(alice, "3"))
+        self.assertFalse(question_round.has_everyone_answered())
+        self.assertTrue(question_round.discard_session(bob))
+        self.assertTrue(question_round.has_everyone_answered())
+        self.assertTrue(question_round.is_finished(None, 1.0))
+        # First answer wins; the second only counts as a duplicate
+        self.assertEqual(question_round.answer_of(alice), "2")
+        self.assertEqual(question_round.duplicates, 1)
+        self.assertIsNone(question_round.answer_of(bob))
+
+    def test_session_table_assigns_dense_ids(self):
+        table = SessionTable()
+        writers = [object() for _ in range(3)]
+        sessions = [table.add(f"p{i}", w) for i, w in enumerate(writers)]
+
+        self.assertEqual([sess.sid for sess in sessions], [0, 1, 2])
+        self.assertIs(table[writers[1]], sessions[1])
+        self.assertIs(table.by_id(2), sessions[2])
+        self.assertIsNone(table.get(object()))
+        self.assertEqual(len(table), 3)
+        self.assertFalse(hasattr(sessions[0], "__dict__"))
@@ -0,0 +1,24 @@
+import sys
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[3]
+for path in (ROOT, ROOT / "benchmarks"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+import session_memory
+
+
+class TestSessionMemory(unittest.TestCase):
+    def test_compact_layout_is_smaller_than_legacy(self):
+        # The benchmark's own measurement and size; dict and set resizes make
+        # much smaller counts compare the container growth steps instead
+        writers = [object() for _ in range(session_memory.SESSIONS)]
+        legacy = session_memory._measure(session_memory._legacy_layout, writers)
+        compact = session_memory._measure(session_memory._compact_layout, writers)
+        self.assertLess(compact, legacy)
+
+
+if __name__ == "__main__":
+    unittest.main()
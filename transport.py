@@ -0,0 +1,186 @@
+"""Connection transports for the server and client.
+
+TcpTransport is plain asyncio streams. LoopbackTransport connects both ends
+inside one event loop: each connection is a pair of in-memory transports that
+hand written bytes straight to the other side's StreamReaderProtocol, so the
+server and client code see ordinary StreamReader/StreamWriter objects. A whole
+game (server, clients, bots) can then run in one loop without sockets, which
+is what the fast tests and the loopback benchmark use.
+"""
+
+import asyncio
+import errno
+import itertools
+from typing import Any, Awaitable, Callable
+
+ClientConnected = Callable[[asyncio.StreamReader, asyncio.StreamWriter], Awaitable[None]]
+
+DEFAULT_LIMIT = 2 ** 16
+
+
+class TcpTransport:
+    name = "tcp"
+
+    async def start_server(self, client_connected: ClientConnected, host: str, port: int,
+                           limit: int = DEFAULT_LIMIT) -> asyncio.Server:
+        return await asyncio.start_server(client_connected, host=host, port=port, limit=limit)
+
+    async def open_connection(self, host: str, port: int,
+                              limit: int = DEFAULT_LIMIT) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        return await asyncio.open_connection(host, port, limit=limit)
+
+
+class _PipeEnd(asyncio.Transport):
+    """One end of an in-memory connection; write() feeds the peer's protocol directly."""
+
+    def __init__(self, protocol: asyncio.StreamReaderProtocol, peername: tuple[str, int],
+                 sockname: tuple[str, int]):
+        super().__init__({"peername": peername, "sockname": sockname})
+        self._protocol = protocol
+        self._peer: "_PipeEnd | None" = None
+        self._closing = False
+        self._paused = False
+
+    def write(self, data: bytes | bytearray | memoryview) -> None:
+        # Like a socket whose other side is gone, writes after close are dropped
+        peer = self._peer
+        if self._closing or not data or peer is None or peer._closing:
+            return
+        peer._protocol.data_received(bytes(data))
+
+    def writelines(self, list_of_data) -> None:
+        self.write(b"".join(list_of_data))
+
+    def can_write_eof(self) -> bool:
+        return True
+
+    def write_eof(self) -> None:
+        if self._peer is not None and not self._peer._closing:
+            self._peer._protocol.eof_received()
+
+    def get_write_buffer_size(self) -> int:
+        return 0
+
+    def set_write_buffer_limits(self, high: int | None = None, low: int | None = None) -> None:
+        pass
+
+    # The reader pauses its own transport when its buffer fills up; that is
+    # passed on as backpressure to whoever writes into it, so drain() blocks.
+    def pause_reading(self) -> None:
+        if not self._paused:
+            self._paused = True
+            if self._peer is not None and not self._peer._closing:
+                self._peer._protocol.pause_writing()
+
+    def resume_reading(self) -> None:
+        if self._paused:
+            self._paused = False
+            if self._peer is not None and not self._peer._closing:
+                self._peer._protocol.resume_writing()
+
+    def is_reading(self) -> bool:
+        return not self._paused
+
+    def is_closing(self) -> bool:
+        return self._closing
+
+    def close(self) -> None:
+        if self._closing:
+            return
+        self._closing = True
+        peer = self._peer
+        if peer is not None and not peer._closing:
+            if self._paused:
+                peer._protocol.resume_writing()
+            # The other side reads EOF; it stays open until it closes too
+            peer._protocol.eof_received()
+        asyncio.get_running_loop().call_soon(self._protocol.connection_lost, None)
+
+    def abort(self) -> None:
+        self.close()
+
+
+class LoopbackListener:
+    """What start_server returns for the loopback transport (a subset of asyncio.Server)."""
+
+    def __init__(self, transport: "LoopbackTransport", client_connected: ClientConnected,
+                 host: str, port: int, limit: int):
+        self._transport = transport
+        self._client_connected = client_connected
+        self.host = host
+        self.port = port
+        self._limit = limit
+        self._serving = True
+        self.sockets: list[Any] = []
+        self.connections = 0
+
+    def is_serving(self) -> bool:
+        return self._serving
+
+    def close(self) -> None:
+        # Stops accepting; established connections are left alone, as with asyncio.Server
+        if self._serving:
+            self._serving = False
+            self._transport._listeners.pop(self.port, None)
+
+    async def wait_closed(self) -> None:
+        return None
+
+    async def __aenter__(self) -> "LoopbackListener":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.close()
+        await self.wait_closed()
+
+    def _accept(self, limit: int) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        loop = asyncio.get_running_loop()
+        client_addr = ("127.0.0.1", next(self._transport._ephemeral_ports))
+        server_addr = (self.host, self.port)
+
+        client_reader = asyncio.StreamReader(limit=limit, loop=loop)
+        client_protocol = asyncio.StreamReaderProtocol(client_reader, loop=loop)
+        server_reader = asyncio.StreamReader(limit=self._limit, loop=loop)
+        server_protocol = asyncio.StreamReaderProtocol(server_reader, self._client_connected, loop=loop)
+
+        client_end = _PipeEnd(client_protocol, peername=server_addr, sockname=client_addr)
+        server_end = _PipeEnd(server_protocol, peername=client_addr, sockname=server_addr)
+        client_end._peer, server_end._peer = server_end, client_end
+
+        client_protocol.connection_made(client_end)
+        # Schedules client_connected(reader, writer) as a task, like a real accept
+        server_protocol.connection_made(server_end)
+        self.connections += 1
+        return client_reader, asyncio.StreamWriter(client_end, client_protocol, client_reader, loop)
+
+
+class LoopbackTransport:
+    """In-memory network: servers listen on port numbers, clients connect to them.
+
+    Host names are ignored; one instance is one isolated network, so tests
+    and benchmarks can create as many as they like.
+    """
+
+    name = "loopback"
+
+    def __init__(self) -> None:
+        self._listeners: dict[int, LoopbackListener] = {}
+        self._free_ports = itertools.count(1024)
+        self._ephemeral_ports = itertools.count(49152)
+
+    async def start_server(self, client_connected: ClientConnected, host: str, port: int,
+                           limit: int = DEFAULT_LIMIT) -> LoopbackListener:
+        if port == 0:
+            port = next(port for port in self._free_ports if port not in self._listeners)
+        if port in self._listeners:
+            raise OSError(errno.EADDRINUSE, f"loopback port {port} is already in use")
+        listener = LoopbackListener(self, client_connected, host, port, limit)
+        self._listeners[port] = listener
+        return listener
+
+    async def open_connection(self, host: str, port: int,
+                              limit: int = DEFAULT_LIMIT) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        listener = self._listeners.get(port)
+        if listener is None:
+            raise ConnectionRefusedError(errno.ECONNREFUSED, f"nothing is listening on loopback port {port}")
+        return listener._accept(limit)